@@ -0,0 +1,101 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import pandas as pd
+
+
+#Almacen de datos compartido por todas las sesiones del proceso
+#
+#Cada libro se guarda una sola vez, con su hash de contenido como llave; las sesiones solo
+#guardan la version. Las tablas nunca se modifican en su lugar (nada de .loc[...] = ni
+#inplace=True sobre ellas): quien necesite columnas nuevas o distintas las deriva con assign,
+#concat o una copia de las columnas que cambia. Asi la garantia no depende de copy-on-write.
+
+# Libros distintos que se conservan en memoria (los menos usados salen primero)
+MAX_DATASETS = 4
+
+
+@dataclass(frozen=True)
+class Dataset:
+    version: str
+    viajes: pd.DataFrame
+    asignacion: pd.DataFrame
+    riesgo: pd.DataFrame
+    forecast: pd.DataFrame
+
+    @property
+    def frames(self):
+        return self.viajes, self.asignacion, self.riesgo, self.forecast
+
+    def view(self):
+        #Copias ligeras: comparten la memoria; agregar o reemplazar columnas solo afecta a la copia
+        return Dataset(
+            version=self.version,
+            viajes=self.viajes.copy(deep=False),
+            asignacion=self.asignacion.copy(deep=False),
+            riesgo=self.riesgo.copy(deep=False),
+            forecast=self.forecast.copy(deep=False),
+        )
+
+
+class DatasetStore:
+
+    def __init__(self, max_datasets=MAX_DATASETS):
+        self.max_datasets = max_datasets
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+        self._cargando = {}
+
+    def __contains__(self, version):
+        with self._lock:
+            return version in self._datos
+
+    def __len__(self):
+        with self._lock:
+            return len(self._datos)
+
+    def get(self, version):
+        with self._lock:
+            dataset = self._datos.get(version)
+            if dataset is not None:
+                self._datos.move_to_end(version)
+        return None if dataset is None else dataset.view()
+
+    def put(self, version, hojas):
+        dataset = Dataset(
+            version=version,
+            viajes=hojas["Viajes"],
+            asignacion=hojas["Asignacion"],
+            riesgo=hojas["Riesgo"],
+            forecast=hojas["Forecast"],
+        )
+        with self._lock:
+            self._datos[version] = dataset
+            self._datos.move_to_end(version)
+            while len(self._datos) > self.max_datasets:
+                self._datos.popitem(last=False)
+        return dataset.view()
+
+    def get_or_load(self, version, cargar):
+        #Si varias sesiones suben el mismo libro a la vez, solo una lo lee
+        dataset = self.get(version)
+        if dataset is not None:
+            return dataset
+
+        with self._lock:
+            lock = self._cargando.setdefault(version, threading.Lock())
+        with lock:
+            dataset = self.get(version)
+            if dataset is None:
+                dataset = self.put(version, cargar())
+        with self._lock:
+            self._cargando.pop(version, None)
+        return dataset
+
+    def versions(self):
+        with self._lock:
+            return list(self._datos)
+
+
+STORE = DatasetStore()
@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+
+
+#Asignacion ruta-unidad con demanda por ruta y capacidad por unidad (en viajes)
+#
+#Es un problema de transporte: cada par ruta-unidad lleva una cantidad entera de viajes, la
+#suma por ruta no pasa de su demanda y la suma por unidad no pasa de su capacidad. El metodo
+#exacto lo resuelve como programa lineal (una variable por par, sin expandir rutas ni unidades
+#en espacios); el voraz toma los pares de menor probabilidad primero.
+
+# Costo de dejar una ruta sin unidad; mayor que cualquier probabilidad
+COSTO_SIN_ASIGNAR = 10.0
+# Metodos de solucion
+METODOS = ("exacto", "voraz")
+# Capacidad por defecto de las salidas (tablero, motor y API): -1 = hoja Asignacion del libro,
+# 0 = automatica, n = viajes por unidad
+CAPACIDAD_DEFECTO = -1
+
+
+def risk_pairs(riesgo):
+    #Promedio por combinacion ruta-unidad y codigos enteros de cada dimension
+    pares = (
+        riesgo.dropna(subset=["Ruta", "Tractocamión", "Prob_vacio"])
+        .groupby(["Ruta", "Tractocamión"], sort=False, observed=True)["Prob_vacio"]
+        .mean()
+        .reset_index()
+    )
+    ri, rutas = pd.factorize(pares["Ruta"], sort=True)
+    ui, unidades = pd.factorize(pares["Tractocamión"], sort=True)
+    return pares, ri, ui, np.asarray(rutas, dtype=object), np.asarray(unidades, dtype=object)
+
+
+def solve_assignment(riesgo, capacidad=None, demanda=None, metodo="exacto"):
+    #Una fila por par con viajes asignados (columna Viajes) y una sin unidad por la demanda que no se cubre
+    pares, ri, ui, rutas, unidades = risk_pairs(riesgo)
+
+    #demanda: viajes de cada ruta; capacidad: viajes que puede cubrir cada unidad
+    demanda = _por_codigo(demanda, rutas, 1)
+    if capacidad is None:
+        capacidad = int(np.ceil(demanda.sum() / max(len(unidades), 1)))
+    capacidad = _por_codigo(capacidad, unidades, 1)
+
+    prob = pares["Prob_vacio"].to_numpy(dtype=float)
+    if metodo == "exacto":
+        flujo = _transport(prob, ri, ui, demanda, capacidad)
+    elif metodo == "voraz":
+        flujo = _greedy(prob, ri, ui, demanda, capacidad)
+    else:
+        raise ValueError(f"Método de asignación desconocido: {metodo}")
+
+    usados = flujo > 0
+    faltante = demanda - np.bincount(ri[usados], weights=flujo[usados], minlength=len(rutas)).astype(np.int64)
+    sin_unidad = faltante > 0
+    n_sin = int(sin_unidad.sum())
+    resultado = pd.DataFrame({
+        "Ruta": np.concatenate([rutas[ri[usados]], rutas[sin_unidad]]),
+        "Tractocamión": np.concatenate([unidades[ui[usados]], np.full(n_sin, None, dtype=object)]),
+        "Prob_vacio": np.concatenate([prob[usados], np.full(n_sin, np.nan)]),
+        "Viajes": np.concatenate([flujo[usados], faltante[sin_unidad]]),
+    })
+    return resultado.sort_values("Prob_vacio", na_position="last", kind="stable").reset_index(drop=True)
+
+
+def _transport(prob, ri, ui, demanda, capacidad):
+    #Las restricciones de transporte son totalmente unimodulares: la solucion basica que deja el
+    #crossover del punto interior es entera (el simplex dual es mucho mas lento con tantos empates)
+    from scipy import sparse
+    from scipy.optimize import linprog
+
+    n = len(prob)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    columnas = np.arange(n)
+    restricciones = sparse.vstack([
+        sparse.csr_matrix((np.ones(n), (ri, columnas)), shape=(len(demanda), n)),
+        sparse.csr_matrix((np.ones(n), (ui, columnas)), shape=(len(capacidad), n)),
+    ]).tocsr()
+    # Cada viaje asignado descuenta COSTO_SIN_ASIGNAR: primero se cubre la mayor demanda posible
+    solucion = linprog(
+        prob - COSTO_SIN_ASIGNAR,
+        A_ub=restricciones,
+        b_ub=np.concatenate([demanda, capacidad]),
+        bounds=(0, None),
+        method="highs-ipm",
+    )
+    if solucion.status != 0:
+        raise RuntimeError(f"No se pudo resolver la asignación: {solucion.message}")
+    return np.rint(solucion.x).astype(np.int64)
+
+
+def _greedy(prob, ri, ui, demanda, capacidad):
+    #Pares de menor probabilidad primero, cada uno con todos los viajes que permitan su ruta y su unidad
+    resto_ruta = demanda.tolist()
+    resto_unidad = capacidad.tolist()
+    flujo = np.zeros(len(prob), dtype=np.int64)
+    orden = np.argsort(prob, kind="stable")
+    for k, r, u in zip(orden.tolist(), ri[orden].tolist(), ui[orden].tolist()):
+        viajes = min(resto_ruta[r], resto_unidad[u])
+        if viajes > 0:
+            flujo[k] = viajes
+            resto_ruta[r] -= viajes
+            resto_unidad[u] -= viajes
+    return flujo
+
+
+def route_probability(asignacion):
+    #Probabilidad de la asignacion por ruta, ponderada por los viajes de cada par (sin Viajes: promedio simple)
+    prob = asignacion["Prob_vacio"].to_numpy(dtype=float)
+    pesos = asignacion["Viajes"].to_numpy(dtype=float) if "Viajes" in asignacion else np.ones(len(prob))
+    pesos = np.where(np.isnan(prob), 0.0, pesos)
+    suma = pd.DataFrame({"peso": pesos, "ponderada": np.nan_to_num(prob) * pesos}).groupby(
+        asignacion["Ruta"].to_numpy(), sort=True
+    ).sum()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        media = suma["ponderada"] / suma["peso"]
+    media.index.name = "Ruta"
+    return media.rename("Prob_vacio")
+
+
+def _por_codigo(valor, etiquetas, defecto):
+    #Acepta un escalar, un dict o una Series indexada por etiqueta
+    if valor is None:
+        return np.full(len(etiquetas), defecto, dtype=np.int64)
+    if np.isscalar(valor):
+        return np.full(len(etiquetas), int(valor), dtype=np.int64)
+    serie = pd.Series(valor).reindex(etiquetas).fillna(defecto)
+    return serie.to_numpy(dtype=np.int64)
@@ -0,0 +1,114 @@
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+
+#Indice de rutas por trigramas para el buscador (sin acentos, sin mayusculas, tolerante a errores)
+
+# Fraccion minima de trigramas de la consulta que deben aparecer en la ruta
+MIN_COBERTURA = 0.5
+
+
+def normalize(texto):
+    texto = unicodedata.normalize("NFKD", str(texto))
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return " ".join(texto.lower().split())
+
+
+def trigrams(texto):
+    texto = f"  {texto} "
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+class RouteIndex:
+
+    def __init__(self, df, route_col="Ruta", best_by=None):
+        # Filas sin ruta no se pueden buscar; fuera antes de codificar (factorize les daria -1)
+        self.df = df[df[route_col].notna()].reset_index(drop=True)
+        codigos, rutas = pd.factorize(self.df[route_col], sort=False)
+        self.rutas = np.asarray(rutas, dtype=object)
+        self.normalizadas = np.array([normalize(r) for r in self.rutas], dtype=str)
+
+        # Filas del DataFrame agrupadas por ruta: orden + offsets
+        self._orden = np.argsort(codigos, kind="stable")
+        self._offsets = np.searchsorted(codigos[self._orden], np.arange(len(self.rutas) + 1))
+
+        # Mejor fila por ruta (p.ej. tractocamion con menor Prob_vacio)
+        self.best_rows = None
+        if best_by is not None:
+            mejor = (
+                self.df.assign(_codigo=codigos)
+                .sort_values(best_by, kind="stable")
+                .drop_duplicates("_codigo")
+                .sort_values("_codigo")
+            )
+            self.best_rows = mejor.drop(columns="_codigo").reset_index(drop=True)
+
+        # Listas invertidas trigrama -> posiciones de ruta (formato CSR)
+        vocab = {}
+        tri_ids, tri_rutas = [], []
+        self._n_trigramas = np.empty(len(self.rutas), dtype=np.int32)
+        for pos, texto in enumerate(self.normalizadas):
+            tris = trigrams(texto)
+            self._n_trigramas[pos] = len(tris)
+            for t in tris:
+                tri_ids.append(vocab.setdefault(t, len(vocab)))
+                tri_rutas.append(pos)
+        tri_ids = np.asarray(tri_ids, dtype=np.int64)
+        tri_rutas = np.asarray(tri_rutas, dtype=np.int32)
+        orden = np.argsort(tri_ids, kind="stable")
+        self._postings = tri_rutas[orden]
+        self._posting_offsets = np.searchsorted(tri_ids[orden], np.arange(len(vocab) + 1))
+        self._vocab = vocab
+
+    def __len__(self):
+        return len(self.rutas)
+
+    def search(self, query, k=10):
+        consulta = normalize(query)
+        if not consulta:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        tris = trigrams(consulta)
+        n_consulta = len(tris)
+        ids = [self._vocab[t] for t in tris if t in self._vocab]
+        if not ids:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        ids = np.asarray(ids)
+        inicio = self._posting_offsets[ids]
+        fin = self._posting_offsets[ids + 1]
+        candidatos = np.concatenate([self._postings[a:b] for a, b in zip(inicio, fin)])
+        comunes = np.bincount(candidatos, minlength=len(self.rutas))
+
+        cobertura = comunes / n_consulta
+        posiciones = np.flatnonzero(cobertura >= MIN_COBERTURA)
+        if posiciones.size == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        # Puntaje: cobertura de la consulta + jaccard para preferir rutas mas cortas
+        inter = comunes[posiciones]
+        jaccard = inter / (n_consulta + self._n_trigramas[posiciones] - inter)
+        puntaje = cobertura[posiciones] + 0.5 * jaccard
+
+        # Bonos por coincidencia exacta de prefijo o subcadena (en cualquier parte del nombre; los
+        # trigramas con relleno solo coinciden al inicio de la ruta o al final de una palabra)
+        encontrado = np.char.find(self.normalizadas[posiciones], consulta)
+        puntaje = puntaje + np.select([encontrado == 0, encontrado > 0], [2.0, 1.0], 0.0)
+
+        k = min(k, posiciones.size)
+        top = np.argpartition(-puntaje, k - 1)[:k]
+        top = top[np.argsort(-puntaje[top], kind="stable")]
+        return posiciones[top], puntaje[top]
+
+    def rows(self, posiciones):
+        if len(posiciones) == 0:
+            return self.df.iloc[:0]
+        filas = np.concatenate([
+            self._orden[self._offsets[p]:self._offsets[p + 1]] for p in posiciones
+        ])
+        return self.df.iloc[filas]
+
+    def best(self, posicion):
+        return self.best_rows.iloc[posicion]
@@ -0,0 +1,227 @@
+import hashlib
+import io
+import json
+from pathlib import Path
+
+import pandas as pd
+
+from limpieza import clean_trips
+
+
+#Lectura del libro de Excel en una sola pasada con cache columnar en disco
+
+HOJAS = ["Viajes", "Asignacion", "Riesgo", "Forecast"]
+
+# Carpeta donde se guardan los sidecar Parquet (uno por hoja y por version)
+CACHE_DIR = Path(".cache_datos")
+
+# Formato de los sidecar; cambia si cambia la limpieza o la compactacion de columnas
+FORMATO_SIDECAR = "c2"
+
+# Columnas que usa alguna pantalla; el resto se descarta al cargar
+COLUMNAS_USADAS = {
+    "Viajes": [
+        "Ruta", "Tractocamión", "Nombre Cliente", "Estatus de Viaje",
+        "Fecha Salida", "Fecha Llegada", "Duración_horas", "Peso Kgs",
+    ],
+    "Asignacion": ["Ruta", "Tractocamión", "Prob_vacio"],
+    "Riesgo": ["Ruta", "Tractocamión", "Prob_vacio"],
+    "Forecast": ["Fecha", "pronostico"],
+}
+# Texto con pocos valores distintos se guarda como categoria (codigos + diccionario)
+MAX_PROPORCION_CATEGORIA = 0.5
+
+# Cache en proceso (ruta, tamaño, mtime) -> hash para no releer el archivo local en cada rerun
+_hash_por_ruta = {}
+# Reporte de limpieza y de memoria antes/despues de compactar, por version
+_reportes = {}
+
+
+def _parquet_disponible():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def read_bytes(file_obj):
+    if isinstance(file_obj, (str, Path)):
+        return Path(file_obj).read_bytes()
+    if hasattr(file_obj, "getvalue"):
+        return file_obj.getvalue()
+    file_obj.seek(0)
+    return file_obj.read()
+
+
+def hash_bytes(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def workbook_version(file_obj):
+    #Para archivos locales solo se vuelve a calcular el hash si cambió el archivo
+    if isinstance(file_obj, (str, Path)):
+        stat = Path(file_obj).stat()
+        clave = (str(Path(file_obj).resolve()), stat.st_size, stat.st_mtime_ns)
+        if clave not in _hash_por_ruta:
+            _hash_por_ruta[clave] = hash_bytes(read_bytes(file_obj))
+        return _hash_por_ruta[clave]
+    return hash_bytes(read_bytes(file_obj))
+
+
+def _sidecar(version, hoja):
+    return CACHE_DIR / f"{version}_{FORMATO_SIDECAR}_{hoja}.parquet"
+
+
+def _reporte_sidecar(version):
+    return CACHE_DIR / f"{version}_{FORMATO_SIDECAR}_reporte.json"
+
+
+def _leer_sidecar(version):
+    if not _parquet_disponible():
+        return None
+    rutas = [_sidecar(version, hoja) for hoja in HOJAS]
+    if not all(p.exists() for p in rutas):
+        return None
+    try:
+        return {hoja: pd.read_parquet(p) for hoja, p in zip(HOJAS, rutas)}
+    except Exception:
+        return None
+
+
+def read_cached(version):
+    #Hojas de una version ya leida antes (sidecar Parquet) o None
+    return _leer_sidecar(version)
+
+
+def write_cached(version, hojas):
+    #Guarda una version derivada (p. ej. con viajes agregados) para releerla si sale del almacen
+    _escribir_sidecar(version, hojas)
+
+
+def frame_version(*tablas):
+    #Hash del contenido de una o varias tablas (columnas y valores, sin el indice)
+    h = hashlib.blake2b(digest_size=16)
+    for df in tablas:
+        h.update(repr(list(df.columns)).encode())
+        h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def _escribir_sidecar(version, hojas, reporte=None):
+    if not _parquet_disponible():
+        return
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        for hoja, df in hojas.items():
+            destino = _sidecar(version, hoja)
+            tmp = destino.with_suffix(".tmp")
+            df.to_parquet(tmp, index=False)
+            tmp.replace(destino)
+        if reporte is not None:
+            _reporte_sidecar(version).write_text(json.dumps(reporte, ensure_ascii=False), encoding="utf-8")
+    except Exception:
+        #Columnas con tipos mezclados no se pueden guardar; se vuelve a leer el Excel
+        for hoja in hojas:
+            _sidecar(version, hoja).unlink(missing_ok=True)
+
+
+def _memoria(df):
+    return int(df.memory_usage(deep=True).sum())
+
+
+def compact_frame(df, columnas=None):
+    #Solo columnas usadas, texto repetido como categoria y numeros en el tipo mas chico
+    if columnas is not None:
+        df = df[[c for c in columnas if c in df.columns]]
+    df = df.copy()
+
+    for col in df.columns:
+        serie = df[col]
+        if pd.api.types.is_bool_dtype(serie) or isinstance(serie.dtype, pd.CategoricalDtype):
+            continue
+        if pd.api.types.is_float_dtype(serie):
+            #Pesos, duraciones y probabilidades: float32 sobra para la precision que se muestra
+            df[col] = serie.astype("float32")
+        elif pd.api.types.is_integer_dtype(serie):
+            df[col] = pd.to_numeric(serie, downcast="integer")
+        elif pd.api.types.is_object_dtype(serie) or pd.api.types.is_string_dtype(serie):
+            if serie.nunique(dropna=True) <= MAX_PROPORCION_CATEGORIA * max(len(serie), 1):
+                df[col] = serie.astype("category")
+    return df
+
+
+def compact_workbook(hojas):
+    #Compacta las cuatro hojas y regresa cuanto ocupaban antes y despues
+    compactas, reporte = {}, []
+    for hoja, df in hojas.items():
+        compacta = compact_frame(df, COLUMNAS_USADAS.get(hoja))
+        compactas[hoja] = compacta
+        reporte.append({
+            "Hoja": hoja,
+            "Columnas antes": df.shape[1],
+            "Columnas después": compacta.shape[1],
+            "MB antes": _memoria(df) / 1e6,
+            "MB después": _memoria(compacta) / 1e6,
+        })
+    return compactas, reporte
+
+
+def _report(version):
+    #Reporte de la version (en proceso o desde el sidecar)
+    if version not in _reportes:
+        ruta = _reporte_sidecar(version)
+        if not ruta.exists():
+            return {}
+        try:
+            _reportes[version] = json.loads(ruta.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+    return _reportes[version]
+
+
+def compaction_report(version):
+    return _report(version).get("memoria")
+
+
+def cleaning_report(version):
+    return _report(version).get("limpieza")
+
+
+def _leer_excel(data):
+    #Una sola apertura de openpyxl para las cuatro hojas
+    hojas = pd.read_excel(io.BytesIO(data), sheet_name=HOJAS)
+
+    viajes = hojas["Viajes"]
+    forecast = hojas["Forecast"]
+    if "Fecha Salida" in viajes.columns:
+        viajes["Fecha Salida"] = pd.to_datetime(viajes["Fecha Salida"], errors="coerce")
+    if "Fecha" in forecast.columns:
+        forecast["Fecha"] = pd.to_datetime(forecast["Fecha"], errors="coerce")
+    return hojas
+
+
+def read_workbook(file_obj, version=None, avance=None):
+    #avance(fraccion, mensaje): se llama al empezar cada etapa (lectura en segundo plano)
+    data = None
+    if version is None:
+        data = read_bytes(file_obj)
+        version = hash_bytes(data)
+
+    hojas = _leer_sidecar(version)
+    if hojas is None:
+        if data is None:
+            data = read_bytes(file_obj)
+        if avance is not None:
+            avance(0.05, "Leyendo libro de Excel")
+        hojas = _leer_excel(data)
+        if avance is not None:
+            avance(0.7, "Limpiando viajes")
+        hojas["Viajes"], limpieza = clean_trips(hojas["Viajes"])
+        if avance is not None:
+            avance(0.85, "Compactando columnas")
+        hojas, memoria = compact_workbook(hojas)
+        reporte = _reportes[version] = {"limpieza": limpieza, "memoria": memoria}
+        _escribir_sidecar(version, hojas, reporte)
+
+    return hojas, version
@@ -0,0 +1,182 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from flujo import month_key, month_label
+
+
+#Cubo preagregado mes x ruta x unidad x estatus para la pantalla de Estado de la Flota
+#
+#Las celdas no vacias responden los filtros combinados (meses + rutas + unidades); los
+#marginales densos mes y mes x estatus responden el caso comun (solo meses) sin recorrerlas.
+#Ambos se pueden extender con viajes nuevos sin reconstruir el cubo.
+
+# Ventana de fechas que muestra la pantalla
+FECHA_INICIO = "2025-01-01"
+FECHA_FIN = "2026-12-31"
+# Dimensiones de las celdas (ademas del mes)
+DIMENSIONES = {"Ruta": "Ruta", "Tractocamión": "Tractocamión", "Estatus": "Estatus de Viaje"}
+
+
+def _cells(mes, dimensiones, viajes, vacios):
+    #Celdas (mes, ruta, unidad, estatus) con viajes y vacios; los nulos forman su propia celda
+    celdas = pd.DataFrame({"mes": mes, "viajes": viajes, "vacios": vacios})
+    for col, origen in DIMENSIONES.items():
+        celdas[col] = pd.Categorical(np.asarray(dimensiones[origen], dtype=object))
+    return (
+        celdas.groupby(["mes", *DIMENSIONES], observed=True, dropna=False, sort=False)[["viajes", "vacios"]]
+        .sum()
+        .reset_index()
+    )
+
+
+def _merge_cells(*partes):
+    #Suma celdas de varios cubos: categorias del primero y despues las nuevas (sus codigos no cambian)
+    partes = [p for p in partes if len(p)]
+    if not partes:
+        return _cells([], {c: [] for c in DIMENSIONES.values()}, [], [])
+    if len(partes) == 1:
+        return partes[0]
+    partes = [p.copy(deep=False) for p in partes]
+    for col in DIMENSIONES:
+        categorias = partes[0][col].cat.categories
+        for p in partes[1:]:
+            categorias = categorias.append(p[col].cat.categories.difference(categorias))
+        for p in partes:
+            p[col] = p[col].cat.set_categories(categorias)
+    celdas = pd.concat(partes, ignore_index=True)
+    celdas = (
+        celdas.groupby(["mes", *DIMENSIONES], observed=True, dropna=False, sort=False)[["viajes", "vacios"]]
+        .sum()
+        .reset_index()
+    )
+    return celdas[celdas["viajes"] > 0].reset_index(drop=True)
+
+
+@dataclass(frozen=True)
+class FleetCube:
+    meses: np.ndarray
+    etiquetas: list
+    estatus: np.ndarray
+    celdas: pd.DataFrame
+    viajes_mes: np.ndarray
+    vacios_mes: np.ndarray
+    viajes_mes_estatus: np.ndarray
+    en_ventana: np.ndarray
+
+    @property
+    def rutas(self):
+        return self.celdas["Ruta"].cat.categories
+
+    @property
+    def unidades(self):
+        return self.celdas["Tractocamión"].cat.categories
+
+    def _month_mask(self, meses_sel):
+        return np.isin(self.etiquetas, list(meses_sel))
+
+    def _selected_cells(self, meses_sel, rutas_sel, unidades_sel):
+        #Celdas de los meses, rutas y unidades elegidas (rutas/unidades vacias = todas)
+        celdas = self.celdas
+        mask = np.isin(celdas["mes"].to_numpy(), self.meses[self._month_mask(meses_sel)])
+        if rutas_sel:
+            mask &= celdas["Ruta"].isin(rutas_sel).to_numpy()
+        if unidades_sel:
+            mask &= celdas["Tractocamión"].isin(unidades_sel).to_numpy()
+        return celdas[mask]
+
+    def monthly_empty(self, meses_sel, rutas_sel=None, unidades_sel=None):
+        if rutas_sel or unidades_sel:
+            por_mes = self._selected_cells(meses_sel, rutas_sel, unidades_sel).groupby("mes")[["viajes", "vacios"]].sum()
+            viajes_mes = por_mes["viajes"].reindex(self.meses, fill_value=0).to_numpy()
+            vacios_mes = por_mes["vacios"].reindex(self.meses, fill_value=0).to_numpy()
+        else:
+            viajes_mes, vacios_mes = self.viajes_mes, self.vacios_mes
+        mask = self._month_mask(meses_sel) & (viajes_mes > 0)
+        return pd.DataFrame({
+            "Mes": np.asarray(self.etiquetas)[mask],
+            "viaje_vacio": 100 * vacios_mes[mask] / viajes_mes[mask],
+        })
+
+    def status_counts(self, meses_sel, rutas_sel=None, unidades_sel=None):
+        if rutas_sel or unidades_sel:
+            celdas = self._selected_cells(meses_sel, rutas_sel, unidades_sel)
+            conteo = celdas.groupby("Estatus", observed=True)["viajes"].sum()
+            conteo = conteo.reindex(self.estatus, fill_value=0).to_numpy()
+        else:
+            conteo = self.viajes_mes_estatus[self._month_mask(meses_sel)].sum(axis=0)
+        estatus = pd.DataFrame({"Estatus": self.estatus, "Cantidad": conteo})
+        estatus = estatus[estatus["Cantidad"] > 0]
+        return estatus.sort_values("Cantidad", ascending=False, kind="stable").reset_index(drop=True)
+
+    def append(self, viajes, viaje_vacio, cambiados=None, cambio=()):
+        #Cubo con los viajes nuevos sumados; cambiados/cambio: viajes anteriores dentro de la ventana
+        #cuya etiqueta cambio (+1/-1)
+        nuevo = build_cube(viajes, viaje_vacio)
+        meses = np.union1d(self.meses, nuevo.meses)
+        estatus = np.union1d(self.estatus, nuevo.estatus) if len(nuevo.estatus) else self.estatus
+
+        viajes_mes = np.zeros(len(meses), dtype=np.int64)
+        vacios_mes = np.zeros(len(meses))
+        viajes_mes_estatus = np.zeros((len(meses), len(estatus)), dtype=np.int64)
+        for cubo in (self, nuevo):
+            fila = np.searchsorted(meses, cubo.meses)
+            col = np.searchsorted(estatus, cubo.estatus)
+            viajes_mes[fila] += cubo.viajes_mes
+            vacios_mes[fila] += cubo.vacios_mes
+            viajes_mes_estatus[np.ix_(fila, col)] += cubo.viajes_mes_estatus
+
+        celdas_cambio = self.celdas.iloc[:0]
+        if len(cambio):
+            meses_cambio = month_key(cambiados["Fecha Salida"])
+            np.add.at(vacios_mes, np.searchsorted(meses, meses_cambio), cambio)
+            celdas_cambio = _cells(meses_cambio, cambiados, np.zeros(len(cambio), dtype=np.int64), cambio)
+
+        en_ventana = np.concatenate([self.en_ventana, nuevo.en_ventana])
+        en_ventana.flags.writeable = False
+        return FleetCube(
+            meses=meses,
+            etiquetas=month_label(meses),
+            estatus=estatus,
+            celdas=_merge_cells(self.celdas, nuevo.celdas, celdas_cambio),
+            viajes_mes=viajes_mes,
+            vacios_mes=vacios_mes,
+            viajes_mes_estatus=viajes_mes_estatus,
+            en_ventana=en_ventana,
+        )
+
+
+def build_cube(viajes, viaje_vacio):
+    fechas = pd.to_datetime(viajes["Fecha Salida"], errors="coerce")
+    en_ventana = ((fechas >= FECHA_INICIO) & (fechas <= FECHA_FIN)).to_numpy()
+    en_ventana.flags.writeable = False
+
+    sub = viajes.loc[en_ventana, list(DIMENSIONES.values())]
+    mes = month_key(fechas[en_ventana])
+    estado, estatus = pd.factorize(sub["Estatus de Viaje"], sort=True)
+    vacio = np.asarray(viaje_vacio)[en_ventana]
+
+    #Celdas no vacias del cubo (filtros combinados)
+    celdas = _cells(mes, sub, np.ones(len(mes), dtype=np.int64), vacio.astype(np.int64))
+
+    #Marginales densos mes, mes x estatus que usan los filtros de la pantalla
+    meses, mes_idx = np.unique(mes, return_inverse=True)
+    n_meses, n_estatus = len(meses), len(estatus)
+    viajes_mes = np.bincount(mes_idx, minlength=n_meses)
+    vacios_mes = np.bincount(mes_idx, weights=vacio, minlength=n_meses)
+    con_estatus = estado >= 0
+    viajes_mes_estatus = np.bincount(
+        mes_idx[con_estatus] * n_estatus + estado[con_estatus], minlength=n_meses * n_estatus
+    ).reshape(n_meses, n_estatus)
+
+    return FleetCube(
+        meses=meses,
+        etiquetas=month_label(meses),
+        estatus=np.asarray(estatus, dtype=object),
+        celdas=celdas,
+        viajes_mes=viajes_mes,
+        vacios_mes=vacios_mes,
+        viajes_mes_estatus=viajes_mes_estatus,
+        en_ventana=en_ventana,
+    )
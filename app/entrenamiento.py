@@ -0,0 +1,216 @@
+import argparse
+import hashlib
+import json
+import os
+import resource
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from carga import read_workbook
+from etiquetas import EmptyLabeler
+from limpieza import clean_trips
+from modelos import CATEGORICAS, MODELOS_DIR, NUMERICAS
+
+
+#Entrenamiento reproducible del modelo de viaje vacio desde la linea de comandos
+#
+#Uso:
+#   python app/entrenamiento.py Viajes.xlsx historial_2024.parquet --hilos 8
+#Variables iguales a XGBoost_final.ipynb (Ruta, Nombre Cliente, Tractocamión, Duración_horas,
+#Peso_prom_ruta, Semana, Mes), pero las categoricas entran como categorias nativas de XGBoost
+#(histogramas, sin get_dummies): la memoria no crece con cada ruta, cliente o unidad nueva.
+#La etiqueta es la del tablero: peso menor al percentil 10 de la ruta.
+#Deja en app/modelos_entrenados/ el booster (.ubj) y sus metadatos (.json), que el tablero
+#ofrece como modelo para calcular el riesgo.
+
+PARAMETROS = {
+    "objective": "binary:logistic",
+    "eval_metric": ["auc", "logloss"],
+    "tree_method": "hist",
+    "max_depth": 8,
+    "learning_rate": 0.1,
+    "max_bin": 256,
+    "max_cat_to_onehot": 1,
+    "subsample": 0.9,
+    "colsample_bytree": 0.9,
+    "min_child_weight": 5,
+    "seed": 42,
+}
+ARBOLES = 400
+PARADA_TEMPRANA = 30
+# Fraccion mas reciente de los viajes (por fecha de salida) que se usa para validar
+PRUEBA = 0.2
+
+
+class Tiempos:
+    #Segundos por etapa y memoria residente maxima del proceso (incluye la de XGBoost)
+
+    def __init__(self):
+        self.etapas = {}
+
+    @contextmanager
+    def etapa(self, nombre):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.etapas[nombre] = round(time.perf_counter() - inicio, 3)
+
+    @staticmethod
+    def memoria_pico_mb():
+        # ru_maxrss viene en KB en Linux
+        return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def read_trips(rutas):
+    #Excel (con la limpieza y el cache de la carga) o historiales Parquet/CSV limpiados aqui
+    partes = []
+    for ruta in map(Path, rutas):
+        if ruta.suffix == ".xlsx":
+            partes.append(read_workbook(ruta)[0]["Viajes"])
+            continue
+        if ruta.suffix == ".parquet":
+            viajes = pd.read_parquet(ruta)
+        else:
+            viajes = pd.read_csv(ruta)
+        partes.append(clean_trips(viajes)[0])
+    viajes = pd.concat(partes, ignore_index=True) if len(partes) > 1 else partes[0]
+    # Las categorias de cada archivo pueden diferir: se unifican al armar las variables
+    return viajes
+
+
+def trip_features(viajes):
+    #Variables por viaje y etiqueta; filas sin alguna variable se descartan (como el notebook)
+    salida = pd.to_datetime(viajes["Fecha Salida"], errors="coerce")
+    if "Duración_horas" in viajes.columns:
+        duracion = pd.to_numeric(viajes["Duración_horas"], errors="coerce")
+    else:
+        llegada = pd.to_datetime(viajes["Fecha Llegada"], errors="coerce")
+        duracion = (llegada - salida).dt.total_seconds() / 3600
+
+    peso = pd.to_numeric(viajes["Peso Kgs"], errors="coerce")
+    X = pd.DataFrame({c: viajes[c].astype("category") for c in CATEGORICAS})
+    X["Duración_horas"] = duracion.astype("float32")
+    X["Peso_prom_ruta"] = peso.groupby(viajes["Ruta"], observed=True, sort=False).transform("mean").astype("float32")
+    X["Semana"] = salida.dt.isocalendar().week.astype("float32")
+    X["Mes"] = salida.dt.month.astype("float32")
+
+    y = EmptyLabeler.fit(viajes).labels(viajes)
+    validas = X.notna().all(axis=1).to_numpy() & peso.notna().to_numpy()
+    orden = np.argsort(salida.to_numpy()[validas], kind="stable")
+    X = X.loc[validas].iloc[orden].reset_index(drop=True)
+    for c in CATEGORICAS:
+        X[c] = X[c].cat.remove_unused_categories()
+    return X, y[validas][orden]
+
+
+def train(X, y, hilos=None, arboles=ARBOLES, prueba=PRUEBA, parametros=None):
+    import xgboost as xgb
+
+    #Validacion temporal: los viajes mas recientes quedan fuera del entrenamiento
+    corte = int(len(X) * (1 - prueba))
+    params = {**PARAMETROS, **(parametros or {}), "nthread": hilos or os.cpu_count() or 1}
+    entreno = xgb.QuantileDMatrix(X.iloc[:corte], y[:corte], enable_categorical=True, max_bin=params["max_bin"])
+    evals = []
+    if prueba > 0:
+        evals = [(xgb.DMatrix(X.iloc[corte:], y[corte:], enable_categorical=True), "validacion")]
+
+    historial = {}
+    booster = xgb.train(
+        params,
+        entreno,
+        num_boost_round=arboles,
+        evals=evals,
+        early_stopping_rounds=PARADA_TEMPRANA if prueba > 0 else None,
+        evals_result=historial,
+        verbose_eval=False,
+    )
+    metricas = {"arboles": booster.num_boosted_rounds(), "filas_entrenamiento": corte, "filas_validacion": len(X) - corte}
+    if prueba > 0:
+        mejor = getattr(booster, "best_iteration", metricas["arboles"] - 1)
+        metricas["auc_validacion"] = round(float(historial["validacion"]["auc"][mejor]), 4)
+        metricas["logloss_validacion"] = round(float(historial["validacion"]["logloss"][mejor]), 4)
+        metricas["mejor_iteracion"] = int(mejor)
+        booster = booster[: mejor + 1]
+        metricas["arboles"] = mejor + 1
+    return booster, metricas
+
+
+def save_artifact(booster, X, metricas, tiempos, datos, carpeta=MODELOS_DIR):
+    #Booster binario + metadatos; la version es la fecha y un hash del booster
+    carpeta = Path(carpeta)
+    carpeta.mkdir(parents=True, exist_ok=True)
+    crudo = booster.save_raw("ubj")
+    version = f"{datetime.now():%Y%m%d-%H%M%S}-{hashlib.blake2b(crudo, digest_size=4).hexdigest()}"
+    nombre = f"vacio_{version}"
+    (carpeta / f"{nombre}.ubj").write_bytes(crudo)
+
+    meta = {
+        "version": version,
+        "booster": f"{nombre}.ubj",
+        # Con su tipo (texto o numero): XGBoost revisa que el tipo de las categorias coincida al predecir
+        "categorias": {c: X[c].cat.categories.tolist() for c in CATEGORICAS},
+        "numericas": NUMERICAS,
+        "parametros": {**PARAMETROS, "nthread": None},
+        "metricas": metricas,
+        "tiempos_s": tiempos.etapas,
+        "memoria_pico_mb": tiempos.memoria_pico_mb(),
+        "datos": datos,
+        "xgboost": __import__("xgboost").__version__,
+    }
+    ruta = carpeta / f"{nombre}.json"
+    ruta.write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
+    return ruta
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Entrena el modelo de viaje vacío con categorías nativas")
+    parser.add_argument("datos", nargs="+", help="Viajes.xlsx y/o historiales .parquet/.csv")
+    parser.add_argument("--salida", default=str(MODELOS_DIR))
+    parser.add_argument("--hilos", type=int, default=None, help="Hilos de XGBoost (por defecto, todos)")
+    parser.add_argument("--arboles", type=int, default=ARBOLES)
+    parser.add_argument("--prueba", type=float, default=PRUEBA, help="Fracción más reciente para validar (0 = sin validación)")
+    parser.add_argument("--profundidad", type=int, default=PARAMETROS["max_depth"])
+    parser.add_argument("--tasa", type=float, default=PARAMETROS["learning_rate"])
+    args = parser.parse_args(argv)
+
+    tiempos = Tiempos()
+    with tiempos.etapa("lectura"):
+        viajes = read_trips(args.datos)
+    with tiempos.etapa("variables"):
+        X, y = trip_features(viajes)
+    fechas = pd.to_datetime(viajes["Fecha Salida"], errors="coerce")
+    desde, hasta = fechas.min(), fechas.max()
+    del viajes, fechas
+    with tiempos.etapa("entrenamiento"):
+        booster, metricas = train(
+            X, y, args.hilos, args.arboles, args.prueba,
+            {"max_depth": args.profundidad, "learning_rate": args.tasa},
+        )
+
+    datos = {
+        "archivos": [str(Path(p)) for p in args.datos],
+        "viajes": len(X),
+        "proporcion_vacios": round(float(y.mean()), 4),
+        "desde": str(desde.date()),
+        "hasta": str(hasta.date()),
+    }
+    ruta = save_artifact(booster, X, metricas, tiempos, datos, args.salida)
+
+    print(f"Modelo: {ruta}")
+    print(f"Viajes: {len(X):,}  Árboles: {metricas['arboles']}  " + "  ".join(
+        f"{k}: {v}" for k, v in metricas.items() if k.endswith("_validacion") and not k.startswith("filas")
+    ))
+    print("Tiempos (s): " + ", ".join(f"{k} {v}" for k, v in tiempos.etapas.items()))
+    print(f"Memoria pico: {tiempos.memoria_pico_mb()} MB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+import copy
+
+import numpy as np
+import pandas as pd
+
+from flujo import month_key
+
+
+#Etiqueta de viaje vacio: peso menor al percentil 10 de su ruta (opcionalmente ruta y mes)
+#
+#Los pesos de cada grupo se guardan ordenados en un solo arreglo con offsets por grupo, asi
+#los umbrales salen de una interpolacion vectorizada (igual que quantile de pandas) y al
+#agregar viajes solo se recalculan los grupos tocados. Con otra columna (p. ej. Duración_horas)
+#la misma estructura mantiene cualquier cuantil por ruta, como la mediana que usa la limpieza.
+
+CUANTIL = 0.10
+# Bits reservados para el mes en la llave (ruta, mes)
+_BITS_MES = 20
+
+
+class EmptyLabeler:
+
+    def __init__(self, q=CUANTIL, por_mes=False, columna="Peso Kgs"):
+        self.q = q
+        self.por_mes = por_mes
+        self.columna = columna
+        self._ruta_pos = {}
+        self.rutas = []
+        self._grupo_pos = {}
+        self.grupos = np.array([], dtype=np.int64)
+        self.valores = np.array([], dtype=float)
+        self.conteo = np.array([], dtype=np.int64)
+        self.umbral = np.array([], dtype=float)
+        self.vacios = np.array([], dtype=np.int64)
+        # Fila (en el orden en que se agregaron los viajes) de cada peso guardado
+        self.filas = np.array([], dtype=np.int64)
+        self.n_filas = 0
+
+    @classmethod
+    def fit(cls, viajes, q=CUANTIL, por_mes=False, columna="Peso Kgs"):
+        labeler = cls(q, por_mes, columna)
+        labeler.append(viajes)
+        return labeler
+
+    def copy(self):
+        #Copia independiente: append no modifica los arreglos por fila compartidos, solo los por grupo
+        nuevo = copy.copy(self)
+        nuevo._ruta_pos = dict(self._ruta_pos)
+        nuevo.rutas = list(self.rutas)
+        nuevo._grupo_pos = dict(self._grupo_pos)
+        for campo in ["grupos", "conteo", "umbral", "vacios"]:
+            setattr(nuevo, campo, getattr(self, campo).copy())
+        return nuevo
+
+    def _route_codes(self, rutas, crear):
+        codigos, unicas = pd.factorize(rutas)
+        mapa = np.empty(len(unicas), dtype=np.int64)
+        for i, r in enumerate(unicas):
+            pos = self._ruta_pos.get(r)
+            if pos is None:
+                if not crear:
+                    pos = -1
+                else:
+                    pos = self._ruta_pos[r] = len(self.rutas)
+                    self.rutas.append(r)
+            mapa[i] = pos
+        return np.where(codigos >= 0, mapa[np.maximum(codigos, 0)], -1)
+
+    def _group_keys(self, viajes, crear):
+        ruta = self._route_codes(viajes["Ruta"], crear)
+        if not self.por_mes:
+            return ruta
+        mes = month_key(viajes["Fecha Salida"])
+        return np.where((ruta >= 0) & (mes >= 0), (ruta << _BITS_MES) + mes, -1)
+
+    def _group_codes(self, llaves, crear):
+        unicas, inv = np.unique(llaves, return_inverse=True)
+        mapa = np.empty(len(unicas), dtype=np.int64)
+        nuevas = []
+        for i, k in enumerate(unicas):
+            pos = self._grupo_pos.get(int(k))
+            if pos is None:
+                if k < 0 or not crear:
+                    pos = -1
+                else:
+                    pos = self._grupo_pos[int(k)] = len(self.grupos) + len(nuevas)
+                    nuevas.append(k)
+            mapa[i] = pos
+        if nuevas:
+            self.grupos = np.concatenate([self.grupos, np.asarray(nuevas, dtype=np.int64)])
+        return mapa[inv]
+
+    @property
+    def offsets(self):
+        return np.concatenate([[0], np.cumsum(self.conteo)])
+
+    def append(self, viajes):
+        #Inserta los pesos nuevos en el orden de su grupo y recalcula solo esos grupos
+        codigos = self._group_codes(self._group_keys(viajes, crear=True), crear=True)
+        pesos = viajes[self.columna].to_numpy(dtype=float)
+        validos = (codigos >= 0) & ~np.isnan(pesos)
+        codigos, pesos = codigos[validos], pesos[validos]
+        filas = self.n_filas + np.flatnonzero(validos)
+        self.n_filas += len(viajes)
+
+        n_grupos = len(self.grupos)
+        crecer = n_grupos - len(self.conteo)
+        if crecer:
+            self.conteo = np.concatenate([self.conteo, np.zeros(crecer, dtype=np.int64)])
+            self.umbral = np.concatenate([self.umbral, np.full(crecer, np.nan)])
+            self.vacios = np.concatenate([self.vacios, np.zeros(crecer, dtype=np.int64)])
+        if len(codigos) == 0:
+            return np.array([], dtype=np.int64)
+
+        orden = np.lexsort((pesos, codigos))
+        codigos, pesos, filas = codigos[orden], pesos[orden], filas[orden]
+        offsets = self.offsets
+        if len(self.valores):
+            #Posicion de cada peso nuevo dentro del bloque ya ordenado de su grupo
+            tocados, inicio = np.unique(codigos, return_index=True)
+            fin = np.append(inicio[1:], len(codigos))
+            posiciones = np.empty(len(codigos), dtype=np.int64)
+            for g, a, b in zip(tocados, inicio, fin):
+                bloque = self.valores[offsets[g]:offsets[g + 1]]
+                posiciones[a:b] = offsets[g] + np.searchsorted(bloque, pesos[a:b], side="right")
+            self.valores = np.insert(self.valores, posiciones, pesos)
+            self.filas = np.insert(self.filas, posiciones, filas)
+        else:
+            self.valores = pesos
+            self.filas = filas
+            tocados = np.unique(codigos)
+        self.conteo += np.bincount(codigos, minlength=n_grupos)
+
+        self._update_groups(tocados)
+        return tocados
+
+    def _update_groups(self, grupos):
+        offsets = self.offsets
+        n = self.conteo[grupos]
+        ini = offsets[grupos]
+        con_datos = n > 0
+        grupos, n, ini = grupos[con_datos], n[con_datos], ini[con_datos]
+
+        umbral, bajo, v_bajo = self._interpolate(ini, n, self.q)
+        self.umbral[grupos] = umbral
+
+        #Pesos menores al umbral: todos hasta `bajo`, salvo empates con el umbral
+        vacios = bajo + 1
+        empate = umbral <= v_bajo
+        if empate.any():
+            vacios[empate] = [
+                np.searchsorted(self.valores[i:i + k], u, side="left")
+                for i, k, u in zip(ini[empate], n[empate], umbral[empate])
+            ]
+        self.vacios[grupos] = vacios
+
+    def _interpolate(self, ini, n, q):
+        #Interpolacion lineal entre los dos pesos que rodean al cuantil (grupos con al menos un peso)
+        pos = q * (n - 1)
+        bajo = np.floor(pos).astype(np.int64)
+        alto = np.minimum(bajo + 1, n - 1)
+        v_bajo, v_alto = self.valores[ini + bajo], self.valores[ini + alto]
+        return v_bajo + (v_alto - v_bajo) * (pos - bajo), bajo, v_bajo
+
+    def changed_rows(self, grupos, umbral_anterior, hasta_fila):
+        #Filas anteriores a `hasta_fila` cuya etiqueta cambio al moverse el umbral de su grupo
+        #(peso entre el umbral anterior y el nuevo); regresa (filas, etiqueta nueva)
+        offsets = self.offsets
+        filas, etiqueta = [], []
+        for g, antes in zip(grupos, umbral_anterior):
+            despues = self.umbral[g]
+            if np.isnan(antes) or antes == despues:
+                continue
+            bloque = slice(offsets[g], offsets[g + 1])
+            valores = self.valores[bloque]
+            bajo, alto = np.searchsorted(valores, [min(antes, despues), max(antes, despues)], side="left")
+            cambio = self.filas[bloque][bajo:alto]
+            cambio = cambio[cambio < hasta_fila]
+            filas.append(cambio)
+            etiqueta.append(np.full(len(cambio), int(despues > antes), dtype=np.int8))
+        if not filas:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.int8)
+        return np.concatenate(filas), np.concatenate(etiqueta)
+
+    @property
+    def total_vacios(self):
+        return int(self.vacios.sum())
+
+    def thresholds(self, q=None):
+        #Umbral por ruta (o por ruta y mes); con q, ese cuantil de los mismos pesos
+        umbral = self.umbral
+        if q is not None:
+            umbral = np.full(len(self.conteo), np.nan)
+            con_datos = np.flatnonzero(self.conteo > 0)
+            umbral[con_datos] = self._interpolate(self.offsets[con_datos], self.conteo[con_datos], q)[0]
+        rutas_grupo = self.grupos >> _BITS_MES if self.por_mes else self.grupos
+        rutas = np.asarray(self.rutas, dtype=object)[rutas_grupo]
+        if not self.por_mes:
+            return pd.Series(umbral, index=pd.Index(rutas, name="Ruta"), name="Umbral")
+        meses = self.grupos & ((1 << _BITS_MES) - 1)
+        indice = pd.MultiIndex.from_arrays([rutas, meses], names=["Ruta", "Mes"])
+        return pd.Series(umbral, index=indice, name="Umbral")
+
+    def labels(self, viajes):
+        #1 si el peso del viaje es menor al umbral de su grupo; 0 sin grupo o sin peso
+        codigos = self._group_codes(self._group_keys(viajes, crear=False), crear=False)
+        umbral = np.full(len(codigos), np.nan)
+        con_grupo = codigos >= 0
+        umbral[con_grupo] = self.umbral[codigos[con_grupo]]
+        with np.errstate(invalid="ignore"):
+            return (viajes[self.columna].to_numpy(dtype=float) < umbral).astype(np.int8)
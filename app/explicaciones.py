@@ -0,0 +1,212 @@
+import warnings
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from modelos import CATEGORICAS, NUMERICAS, NativeModel, pair_grid
+
+
+#Explicacion de las probabilidades del modelo por par ruta-unidad
+#
+#Random Forest: atribucion por camino del arbol (Saabas). Cada nodo aporta la diferencia entre
+#su probabilidad y la de su padre a la variable con la que se dividio el padre; con esos
+#aportes en una matriz nodo x variable (una sola vez por modelo), la contribucion de un lote
+#de pares es decision_path (pares x nodos) por esa matriz. Base + contribuciones = prediccion.
+#Modelo nativo de XGBoost: contribuciones TreeSHAP del propio booster (pred_contribs), en
+#log-odds.
+
+VARIABLES = CATEGORICAS + NUMERICAS
+# Pares por lote al calcular contribuciones
+LOTE = 5_000
+# Variables (columnas del modelo) en la grafica de importancia global
+TOP_VARIABLES = 15
+
+
+def _variable(columna):
+    #Variable original de una columna del modelo ("Ruta_X" -> "Ruta")
+    if columna in NUMERICAS:
+        return columna
+    return next(c for c in CATEGORICAS if columna.startswith(f"{c}_"))
+
+
+class TreePathExplainer:
+    #Aportes por nodo de todos los arboles del bosque, precalculados una vez por modelo
+
+    def __init__(self, model):
+        from scipy import sparse
+
+        self.model = model
+        self.columnas = list(model.feature_names_in_)
+        clase = list(model.classes_).index(1)
+        n_arboles = len(model.estimators_)
+
+        filas, cols, aportes, base = [], [], [], 0.0
+        inicio = 0
+        for arbol in model.estimators_:
+            t = arbol.tree_
+            valor = t.value[:, 0, clase] / t.value[:, 0, :].sum(axis=1)
+            base += valor[0] / n_arboles
+            internos = np.flatnonzero(t.children_left >= 0)
+            for hijos in (t.children_left[internos], t.children_right[internos]):
+                filas.append(inicio + hijos)
+                cols.append(t.feature[internos])
+                aportes.append((valor[hijos] - valor[internos]) / n_arboles)
+            inicio += t.node_count
+
+        self.base = float(base)
+        # Nodo x columna del modelo (un aporte por nodo que no es raiz)
+        self.nodos = sparse.csr_matrix(
+            (np.concatenate(aportes), (np.concatenate(filas), np.concatenate(cols))),
+            shape=(inicio, len(self.columnas)),
+        )
+        # Columna del modelo -> variable original
+        grupo = np.array([VARIABLES.index(_variable(c)) for c in self.columnas])
+        self.grupos = sparse.csr_matrix(
+            (np.ones(len(grupo)), (np.arange(len(grupo)), grupo)), shape=(len(grupo), len(VARIABLES))
+        )
+        self.nodos_variable = (self.nodos @ self.grupos).toarray()
+
+    def contributions(self, X):
+        #(contribucion por variable, suma de |contribucion| por columna del modelo) de un lote
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            camino, _ = self.model.decision_path(X)
+        por_columna = camino @ self.nodos
+        return camino @ self.nodos_variable, np.asarray(abs(por_columna).sum(axis=0)).ravel()
+
+
+class PairIndex:
+    #Codigos enteros de ruta y unidad de cada par (como RiskMatrix): las filas de un par, una ruta o
+    #una unidad se encuentran con una busqueda binaria en lugar de comparar toda la tabla
+
+    def __init__(self, pares):
+        ri, rutas = pd.factorize(pares["Ruta"])
+        ui, unidades = pd.factorize(pares["Tractocamión"])
+        self._ruta_pos = {r: i for i, r in enumerate(rutas)}
+        self._unidad_pos = {u: j for j, u in enumerate(unidades)}
+        self._n_unidades = max(len(unidades), 1)
+
+        # Pares ordenados por llave ruta * n_unidades + unidad (-1 si falta ruta o unidad)
+        llaves = np.where((ri >= 0) & (ui >= 0), ri.astype(np.int64) * self._n_unidades + ui, -1)
+        self._par_fila = np.argsort(llaves, kind="stable")
+        self._par_llave = llaves[self._par_fila]
+
+        # Filas agrupadas por ruta y por unidad con el inicio de cada grupo
+        self._ruta_fila = np.argsort(ri, kind="stable")
+        self._ruta_ini = np.searchsorted(ri[self._ruta_fila], np.arange(len(rutas) + 1))
+        self._unidad_fila = np.argsort(ui, kind="stable")
+        self._unidad_ini = np.searchsorted(ui[self._unidad_fila], np.arange(len(unidades) + 1))
+
+    def pair(self, ruta, unidad):
+        #Fila del par o None
+        i, j = self._ruta_pos.get(ruta), self._unidad_pos.get(unidad)
+        if i is None or j is None:
+            return None
+        llave = i * self._n_unidades + j
+        k = int(np.searchsorted(self._par_llave, llave))
+        if k < len(self._par_llave) and self._par_llave[k] == llave:
+            return int(self._par_fila[k])
+        return None
+
+    def route(self, ruta):
+        i = self._ruta_pos.get(ruta)
+        if i is None:
+            return np.zeros(0, dtype=np.int64)
+        return self._ruta_fila[self._ruta_ini[i]:self._ruta_ini[i + 1]]
+
+    def unit(self, unidad):
+        j = self._unidad_pos.get(unidad)
+        if j is None:
+            return np.zeros(0, dtype=np.int64)
+        return self._unidad_fila[self._unidad_ini[j]:self._unidad_ini[j + 1]]
+
+
+@dataclass(frozen=True)
+class Explanation:
+    modelo: str
+    unidad: str
+    base: float
+    pares: pd.DataFrame
+    contribuciones: np.ndarray
+    importancia: pd.Series
+    valores: pd.DataFrame
+    indice: PairIndex
+
+    def global_importance(self, n=TOP_VARIABLES):
+        #Contribucion absoluta promedio por columna del modelo
+        top = self.importancia.nlargest(n)
+        return top.rename_axis("Variable").reset_index(name="Importancia")
+
+    def _frame(self, filas, valores=None):
+        aporte = self.contribuciones[filas].mean(axis=0)
+        tabla = pd.DataFrame({"Variable": VARIABLES, "Contribución": aporte})
+        if valores is not None:
+            tabla.insert(1, "Valor", valores)
+        return tabla.sort_values("Contribución", key=np.abs, ascending=False, kind="stable").reset_index(drop=True)
+
+    def pair(self, ruta, unidad):
+        #Contribucion de cada variable al riesgo del par; None si el par no se evaluo
+        fila = self.indice.pair(ruta, unidad)
+        if fila is None:
+            return None
+        valores = self.valores.loc[ruta] if ruta in self.valores.index else pd.Series(dtype=object)
+        columnas = [{"Ruta": ruta, "Tractocamión": unidad}.get(v, valores.get(v)) for v in VARIABLES]
+        return self._frame([fila], columnas)
+
+    def prediction(self, ruta, unidad):
+        fila = self.indice.pair(ruta, unidad)
+        return None if fila is None else self.base + float(self.contribuciones[fila].sum())
+
+    def route(self, ruta):
+        #Contribucion promedio de cada variable en los pares de la ruta
+        filas = self.indice.route(ruta)
+        return self._frame(filas) if len(filas) else None
+
+    def unit(self, unidad):
+        filas = self.indice.unit(unidad)
+        return self._frame(filas) if len(filas) else None
+
+
+def explain_pairs(model, viajes, pares=None, nombre="", explainer=None, lote=LOTE):
+    #Contribuciones de todos los pares en lotes vectorizados
+    grid = pair_grid(model, viajes, pares)
+    valores = grid.rutas.set_index("Ruta")[["Nombre Cliente"] + NUMERICAS]
+
+    if isinstance(model, NativeModel):
+        import xgboost as xgb
+
+        partes = []
+        for inicio in range(0, len(grid), lote):
+            X = grid.matrix(inicio, inicio + lote)
+            partes.append(model.booster.predict(xgb.DMatrix(X, enable_categorical=True), pred_contribs=True))
+        contrib = np.concatenate(partes) if partes else np.zeros((0, len(VARIABLES) + 1))
+        columnas = list(model.categorias) + list(model.numericas)
+        # Ultima columna = valor base (log-odds promedio del modelo)
+        base = float(contrib[0, -1]) if len(contrib) else 0.0
+        contrib = pd.DataFrame(contrib[:, :-1], columns=columnas)[VARIABLES].to_numpy()
+        importancia = pd.Series(np.abs(contrib).mean(axis=0) if len(contrib) else 0.0, index=VARIABLES)
+        unidad = "log-odds"
+    else:
+        explainer = explainer or TreePathExplainer(model)
+        partes, absolutas = [], np.zeros(len(explainer.columnas))
+        for inicio in range(0, len(grid), lote):
+            por_variable, por_columna = explainer.contributions(grid.matrix(inicio, inicio + lote))
+            partes.append(por_variable)
+            absolutas += por_columna
+        contrib = np.concatenate(partes) if partes else np.zeros((0, len(VARIABLES)))
+        base = explainer.base
+        importancia = pd.Series(absolutas / max(len(grid), 1), index=explainer.columnas)
+        unidad = "probabilidad"
+
+    pares = grid.pairs()
+    return Explanation(
+        modelo=nombre,
+        unidad=unidad,
+        base=base,
+        pares=pares,
+        contribuciones=contrib.astype(np.float32),
+        importancia=importancia,
+        valores=valores,
+        indice=PairIndex(pares),
+    )
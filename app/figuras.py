@@ -0,0 +1,110 @@
+import sys
+import threading
+from collections import OrderedDict, defaultdict
+
+import numpy as np
+import pandas as pd
+
+
+#Cache de figuras de Plotly y datos de graficas compartido por todas las sesiones
+#
+#La llave es (version de datos, grafica, parametros de los widgets): volver a una seleccion
+#anterior regresa la figura ya armada sin agrupar datos ni construir trazas. Se desaloja la
+#menos usada cuando se pasa del numero de entradas o del tamaño estimado.
+
+# Figuras o tablas que se conservan
+MAX_ENTRADAS = 256
+# Tamaño estimado maximo (datos de las trazas y tablas)
+MAX_BYTES = 64 * 1024 ** 2
+
+
+def freeze(valor):
+    #Parametros de widgets (listas, dicts, fechas) como llave hashable
+    if isinstance(valor, dict):
+        return tuple(sorted((k, freeze(v)) for k, v in valor.items()))
+    if isinstance(valor, (list, tuple, set, frozenset, np.ndarray, pd.Index)):
+        valores = [freeze(v) for v in valor]
+        return tuple(sorted(valores, key=repr) if isinstance(valor, (set, frozenset)) else valores)
+    return valor
+
+
+def estimate_size(valor):
+    #Bytes aproximados: memoria de tablas y arreglos, o de los datos de cada traza de una figura
+    if isinstance(valor, tuple):
+        return sum(estimate_size(v) for v in valor)
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        return int(valor.memory_usage(deep=True).sum()) if isinstance(valor, pd.DataFrame) else int(valor.memory_usage(deep=True))
+    if isinstance(valor, np.ndarray):
+        return valor.nbytes
+    if hasattr(valor, "data") and hasattr(valor, "layout"):
+        total = 0
+        for traza in valor.data:
+            for v in traza.to_plotly_json().values():
+                if isinstance(v, (np.ndarray, list, tuple)):
+                    total += np.asarray(v).nbytes
+        return total + 4096
+    return sys.getsizeof(valor)
+
+
+class FigureCache:
+
+    def __init__(self, max_entradas=MAX_ENTRADAS, max_bytes=MAX_BYTES):
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.aciertos = defaultdict(int)
+        self.fallos = defaultdict(int)
+
+    def get_or_build(self, version, grafica, parametros, construir):
+        llave = (version, grafica, freeze(parametros))
+        with self._lock:
+            entrada = self._datos.get(llave)
+            if entrada is not None:
+                self._datos.move_to_end(llave)
+                self.aciertos[grafica] += 1
+                return entrada[0]
+            self.fallos[grafica] += 1
+
+        valor = construir()
+        tamano = estimate_size(valor)
+        with self._lock:
+            anterior = self._datos.pop(llave, None)
+            if anterior is not None:
+                self.bytes -= anterior[1]
+            self._datos[llave] = (valor, tamano)
+            self.bytes += tamano
+            while len(self._datos) > 1 and (len(self._datos) > self.max_entradas or self.bytes > self.max_bytes):
+                _, (_, liberado) = self._datos.popitem(last=False)
+                self.bytes -= liberado
+        return valor
+
+    def __len__(self):
+        with self._lock:
+            return len(self._datos)
+
+    def clear(self):
+        with self._lock:
+            self._datos.clear()
+            self.bytes = 0
+            self.aciertos.clear()
+            self.fallos.clear()
+
+    def summary(self):
+        #Una fila por grafica con aciertos, fallos y tasa de aciertos
+        with self._lock:
+            graficas = sorted(set(self.aciertos) | set(self.fallos))
+            filas = []
+            for g in graficas:
+                aciertos, fallos = self.aciertos[g], self.fallos[g]
+                filas.append({
+                    "grafica": g,
+                    "aciertos": aciertos,
+                    "fallos": fallos,
+                    "tasa_aciertos": round(aciertos / max(aciertos + fallos, 1), 3),
+                })
+            return filas
+
+
+FIGURAS = FigureCache()
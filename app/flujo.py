@@ -0,0 +1,292 @@
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+#Ingesta por lotes (memoria acotada) de historiales de viajes en CSV o Parquet
+#
+#Viaje vacio con la misma definicion que el tablero (etiquetas.EmptyLabeler): peso menor al
+#percentil 10 de su ruta. Como los umbrales solo se conocen al final, se guardan los conteos
+#de un histograma logaritmico por (ruta, mes) en forma dispersa; de ahi salen el umbral
+#aproximado de cada ruta y los vacios por mes.
+
+COLUMNAS = ["Fecha Salida", "Ruta", "Tractocamión", "Estatus de Viaje", "Peso Kgs"]
+BATCH_SIZE = 250_000
+CUANTIL = 0.10
+# Bits de la llave (ruta, mes, cubeta) que ocupan el mes (+1) y la cubeta del histograma
+_BITS_MES = 20
+_BITS_CUBETA = 12
+# Carpeta del servidor de la que se pueden leer historiales por ruta (nada fuera de ella)
+HISTORIALES_DIR = Path(os.environ.get("TABLERO_HISTORIALES", "historiales")).resolve()
+
+
+class PesoSketch:
+    #Histograma logaritmico combinable (error relativo ~alpha) para cuantiles de Peso Kgs
+
+    def __init__(self, alpha=0.01, minimo=1e-2, maximo=1e8):
+        self.alpha = alpha
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self._log_gamma = np.log(self.gamma)
+        self._offset = int(np.floor(np.log(minimo) / self._log_gamma))
+        n = int(np.ceil(np.log(maximo) / self._log_gamma)) - self._offset + 1
+        self.counts = np.zeros(n, dtype=np.int64)
+        self.zeros = 0
+
+    def _keys(self, valores):
+        llaves = np.ceil(np.log(valores) / self._log_gamma).astype(np.int64) - self._offset
+        return np.clip(llaves, 0, len(self.counts) - 1)
+
+    def add(self, valores):
+        valores = np.asarray(valores, dtype=float)
+        valores = valores[~np.isnan(valores)]
+        positivos = valores > 0
+        self.zeros += int((~positivos).sum())
+        self.counts += np.bincount(self._keys(valores[positivos]), minlength=len(self.counts))
+
+    def merge(self, otro):
+        self.counts += otro.counts
+        self.zeros += otro.zeros
+        return self
+
+    @property
+    def count(self):
+        return int(self.counts.sum()) + self.zeros
+
+    def _lower(self, llave):
+        #Limite inferior del intervalo (gamma^(k-1), gamma^k] de la llave
+        return self.gamma ** (llave + self._offset - 1)
+
+    def quantile(self, q):
+        if self.count == 0:
+            return np.nan
+        rango = q * (self.count - 1)
+        if rango < self.zeros:
+            return 0.0
+        acumulado = np.cumsum(self.counts) + self.zeros
+        llave = int(np.searchsorted(acumulado, rango, side="right"))
+        previo = acumulado[llave - 1] if llave > 0 else self.zeros
+        #Interpolacion geometrica dentro del intervalo
+        fraccion = (rango - previo + 0.5) / self.counts[llave]
+        return float(self._lower(llave) * self.gamma ** min(fraccion, 1.0))
+
+    def count_below(self, umbral):
+        if umbral <= 0:
+            return 0
+        llave = int(self._keys(np.array([umbral]))[0])
+        fraccion = np.log(umbral / self._lower(llave)) / self._log_gamma
+        parcial = self.counts[llave] * min(max(fraccion, 0.0), 1.0)
+        return self.zeros + int(self.counts[:llave].sum()) + float(parcial)
+
+
+def month_key(fechas):
+    #Mes como entero (año * 12 + mes - 1); -1 si no hay fecha
+    fechas = pd.to_datetime(fechas, errors="coerce")
+    llave = fechas.dt.year * 12 + fechas.dt.month - 1
+    return llave.fillna(-1).to_numpy(dtype=np.int64)
+
+
+def month_label(llave):
+    llave = np.asarray(llave)
+    return [f"{k // 12:04d}-{k % 12 + 1:02d}" for k in llave]
+
+
+def history_path(nombre, carpeta=HISTORIALES_DIR):
+    #Ruta de un historial dentro de la carpeta permitida; FileNotFoundError si no existe o sale de ella
+    carpeta = Path(carpeta).resolve()
+    ruta = (carpeta / nombre).resolve()
+    # commonpath en lugar de Path.is_relative_to (Python 3.9+)
+    dentro = os.path.commonpath([ruta, carpeta]) == str(carpeta)
+    if ruta.suffix.lower() not in (".csv", ".parquet") or not ruta.is_file() or not dentro:
+        raise FileNotFoundError(nombre)
+    return ruta
+
+
+def iter_batches(path, columnas=COLUMNAS, batch_size=BATCH_SIZE):
+    #path puede ser una ruta o un archivo abierto (p.ej. el de st.file_uploader)
+    nombre = getattr(path, "name", str(path))
+    if Path(nombre).suffix.lower() == ".parquet":
+        import pyarrow.parquet as pq
+
+        archivo = pq.ParquetFile(path)
+        disponibles = set(archivo.schema_arrow.names)
+        for lote in archivo.iter_batches(batch_size=batch_size, columns=[c for c in columnas if c in disponibles]):
+            yield lote.to_pandas()
+    else:
+        yield from pd.read_csv(
+            path, usecols=lambda c: c in columnas, chunksize=batch_size, low_memory=False
+        )
+
+
+class StreamAggregator:
+    #Agregados del tablero que se actualizan lote por lote sin guardar los viajes
+
+    def __init__(self, alpha=0.01):
+        self.alpha = alpha
+        # Solo define las cubetas (gamma y llaves); los conteos van en _llaves/_conteos
+        self.escala = PesoSketch(alpha)
+        self._ruta_pos = {}
+        self.rutas = []
+        # Llaves (ruta, mes + 1, cubeta) ordenadas y su numero de viajes; cubeta 0 = peso <= 0
+        self._llaves = np.array([], dtype=np.int64)
+        self._conteos = np.array([], dtype=np.int64)
+        # Llaves y conteos de los lotes que aun no se combinan con las ordenadas
+        self._pendientes = []
+        self._n_pendientes = 0
+        self.viajes_mes = {}
+        self.estatus = {}
+        self.unidades = {}
+        self.filas = 0
+
+    def _route_codes(self, rutas):
+        #Codigo estable de cada ruta entre lotes; -1 sin ruta
+        codigos, unicas = pd.factorize(rutas)
+        mapa = np.empty(len(unicas), dtype=np.int64)
+        for i, r in enumerate(unicas):
+            pos = self._ruta_pos.get(r)
+            if pos is None:
+                pos = self._ruta_pos[r] = len(self.rutas)
+                self.rutas.append(r)
+            mapa[i] = pos
+        if len(mapa) == 0:
+            return np.full(len(codigos), -1, dtype=np.int64)
+        return np.where(codigos >= 0, mapa[np.maximum(codigos, 0)], -1)
+
+    def _add_counts(self, llaves):
+        #Los lotes se guardan aparte y se combinan cuando suman tantas llaves como las ya ordenadas:
+        #cada llave se vuelve a ordenar O(log lotes) veces en lugar de una vez por lote
+        llaves, conteos = np.unique(llaves, return_counts=True)
+        self._pendientes.append((llaves, conteos))
+        self._n_pendientes += len(llaves)
+        if self._n_pendientes >= len(self._llaves):
+            self._merge()
+
+    def _merge(self):
+        if not self._pendientes:
+            return
+        todas = np.concatenate([self._llaves, *(llaves for llaves, _ in self._pendientes)])
+        conteos = np.concatenate([self._conteos, *(conteos for _, conteos in self._pendientes)])
+        self._llaves, inv = np.unique(todas, return_inverse=True)
+        self._conteos = np.bincount(inv, weights=conteos, minlength=len(self._llaves)).astype(np.int64)
+        self._pendientes, self._n_pendientes = [], 0
+
+    def update(self, lote):
+        faltantes = [c for c in COLUMNAS if c not in lote.columns]
+        if faltantes:
+            raise ValueError("El historial no tiene las columnas: " + ", ".join(faltantes))
+        self.filas += len(lote)
+        mes = month_key(lote["Fecha Salida"])
+        peso = pd.to_numeric(lote["Peso Kgs"], errors="coerce").to_numpy(dtype=float)
+
+        meses, viajes = np.unique(mes, return_counts=True)
+        for m, n in zip(meses, viajes):
+            self.viajes_mes[m] = self.viajes_mes.get(m, 0) + int(n)
+
+        #Histograma por (ruta, mes): sin ruta o sin peso el viaje no cuenta para umbrales ni vacios
+        ruta = self._route_codes(lote["Ruta"])
+        validos = (ruta >= 0) & ~np.isnan(peso)
+        cubeta = np.zeros(len(peso), dtype=np.int64)
+        positivos = validos & (peso > 0)
+        cubeta[positivos] = self.escala._keys(peso[positivos]) + 1
+        self._add_counts(
+            (((ruta[validos] << _BITS_MES) | (mes[validos] + 1)) << _BITS_CUBETA) | cubeta[validos]
+        )
+
+        conteo = pd.DataFrame({
+            "mes": mes, "Estatus": lote["Estatus de Viaje"].fillna("DESCONOCIDO").to_numpy()
+        }).groupby(["mes", "Estatus"]).size()
+        for (m, e), n in conteo.items():
+            self.estatus[(m, e)] = self.estatus.get((m, e), 0) + int(n)
+
+        por_unidad = pd.DataFrame({
+            "Tractocamión": lote["Tractocamión"].to_numpy(), "mes": mes, "peso": peso
+        }).groupby(["Tractocamión", "mes"]).agg(viajes=("peso", "size"), peso=("peso", "sum"))
+        for (u, m), fila in zip(por_unidad.index, por_unidad.itertuples(index=False)):
+            viajes, total = self.unidades.get((u, m), (0, 0.0))
+            self.unidades[(u, m)] = (viajes + fila.viajes, total + fila.peso)
+        return self
+
+    def _split(self):
+        #(ruta, mes, cubeta) de cada llave guardada
+        self._merge()
+        ruta = self._llaves >> (_BITS_MES + _BITS_CUBETA)
+        mes = ((self._llaves >> _BITS_CUBETA) & ((1 << _BITS_MES) - 1)) - 1
+        return ruta, mes, self._llaves & ((1 << _BITS_CUBETA) - 1)
+
+    def thresholds(self, q=CUANTIL):
+        #Cuantil q del peso de cada ruta (mismo calculo que PesoSketch.quantile, vectorizado)
+        umbral = np.full(len(self.rutas), np.nan)
+        self._merge()
+        if len(self._llaves) == 0:
+            return umbral
+        ruta, _, cubeta = self._split()
+        llave, inv = np.unique((ruta << _BITS_CUBETA) | cubeta, return_inverse=True)
+        conteo = np.bincount(inv, weights=self._conteos, minlength=len(llave))
+        ruta_llave, cubeta_llave = llave >> _BITS_CUBETA, llave & ((1 << _BITS_CUBETA) - 1)
+
+        #Bloques contiguos por ruta: viajes antes del bloque y cubeta donde cae el rango del cuantil
+        n = np.bincount(ruta_llave, weights=conteo, minlength=len(self.rutas))
+        acumulado = np.concatenate([[0.0], np.cumsum(conteo)])
+        inicio = acumulado[np.searchsorted(ruta_llave, np.arange(len(self.rutas)))]
+        rango = q * (n - 1)
+        j = np.minimum(np.searchsorted(acumulado[1:], inicio + rango, side="right"), len(llave) - 1)
+        fraccion = np.minimum((rango - (acumulado[j] - inicio) + 0.5) / conteo[j], 1.0)
+        #Interpolacion geometrica dentro de la cubeta; cubeta 0 = pesos <= 0
+        valor = np.where(
+            cubeta_llave[j] == 0, 0.0, self.escala._lower(cubeta_llave[j] - 1) * self.escala.gamma ** fraccion
+        )
+        con_viajes = n > 0
+        umbral[con_viajes] = valor[con_viajes]
+        return umbral
+
+    def _below(self, umbral, cubeta, conteo):
+        #Viajes de cada llave con peso menor al umbral (interpolando dentro de la cubeta del umbral)
+        positivo = umbral > 0
+        k = np.zeros(len(umbral), dtype=np.int64)
+        k[positivo] = self.escala._keys(umbral[positivo]) + 1
+        with np.errstate(divide="ignore", invalid="ignore"):
+            fraccion = np.log(umbral / self.escala._lower(k - 1)) / self.escala._log_gamma
+        fraccion = np.clip(np.nan_to_num(fraccion), 0.0, 1.0)
+        return conteo * np.select(
+            [~positivo, cubeta == 0, cubeta < k, cubeta == k], [0.0, 1.0, 1.0, fraccion], 0.0
+        )
+
+    def result(self, q=CUANTIL):
+        umbral = self.thresholds(q)
+        ruta, mes, cubeta = self._split()
+        vacios = self._below(umbral[ruta], cubeta, self._conteos)
+
+        meses = np.array(sorted(m for m in self.viajes_mes if m >= 0), dtype=np.int64)
+        vacios_mes = pd.Series(vacios).groupby(mes).sum().reindex(meses, fill_value=0.0).to_numpy()
+        viajes_mes = np.array([self.viajes_mes[m] for m in meses], dtype=np.int64)
+        mensual = pd.DataFrame({
+            "Mes": month_label(meses),
+            "viajes": viajes_mes,
+            "viaje_vacio": 100 * vacios_mes / np.maximum(viajes_mes, 1),
+        })
+
+        estatus = pd.DataFrame(
+            [(m, e, n) for (m, e), n in self.estatus.items()], columns=["mes", "Estatus", "Cantidad"]
+        )
+
+        unidades = pd.DataFrame(
+            [(u, m, v, p) for (u, m), (v, p) in self.unidades.items()],
+            columns=["Tractocamión", "mes", "viajes", "Peso Kgs"],
+        ).sort_values(["Tractocamión", "mes"], ignore_index=True)
+
+        return {
+            "filas": self.filas,
+            "umbral_ruta": pd.Series(umbral, index=pd.Index(self.rutas, dtype=object, name="Ruta"), name="Umbral"),
+            "vacios": float(vacios.sum()),
+            "mensual": mensual,
+            "estatus": estatus,
+            "unidades": unidades,
+        }
+
+
+def ingest(path, batch_size=BATCH_SIZE, columnas=COLUMNAS):
+    agregador = StreamAggregator()
+    for lote in iter_batches(path, columnas, batch_size):
+        agregador.update(lote)
+    return agregador
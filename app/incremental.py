@@ -0,0 +1,286 @@
+import io
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from almacen import MAX_DATASETS, STORE
+from carga import COLUMNAS_USADAS, compact_frame, hash_bytes, read_bytes
+from cubo import build_cube
+from etiquetas import EmptyLabeler
+from flujo import month_key, month_label
+from limpieza import clean_trips
+from pronosticos import series_counts
+from unidades import UnitIndex
+
+
+#Agregar lotes de viajes nuevos a un libro ya cargado sin recalcular todo el historial
+#
+#Cada version de datos guarda su historia: llaves de los viajes (para descartar repetidos),
+#etiquetador con los pesos ordenados por ruta, duraciones ordenadas por ruta, etiqueta de cada
+#viaje, cubo de la pantalla de flota, indice por unidad y conteos mensuales de los pronosticos.
+#El lote se limpia con las medianas de peso y duracion del historial. Un lote nuevo solo recalcula
+#los umbrales de las rutas que toca, cambia la etiqueta de los viajes anteriores cuyo peso quedo
+#entre el umbral viejo y el nuevo, y suma sus conteos a las celdas y marginales del cubo y a las
+#series mensuales. Lo que no depende de los viajes (hojas Asignacion, Riesgo y Forecast) se
+#comparte con la version anterior.
+
+# Columnas que identifican un viaje para descartar repetidos
+LLAVE = ["Ruta", "Tractocamión", "Fecha Salida"]
+
+_historias = OrderedDict()
+_lock = threading.Lock()
+
+
+def data_version(version):
+    #Version de los datos sin los sufijos del modelo o de la capacidad (":rf", ":cap0", ...)
+    return version.split(":")[0]
+
+
+def trip_keys(viajes):
+    #Hash de la llave de cada viaje; la fecha siempre en ns para que el hash no dependa de la unidad
+    llave = pd.DataFrame({c: viajes[c].astype(object) for c in LLAVE})
+    llave["Fecha Salida"] = pd.to_datetime(llave["Fecha Salida"], errors="coerce").astype("datetime64[ns]")
+    return pd.util.hash_pandas_object(llave, index=False).to_numpy()
+
+
+@dataclass(frozen=True)
+class TripHistory:
+    llaves: np.ndarray
+    etiquetador: EmptyLabeler
+    vacio: np.ndarray
+    cubo: object
+    unidades: UnitIndex
+    # Viajes y vacios por mes de las series que se pronostican (global, ruta y unidad)
+    conteos: dict
+    # Duraciones ordenadas por ruta (mediana con la que se imputan los lotes); None sin duraciones
+    duraciones: object = None
+    # Reporte del lote que produjo esta version (None en el libro original)
+    reporte: object = None
+
+    @classmethod
+    def build(cls, viajes):
+        etiquetador = EmptyLabeler.fit(viajes)
+        vacio = etiquetador.labels(viajes)
+        vacio.flags.writeable = False
+        cubo = build_cube(viajes, vacio)
+        return cls(
+            llaves=np.sort(trip_keys(viajes)),
+            etiquetador=etiquetador,
+            vacio=vacio,
+            cubo=cubo,
+            unidades=UnitIndex(viajes, cubo.en_ventana),
+            conteos=series_counts(viajes, vacio),
+            duraciones=_durations(viajes),
+        )
+
+    def reference(self):
+        #Medianas por ruta y globales del historial para limpiar un lote (limpieza.clean_trips)
+        referencia = {"Peso Kgs": (self.etiquetador.thresholds(0.5), _median(self.etiquetador.valores))}
+        if self.duraciones is not None:
+            referencia["Duración_horas"] = (self.duraciones.thresholds(), _median(self.duraciones.valores))
+        return referencia
+
+
+def _durations(viajes):
+    if "Duración_horas" not in viajes.columns:
+        return None
+    return EmptyLabeler.fit(viajes, q=0.5, columna="Duración_horas")
+
+
+def _median(valores):
+    return float(np.median(valores)) if len(valores) else np.nan
+
+
+@dataclass(frozen=True)
+class AppendReport:
+    version: str
+    recibidas: int
+    descartadas: int
+    duplicadas: int
+    agregadas: int
+    rutas_nuevas: int
+    unidades_nuevas: int
+    meses: list
+    etiquetas_cambiadas: int
+    rutas: pd.DataFrame
+    segundos: float
+
+
+def get_history(version):
+    with _lock:
+        historia = _historias.get(data_version(version))
+        if historia is not None:
+            _historias.move_to_end(data_version(version))
+    return historia
+
+
+def _put_history(version, historia):
+    # Una historia por libro que sigue en el almacen
+    with _lock:
+        _historias[version] = historia
+        _historias.move_to_end(version)
+        while len(_historias) > MAX_DATASETS:
+            _historias.popitem(last=False)
+
+
+def read_delta(file_obj, nombre=None):
+    #Hoja Viajes (o la primera) de un Excel, o un CSV / Parquet con las columnas de Viajes
+    data = read_bytes(file_obj)
+    nombre = str(nombre or getattr(file_obj, "name", file_obj))
+    sufijo = Path(nombre).suffix.lower()
+    if sufijo == ".parquet":
+        viajes = pd.read_parquet(io.BytesIO(data))
+    elif sufijo == ".csv":
+        viajes = pd.read_csv(io.BytesIO(data))
+    else:
+        hojas = pd.ExcelFile(io.BytesIO(data)).sheet_names
+        viajes = pd.read_excel(io.BytesIO(data), sheet_name="Viajes" if "Viajes" in hojas else 0)
+    return viajes, hash_bytes(data)
+
+
+def _align(viajes, nuevos):
+    #Mismas columnas y tipos que el historial para concatenar sin perder las categorias
+    #(las columnas del historial que cambian se derivan con assign; el original no se toca)
+    nuevos = nuevos.reindex(columns=viajes.columns)
+    ampliadas = {}
+    for col in viajes.columns:
+        tipo = viajes[col].dtype
+        if isinstance(tipo, pd.CategoricalDtype):
+            faltan = pd.Index(nuevos[col].dropna().unique()).difference(tipo.categories)
+            if len(faltan):
+                tipo = pd.CategoricalDtype(tipo.categories.append(faltan), ordered=tipo.ordered)
+                ampliadas[col] = viajes[col].cat.set_categories(tipo.categories)
+            nuevos[col] = pd.Categorical(nuevos[col].astype(object), categories=tipo.categories)
+        elif nuevos[col].dtype != tipo:
+            nuevos[col] = nuevos[col].astype(object).astype(tipo)
+    if ampliadas:
+        viajes = viajes.assign(**ampliadas)
+    return viajes, nuevos
+
+
+def append_trips(dataset, delta, version_delta):
+    #Nueva version del libro con los viajes no repetidos del lote; regresa (dataset, reporte)
+    inicio = time.perf_counter()
+    version = data_version(dataset.version)
+    nueva_version = hash_bytes(f"{version}+{version_delta}".encode())
+    # El mismo lote sobre el mismo libro ya se agrego (otra sesion o un rerun)
+    existente = get_history(nueva_version)
+    if existente is not None and nueva_version in STORE:
+        return STORE.get(nueva_version), existente.reporte
+
+    viajes = dataset.viajes
+    historia = get_history(version)
+    if historia is None:
+        historia = TripHistory.build(viajes)
+        _put_history(version, historia)
+
+    nuevos, limpieza = clean_trips(delta, historia.reference())
+    nuevos = compact_frame(nuevos, COLUMNAS_USADAS["Viajes"])
+    #Las filas identicas dentro del lote (que la limpieza ya quito) cuentan como repetidas
+    repetidas = limpieza["Duplicados"]
+    descartadas = len(delta) - len(nuevos) - repetidas
+
+    #Repetidos dentro del lote (misma llave) y contra el historial
+    llaves = trip_keys(nuevos)
+    unicos = np.zeros(len(llaves), dtype=bool)
+    unicos[np.unique(llaves, return_index=True)[1]] = True
+    pos = np.minimum(np.searchsorted(historia.llaves, llaves), max(len(historia.llaves) - 1, 0))
+    existe = historia.llaves[pos] == llaves if len(historia.llaves) else np.zeros(len(llaves), dtype=bool)
+    mantener = unicos & ~existe
+    nuevos, llaves = nuevos.loc[mantener].reset_index(drop=True), np.sort(llaves[mantener])
+
+    conteos = dict(
+        recibidas=len(delta), descartadas=descartadas, duplicadas=repetidas + int((~mantener).sum()),
+        agregadas=len(nuevos),
+    )
+    if len(nuevos) == 0:
+        return dataset, AppendReport(
+            version=version, **conteos, rutas_nuevas=0, unidades_nuevas=0, meses=[], etiquetas_cambiadas=0,
+            rutas=pd.DataFrame(), segundos=time.perf_counter() - inicio,
+        )
+    viajes, nuevos = _align(viajes, nuevos)
+
+    #Umbrales: solo los grupos con pesos nuevos; viajes anteriores que cruzaron el umbral
+    previo = historia.etiquetador
+    etiquetador = previo.copy()
+    n_anterior = etiquetador.n_filas
+    tocados = etiquetador.append(nuevos)
+    antes = np.full(len(tocados), np.nan)
+    existian = tocados < len(previo.umbral)
+    antes[existian] = previo.umbral[tocados[existian]]
+    filas, etiqueta = etiquetador.changed_rows(tocados, antes, n_anterior)
+
+    vacio_nuevos = etiquetador.labels(nuevos)
+    vacio = np.concatenate([historia.vacio, vacio_nuevos])
+    cambio = etiqueta.astype(np.int64) - vacio[filas]
+    vacio[filas] = etiqueta
+    vacio.flags.writeable = False
+
+    #Cubo: conteos del lote mas los cambios de etiqueta de viajes anteriores dentro de la ventana
+    en_ventana = historia.cubo.en_ventana[filas]
+    cambiados = viajes.iloc[filas[en_ventana]]
+    cubo = historia.cubo.append(nuevos, vacio_nuevos, cambiados, cambio[en_ventana])
+    unidades = historia.unidades.append(nuevos, cubo.en_ventana[n_anterior:])
+    duraciones = None
+    if historia.duraciones is not None:
+        duraciones = historia.duraciones.copy()
+        duraciones.append(nuevos)
+    #Series mensuales de los pronosticos: todos los viajes que cambiaron de etiqueta, no solo la ventana
+    anteriores = viajes.iloc[filas]
+    series = {k: c.append(nuevos, vacio_nuevos, anteriores, cambio) for k, c in historia.conteos.items()}
+
+    meses = np.unique(month_key(nuevos["Fecha Salida"]))
+    reporte = AppendReport(
+        version=nueva_version,
+        **conteos,
+        rutas_nuevas=int((~existian).sum()),
+        unidades_nuevas=len(unidades.unidades) - len(historia.unidades.unidades),
+        meses=month_label(meses[meses >= 0]),
+        etiquetas_cambiadas=len(filas),
+        rutas=_route_changes(previo, etiquetador, tocados),
+        segundos=time.perf_counter() - inicio,
+    )
+    _put_history(nueva_version, TripHistory(
+        llaves=np.insert(historia.llaves, np.searchsorted(historia.llaves, llaves), llaves),
+        etiquetador=etiquetador,
+        vacio=vacio,
+        cubo=cubo,
+        unidades=unidades,
+        conteos=series,
+        duraciones=duraciones,
+        reporte=reporte,
+    ))
+    dataset = STORE.put(nueva_version, {
+        "Viajes": pd.concat([viajes, nuevos], ignore_index=True),
+        "Asignacion": dataset.asignacion,
+        "Riesgo": dataset.riesgo,
+        "Forecast": dataset.forecast,
+    })
+    return dataset, reporte
+
+
+def _route_changes(previo, actual, grupos):
+    #Umbral y proporcion de vacios antes y despues en las rutas que recibieron viajes
+    antes = {c: np.zeros(len(grupos)) for c in ["conteo", "vacios"]}
+    umbral_antes = np.full(len(grupos), np.nan)
+    existian = grupos < len(previo.conteo)
+    for c in antes:
+        antes[c][existian] = getattr(previo, c)[grupos[existian]]
+    umbral_antes[existian] = previo.umbral[grupos[existian]]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rutas = pd.DataFrame({
+            "Ruta": np.asarray(actual.rutas, dtype=object)[actual.grupos[grupos]],
+            "Viajes antes": antes["conteo"].astype(np.int64),
+            "Viajes después": actual.conteo[grupos],
+            "Umbral antes (kg)": umbral_antes,
+            "Umbral después (kg)": actual.umbral[grupos],
+            "% vacío antes": 100 * antes["vacios"] / antes["conteo"],
+            "% vacío después": 100 * actual.vacios[grupos] / actual.conteo[grupos],
+        })
+    return rutas.sort_values("Viajes después", ascending=False, kind="stable").reset_index(drop=True)
@@ -0,0 +1,66 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from asignador import route_probability
+from etiquetas import EmptyLabeler
+
+
+#Indicadores globales de la flota calculados una sola vez por version de datos
+
+@dataclass(frozen=True)
+class FleetSnapshot:
+    version: str
+    rutas_activas: int
+    unidades_activas: int
+    total_viajes: int
+    threshold_global: float
+    umbral_ruta: pd.Series
+    viaje_vacio: np.ndarray
+    total_vacios: int
+    riesgo_actual: pd.Series
+    riesgo_optimo: pd.Series
+    comparacion: pd.DataFrame
+    mejora_global: float
+
+
+def build_snapshot(version, viajes, asignacion, riesgo, historia=None):
+    threshold_global = float(viajes["Peso Kgs"].quantile(0.10))
+
+    # Viaje vacio: peso menor al percentil 10 de su ruta (definicion del README y los notebooks)
+    if historia is not None:
+        # Version con viajes agregados: etiquetas ya actualizadas solo en las rutas tocadas
+        etiquetador, viaje_vacio = historia.etiquetador, historia.vacio
+    else:
+        etiquetador = EmptyLabeler.fit(viajes)
+        viaje_vacio = etiquetador.labels(viajes)
+        viaje_vacio.flags.writeable = False
+
+    riesgo_actual = riesgo.groupby("Ruta", observed=True)["Prob_vacio"].mean()
+    # Con capacidad cada ruta puede repartir sus viajes entre varias unidades
+    riesgo_optimo = route_probability(asignacion)
+
+    comparacion = riesgo_actual.reset_index().merge(
+        riesgo_optimo.reset_index(),
+        on="Ruta",
+        suffixes=("_Actual", "_Optimo")
+    )
+    comparacion["Mejora"] = (
+        comparacion["Prob_vacio_Actual"] - comparacion["Prob_vacio_Optimo"]
+    ) * 100
+
+    return FleetSnapshot(
+        version=version,
+        rutas_activas=int(viajes["Ruta"].nunique()),
+        unidades_activas=int(viajes["Tractocamión"].nunique()),
+        total_viajes=len(viajes),
+        threshold_global=threshold_global,
+        umbral_ruta=etiquetador.thresholds(),
+        viaje_vacio=viaje_vacio,
+        total_vacios=etiquetador.total_vacios,
+        riesgo_actual=riesgo_actual,
+        riesgo_optimo=riesgo_optimo,
+        comparacion=comparacion,
+        mejora_global=float(comparacion["Mejora"].mean()),
+    )
@@ -0,0 +1,114 @@
+import pandas as pd
+
+
+#Limpieza de la hoja Viajes (los mismos pasos del notebook de EDA, vectorizados)
+
+COLUMNAS_DESCARTADAS = [
+    "Documentos", "UUID CP", "Numero", "Folio", "Viaje Docto", "Factura",
+    "Liquidación", "Fecha Vencimiento", "Peso Descarga Kgs", "Diferencia",
+]
+COLUMNAS_FECHA = ["Fecha", "Fecha.1", "Fecha Salida", "Fecha Llegada"]
+CATEGORICAS = ["Tractocamión", "Remolque 1", "Remolque 2", "Dolly", "Operador", "Estatus de Viaje"]
+DESCONOCIDO = "DESCONOCIDO"
+
+
+def _route_median(valores, rutas):
+    #Mediana por ruta de cada fila (NaN si la ruta no tiene valores o no hay ruta)
+    return valores.groupby(rutas, observed=True, sort=False).transform("median")
+
+
+def _reference_median(rutas, por_ruta):
+    #Mediana de referencia (historial) de la ruta de cada fila; NaN en rutas que no tiene
+    return pd.to_numeric(rutas.astype(object).map(por_ruta), errors="coerce")
+
+
+def clean_trips(viajes, referencia=None):
+    #Regresa (viajes limpios, conteo de cambios por paso); no modifica el DataFrame recibido
+    #referencia: {"Duración_horas" | "Peso Kgs": (mediana por ruta, mediana global)} de un historial
+    #ya limpio; un lote nuevo se imputa con las medianas del historial y solo usa las suyas en
+    #rutas que el historial no tiene
+    referencia = referencia or {}
+    reporte = {"Filas recibidas": len(viajes)}
+    df = viajes.drop(columns=COLUMNAS_DESCARTADAS, errors="ignore")
+    for col in COLUMNAS_FECHA:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+
+    if {"Fecha Salida", "Fecha Llegada"}.issubset(df.columns):
+        salida, llegada = df["Fecha Salida"], df["Fecha Llegada"]
+        sin_fechas = salida.isna() & llegada.isna()
+        reporte["Sin salida ni llegada"] = int(sin_fechas.sum())
+        df = df.loc[~sin_fechas]
+        salida, llegada = df["Fecha Salida"], df["Fecha Llegada"]
+
+        #Llegada faltante = salida + duracion mediana de la ruta (o global)
+        duracion = llegada - salida
+        if "Ruta" in df.columns:
+            mediana_ruta = _route_median(duracion, df["Ruta"])
+        else:
+            mediana_ruta = pd.Series(pd.NaT, index=df.index, dtype=duracion.dtype)
+        mediana_global = duracion.median()
+        if "Duración_horas" in referencia:
+            por_ruta, global_ = referencia["Duración_horas"]
+            if "Ruta" in df.columns:
+                horas = pd.to_timedelta(_reference_median(df["Ruta"], por_ruta), unit="h")
+                mediana_ruta = horas.fillna(mediana_ruta)
+            if pd.notna(global_):
+                mediana_global = pd.to_timedelta(global_, unit="h")
+
+        falta_llegada = llegada.isna() & salida.notna()
+        por_ruta = falta_llegada & mediana_ruta.notna()
+        llegada = llegada.mask(por_ruta, salida + mediana_ruta)
+        falta_llegada = llegada.isna() & salida.notna()
+        llegada = llegada.mask(falta_llegada, salida + mediana_global)
+        reporte["Llegada imputada (ruta)"] = int(por_ruta.sum())
+        reporte["Llegada imputada (global)"] = int(falta_llegada.sum())
+
+        falta_salida = salida.isna() & llegada.notna()
+        salida = salida.mask(falta_salida, llegada - mediana_global)
+        reporte["Salida imputada (global)"] = int(falta_salida.sum())
+
+        df = df.assign(**{"Fecha Salida": salida, "Fecha Llegada": llegada})
+        df = df.dropna(subset=["Fecha Salida", "Fecha Llegada"])
+
+        if "Fecha.1" in df.columns:
+            relleno = df["Fecha.1"]
+            for col in ["Fecha", "Fecha Salida", "Fecha Llegada"]:
+                if col in df.columns:
+                    relleno = relleno.fillna(df[col])
+            df = df.assign(**{"Fecha.1": relleno})
+
+        invertidas = df["Fecha Llegada"] < df["Fecha Salida"]
+        reporte["Llegada antes de la salida"] = int(invertidas.sum())
+        df = df.loc[~invertidas]
+        df = df.assign(Duración_horas=(df["Fecha Llegada"] - df["Fecha Salida"]).dt.total_seconds() / 3600)
+
+    #Peso faltante = mediana de la ruta y despues mediana global (solo filas sin peso)
+    if "Peso Kgs" in df.columns:
+        peso = pd.to_numeric(df["Peso Kgs"], errors="coerce")
+        falta = peso.isna()
+        if falta.any():
+            por_ruta, global_ = referencia.get("Peso Kgs", (None, None))
+            if "Ruta" in df.columns:
+                if por_ruta is not None:
+                    peso = peso.fillna(_reference_median(df["Ruta"], por_ruta))
+                peso = peso.fillna(_route_median(peso, df["Ruta"]))
+            reporte["Peso imputado (ruta)"] = int(falta.sum() - peso.isna().sum())
+            reporte["Peso imputado (global)"] = int(peso.isna().sum())
+            peso = peso.fillna(global_ if global_ is not None and pd.notna(global_) else peso.median())
+        df = df.assign(**{"Peso Kgs": peso})
+
+    categorias = {}
+    for col in CATEGORICAS:
+        if col in df.columns and df[col].isna().any():
+            categorias[col] = int(df[col].isna().sum())
+            df = df.assign(**{col: df[col].fillna(DESCONOCIDO)})
+    reporte["Categóricas con DESCONOCIDO"] = int(sum(categorias.values()))
+
+    duplicados = df.duplicated()
+    reporte["Duplicados"] = int(duplicados.sum())
+    df = df.loc[~duplicados].reset_index(drop=True)
+
+    reporte["Filas resultantes"] = len(df)
+    return df, reporte
+
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+
+
+#Matriz ruta x unidad de probabilidad de viaje vacio (dispersa, por renglones) con rankings de rutas
+#
+#Se compila una vez por version de datos; despues las consultas de la pantalla de Riesgo
+#(probabilidad de un par, unidades de una ruta, top/bottom N) no recorren la tabla; la
+#probabilidad de un par sale de un arreglo denso ruta x unidad en O(1).
+
+# Celdas ruta x unidad hasta las que se guarda el indice denso (int32: 64 MB); arriba de eso
+# la probabilidad de un par se busca en el renglon CSR de la ruta en O(log k)
+MAX_CELDAS_DENSAS = 16_000_000
+
+
+class RiskMatrix:
+
+    def __init__(self, riesgo, asignacion=None):
+        ri, rutas = pd.factorize(riesgo["Ruta"], sort=True)
+        ui, unidades = pd.factorize(riesgo["Tractocamión"], sort=True)
+        prob = riesgo["Prob_vacio"].to_numpy(dtype=float)
+        self.rutas = np.asarray(rutas, dtype=object)
+        self.unidades = np.asarray(unidades, dtype=object)
+        self._ruta_pos = {r: i for i, r in enumerate(self.rutas)}
+        self._unidad_pos = {u: j for j, u in enumerate(self.unidades)}
+        n_rutas, n_unidades = len(self.rutas), len(self.unidades)
+
+        #Promedio por ruta sobre todas sus filas (igual que groupby("Ruta").mean())
+        con_prob = (ri >= 0) & ~np.isnan(prob)
+        suma = np.bincount(ri[con_prob], weights=prob[con_prob], minlength=n_rutas)
+        cuenta = np.bincount(ri[con_prob], minlength=n_rutas)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.media_ruta = suma / cuenta
+
+        #Pares (ruta, unidad) promediados, ordenados por ruta y luego unidad: formato CSR
+        par = con_prob & (ui >= 0)
+        llaves, inv = np.unique(ri[par] * n_unidades + ui[par], return_inverse=True)
+        self._par_prob = np.bincount(inv, weights=prob[par]) / np.bincount(inv)
+        self._par_unidad = llaves % max(n_unidades, 1)
+        self._offsets = np.searchsorted(llaves // max(n_unidades, 1), np.arange(n_rutas + 1))
+        # Posicion del par en la CSR por (ruta * n_unidades + unidad); -1 si el par no existe
+        self._par_pos = None
+        if n_rutas * n_unidades <= MAX_CELDAS_DENSAS:
+            self._par_pos = np.full(n_rutas * n_unidades, -1, dtype=np.int32)
+            self._par_pos[llaves] = np.arange(len(llaves), dtype=np.int32)
+
+        #Rankings precalculados (NaN al final en ambos sentidos)
+        self._orden_desc = np.argsort(-self.media_ruta, kind="stable")
+        self._orden_asc = np.argsort(self.media_ruta, kind="stable")
+
+        #Unidad asignada por ruta (primera fila de la ruta en la tabla de asignacion)
+        self.asignada_unidad = np.full(n_rutas, None, dtype=object)
+        self.asignada_prob = np.full(n_rutas, np.nan)
+        if asignacion is not None and len(asignacion):
+            pos = pd.Index(self.rutas).get_indexer(asignacion["Ruta"])
+            primera = (pos >= 0) & ~pd.Series(pos).duplicated().to_numpy()
+            self.asignada_unidad[pos[primera]] = asignacion["Tractocamión"].to_numpy(dtype=object)[primera]
+            self.asignada_prob[pos[primera]] = asignacion["Prob_vacio"].to_numpy(dtype=float)[primera]
+
+    def __len__(self):
+        return len(self.rutas)
+
+    def route_units(self, ruta):
+        #Unidades con probabilidad para la ruta, ordenadas
+        i = self._ruta_pos.get(ruta)
+        if i is None:
+            return []
+        return list(self.unidades[self._par_unidad[self._offsets[i]:self._offsets[i + 1]]])
+
+    def prob(self, ruta, unidad):
+        #Probabilidad del par o NaN si no existe
+        i, j = self._ruta_pos.get(ruta), self._unidad_pos.get(unidad)
+        if i is None or j is None:
+            return np.nan
+        if self._par_pos is not None:
+            k = self._par_pos[i * len(self.unidades) + j]
+            return float(self._par_prob[k]) if k >= 0 else np.nan
+        ini, fin = self._offsets[i], self._offsets[i + 1]
+        k = ini + int(np.searchsorted(self._par_unidad[ini:fin], j))
+        if k < fin and self._par_unidad[k] == j:
+            return float(self._par_prob[k])
+        return np.nan
+
+    def assigned(self, ruta):
+        i = self._ruta_pos.get(ruta)
+        if i is None:
+            return None, np.nan
+        return self.asignada_unidad[i], float(self.asignada_prob[i])
+
+    def top(self, n, ascending=False):
+        #Rutas con mayor (o menor) probabilidad promedio
+        orden = (self._orden_asc if ascending else self._orden_desc)[:n]
+        return pd.DataFrame({"Ruta": self.rutas[orden], "Prob_vacio": self.media_ruta[orden]})
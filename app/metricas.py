@@ -0,0 +1,185 @@
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+import numpy as np
+
+
+#Instrumentacion ligera: tiempo, memoria, filas y bytes enviados al navegador por etapa
+#
+#Cada etapa cerrada se guarda en un registro del proceso (compartido por todas las sesiones)
+#y se escribe como una linea JSON en el logger "tablero.metricas".
+#Variables de entorno:
+#   TABLERO_METRICAS=archivo.jsonl   agrega cada medicion a ese archivo
+#   TABLERO_MEMORIA=1                activa tracemalloc (mas lento; memoria de todo el proceso)
+#
+#La memoria es el pico de tracemalloc del proceso, no de la sesion: incluye lo que asignan otras
+#sesiones al mismo tiempo, y reset_peak es global, asi que con sesiones simultaneas una puede
+#reiniciar el pico de otra. Se reporta como "memoria_proceso" para no leerla como memoria por sesion.
+
+# Mediciones que se conservan por etapa para calcular percentiles
+MAX_MUESTRAS = 500
+
+logger = logging.getLogger("tablero.metricas")
+
+if os.environ.get("TABLERO_METRICAS"):
+    _handler = logging.FileHandler(os.environ["TABLERO_METRICAS"], encoding="utf-8")
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+
+if os.environ.get("TABLERO_MEMORIA") == "1" and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+
+class Medicion:
+    #Etapa abierta; `filas` se puede asignar dentro del bloque
+
+    def __init__(self, etapa):
+        self.etapa = etapa
+        self.filas = None
+        self.bytes = 0
+        self.pico = 0
+        self.mem_inicio = 0
+
+
+class Registro:
+
+    def __init__(self, max_muestras=MAX_MUESTRAS):
+        self._lock = threading.Lock()
+        self._muestras = defaultdict(lambda: deque(maxlen=max_muestras))
+
+    def add(self, etapa, segundos, filas=None, bytes_enviados=0, memoria=None):
+        with self._lock:
+            self._muestras[etapa].append((segundos, filas, bytes_enviados, memoria))
+
+    def summary(self):
+        #Una fila por etapa con percentiles de latencia y promedios de filas, bytes y memoria
+        with self._lock:
+            muestras = {e: list(m) for e, m in self._muestras.items()}
+
+        filas = []
+        for etapa, datos in sorted(muestras.items()):
+            seg = np.array([d[0] for d in datos])
+            n_filas = [d[1] for d in datos if d[1] is not None]
+            memoria = [d[3] for d in datos if d[3] is not None]
+            filas.append({
+                "etapa": etapa,
+                "n": len(datos),
+                "p50_ms": 1000 * float(np.percentile(seg, 50)),
+                "p95_ms": 1000 * float(np.percentile(seg, 95)),
+                "max_ms": 1000 * float(seg.max()),
+                "filas": int(np.mean(n_filas)) if n_filas else None,
+                "kb_enviados": float(np.mean([d[2] for d in datos])) / 1024,
+                "memoria_proceso_mb": float(np.mean(memoria)) / 1e6 if memoria else None,
+            })
+        return filas
+
+    def export(self):
+        return json.dumps(
+            {"generado": time.strftime("%Y-%m-%dT%H:%M:%S"), "etapas": self.summary()},
+            ensure_ascii=False,
+            indent=2,
+        )
+
+    def clear(self):
+        with self._lock:
+            self._muestras.clear()
+
+
+REGISTRO = Registro()
+
+# Ya se aviso que no se pueden contar los bytes enviados (una vez por proceso)
+_sin_enqueue = False
+
+# Pila de etapas abiertas por hilo (Streamlit ejecuta cada sesion en su propio hilo)
+_local = threading.local()
+
+
+def _pila():
+    if not hasattr(_local, "pila"):
+        _local.pila = []
+    return _local.pila
+
+
+@contextmanager
+def medir(etapa, filas=None, registro=REGISTRO):
+    pila = _pila()
+    med = Medicion(etapa)
+    med.filas = filas
+
+    memoria = tracemalloc.is_tracing()
+    if memoria:
+        actual, pico = tracemalloc.get_traced_memory()
+        if pila:
+            pila[-1].pico = max(pila[-1].pico, pico)
+        tracemalloc.reset_peak()
+        med.mem_inicio = actual
+
+    pila.append(med)
+    inicio = time.perf_counter()
+    try:
+        yield med
+    finally:
+        segundos = time.perf_counter() - inicio
+        pila.pop()
+
+        usada = None
+        if memoria:
+            med.pico = max(med.pico, tracemalloc.get_traced_memory()[1])
+            usada = med.pico - med.mem_inicio
+            if pila:
+                pila[-1].pico = max(pila[-1].pico, med.pico)
+        if pila:
+            pila[-1].bytes += med.bytes
+
+        registro.add(etapa, segundos, med.filas, med.bytes, usada)
+        logger.info(json.dumps({
+            "etapa": etapa,
+            "ms": round(1000 * segundos, 3),
+            "filas": med.filas,
+            "bytes": med.bytes,
+            "memoria_proceso": usada,
+        }, ensure_ascii=False))
+
+
+def count_sent(nbytes):
+    #Suma bytes a la etapa abierta mas interna del hilo actual
+    pila = _pila()
+    if pila:
+        pila[-1].bytes += nbytes
+
+
+def install_payload_counter():
+    #Cuenta el tamaño de cada mensaje que Streamlit manda al navegador en esta sesion
+    #(envuelve ScriptRunContext._enqueue, que es privado: si cambia, no se cuentan bytes)
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return False
+
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return False
+    original = getattr(ctx, "_enqueue", None)
+    if not callable(original):
+        global _sin_enqueue
+        if not _sin_enqueue:
+            _sin_enqueue = True
+            logger.warning("Esta version de Streamlit no tiene ScriptRunContext._enqueue; kb_enviados queda en 0")
+        return False
+    if getattr(original, "_cuenta_bytes", False):
+        return True
+
+    def _enqueue(msg):
+        count_sent(msg.ByteSize())
+        original(msg)
+
+    _enqueue._cuenta_bytes = True
+    ctx._enqueue = _enqueue
+    return True
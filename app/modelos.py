@@ -0,0 +1,255 @@
+import json
+import os
+import threading
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+#Carga de los modelos entrenados y calculo de la tabla de Riesgo en vivo
+
+# Mismas variables que en XGBoost_final.ipynb (get_dummies con drop_first)
+CATEGORICAS = ["Ruta", "Nombre Cliente", "Tractocamión"]
+NUMERICAS = ["Duración_horas", "Peso_prom_ruta", "Semana", "Mes"]
+
+MODELOS = {
+    "Random Forest": Path(__file__).with_name("rf_model.pkl"),
+    "XGBoost": Path(__file__).with_name("xgb_model.pkl"),
+}
+
+# Modelos entrenados con entrenamiento.py (booster + metadatos JSON por version)
+MODELOS_DIR = Path(__file__).with_name("modelos_entrenados")
+
+BATCH_SIZE = 50_000
+
+# Cache de proceso: cada modelo se deserializa una sola vez
+_modelos = {}
+_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class NativeModel:
+    #Booster de XGBoost con categorias nativas; las categorias vistas al entrenar fijan los codigos
+    version: str
+    booster: object
+    categorias: dict
+    numericas: list
+    meta: dict
+
+    @classmethod
+    def load(cls, path):
+        import xgboost as xgb
+
+        meta = json.loads(Path(path).read_text(encoding="utf-8"))
+        booster = xgb.Booster()
+        booster.load_model(Path(path).with_name(meta["booster"]))
+        booster.set_param({"nthread": os.cpu_count() or 1})
+        return cls(meta["version"], booster, meta["categorias"], meta["numericas"], meta)
+
+    def codes(self, columna, valores):
+        #Codigo de cada valor en las categorias del entrenamiento (-1 = no visto); se comparan como texto
+        #para que una unidad numerica coincida aunque llegue como texto (o al reves)
+        categorias = pd.Index(self.categorias[columna]).astype(str)
+        return categorias.get_indexer(pd.Index(valores).astype(str))
+
+    def frame(self, codigos, numericas):
+        #codigos: {columna: codigos}, numericas: {nombre: arreglo}
+        X = {c: pd.Categorical.from_codes(codigos[c], self.categorias[c]) for c in self.categorias}
+        X.update({c: np.asarray(numericas[c], dtype=np.float32) for c in self.numericas})
+        return pd.DataFrame(X)
+
+    def predict_proba(self, X):
+        prob = self.booster.inplace_predict(X)
+        return np.column_stack([1 - prob, prob])
+
+
+def latest_artifact(carpeta=MODELOS_DIR):
+    #Metadatos del modelo entrenado mas reciente (los nombres empiezan con la fecha)
+    metas = sorted(Path(carpeta).glob("vacio_*.json"))
+    return metas[-1] if metas else None
+
+
+def risk_models():
+    #Modelos que se pueden evaluar con la hoja Viajes: Random Forest del notebook y el ultimo entrenado
+    rutas = {"Random Forest": MODELOS["Random Forest"]}
+    ultimo = latest_artifact()
+    if ultimo is not None:
+        rutas[f"Entrenado ({ultimo.stem[len('vacio_'):]})"] = ultimo
+    return rutas
+
+
+def load_model(path):
+    path = str(Path(path).resolve())
+    with _lock:
+        if path not in _modelos:
+            if path.endswith(".json"):
+                _modelos[path] = NativeModel.load(path)
+            else:
+                import joblib
+
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore")
+                    _modelos[path] = joblib.load(path)
+        return _modelos[path]
+
+
+def check_features(model):
+    #El modelo debe usar solo las variables que se pueden reconstruir desde Viajes
+    nombres = list(getattr(model, "feature_names_in_", []))
+    faltantes = [
+        n for n in nombres
+        if n not in NUMERICAS and not any(n.startswith(f"{c}_") for c in CATEGORICAS)
+    ]
+    if not nombres or faltantes:
+        raise ValueError(
+            "El modelo requiere variables que no están en la hoja Viajes: "
+            + ", ".join(faltantes[:5])
+        )
+    return nombres
+
+
+def route_features(viajes, fecha_ref=None):
+    #Variables por ruta: cliente mas frecuente, duracion mediana y peso promedio
+    df = viajes[["Ruta", "Nombre Cliente", "Peso Kgs"]].copy()
+    if "Duración_horas" in viajes.columns:
+        df["Duración_horas"] = viajes["Duración_horas"]
+    else:
+        llegada = pd.to_datetime(viajes["Fecha Llegada"], errors="coerce")
+        salida = pd.to_datetime(viajes["Fecha Salida"], errors="coerce")
+        df["Duración_horas"] = (llegada - salida).dt.total_seconds() / 3600
+
+    agregados = df.groupby("Ruta", sort=True, observed=True).agg(
+        **{"Duración_horas": ("Duración_horas", "median"), "Peso_prom_ruta": ("Peso Kgs", "mean")}
+    )
+    cliente = (
+        df.groupby(["Ruta", "Nombre Cliente"], sort=False, observed=True).size()
+        .sort_values(ascending=False, kind="stable")
+        .reset_index()
+        .drop_duplicates("Ruta")
+        .set_index("Ruta")["Nombre Cliente"]
+    )
+    agregados["Nombre Cliente"] = cliente.reindex(agregados.index)
+    agregados["Duración_horas"] = agregados["Duración_horas"].fillna(agregados["Duración_horas"].median())
+
+    if fecha_ref is None:
+        fecha_ref = pd.to_datetime(viajes["Fecha Salida"], errors="coerce").max()
+    fecha_ref = pd.Timestamp(fecha_ref)
+    agregados["Semana"] = int(fecha_ref.isocalendar().week)
+    agregados["Mes"] = int(fecha_ref.month)
+    return agregados.reset_index()
+
+
+def _one_hot_columns(nombres, prefijo, valores):
+    #Posicion de la columna dummy de cada valor (-1 si es la categoria base o no se vio al entrenar)
+    posicion = {n: i for i, n in enumerate(nombres)}
+    return np.array([posicion.get(f"{prefijo}_{v}", -1) for v in valores], dtype=np.int64)
+
+
+def design_matrix(nombres, numericas, columnas_dummy):
+    from scipy import sparse
+
+    #numericas: {nombre: arreglo}, columnas_dummy: lista de arreglos de posiciones (-1 = sin columna)
+    n = len(next(iter(numericas.values())))
+    posicion = {c: i for i, c in enumerate(nombres)}
+    filas = [np.arange(n)] * len(numericas)
+    cols = [np.full(n, posicion[c]) for c in numericas]
+    vals = [np.asarray(v, dtype=np.float32) for v in numericas.values()]
+    for col in columnas_dummy:
+        mask = col >= 0
+        filas.append(np.flatnonzero(mask))
+        cols.append(col[mask])
+        vals.append(np.ones(mask.sum(), dtype=np.float32))
+
+    return sparse.csr_matrix(
+        (np.concatenate(vals), (np.concatenate(filas), np.concatenate(cols))),
+        shape=(n, len(nombres)),
+        dtype=np.float32,
+    )
+
+
+@dataclass(frozen=True)
+class PairGrid:
+    #Pares ruta-unidad a evaluar con las variables de su ruta; X se arma por lotes
+    model: object
+    nombres: list
+    rutas: pd.DataFrame
+    unidades: np.ndarray
+    ri: np.ndarray
+    ui: np.ndarray
+    codigos: dict
+    numericas: dict
+
+    def __len__(self):
+        return len(self.ri)
+
+    def pairs(self):
+        return pd.DataFrame({"Ruta": self.rutas["Ruta"].to_numpy()[self.ri], "Tractocamión": self.unidades[self.ui]})
+
+    def matrix(self, inicio, fin):
+        r, u = self.ri[inicio:fin], self.ui[inicio:fin]
+        num = {c: v[r] for c, v in self.numericas.items()}
+        codigos = {"Ruta": self.codigos["Ruta"][r], "Nombre Cliente": self.codigos["Nombre Cliente"][r],
+                   "Tractocamión": self.codigos["Tractocamión"][u]}
+        if self.nombres is None:
+            return self.model.frame(codigos, num)
+        return design_matrix(self.nombres, num, list(codigos.values()))
+
+
+def pair_grid(model, viajes, pares=None, fecha_ref=None):
+    nativo = isinstance(model, NativeModel)
+    nombres = None if nativo else check_features(model)
+    rutas = route_features(viajes, fecha_ref)
+    unidades = np.sort(viajes["Tractocamión"].dropna().unique())
+
+    #Pares a evaluar: malla completa ruta x unidad o solo los indicados
+    if pares is None:
+        ri = np.repeat(np.arange(len(rutas)), len(unidades))
+        ui = np.tile(np.arange(len(unidades)), len(rutas))
+    else:
+        ri = pd.Index(rutas["Ruta"]).get_indexer(pares["Ruta"])
+        ui = pd.Index(unidades).get_indexer(pares["Tractocamión"])
+        validos = (ri >= 0) & (ui >= 0)
+        ri, ui = ri[validos], ui[validos]
+
+    #Columna dummy (modelos del notebook) o codigo de categoria (modelo nativo) de cada valor
+    valores = {"Ruta": rutas["Ruta"], "Nombre Cliente": rutas["Nombre Cliente"], "Tractocamión": unidades}
+    if nativo:
+        codigos = {c: model.codes(c, v) for c, v in valores.items()}
+    else:
+        codigos = {c: _one_hot_columns(nombres, c, v) for c, v in valores.items()}
+    numericas = {c: rutas[c].to_numpy(dtype=np.float32) for c in NUMERICAS}
+    return PairGrid(model, nombres, rutas, unidades, ri, ui, codigos, numericas)
+
+
+def score_grid(model, viajes, pares=None, fecha_ref=None, batch_size=BATCH_SIZE, max_workers=None, avance=None):
+    #avance(fraccion, mensaje): se llama al terminar cada lote
+    grid = pair_grid(model, viajes, pares, fecha_ref)
+
+    def _score(inicio):
+        X = grid.matrix(inicio, inicio + batch_size)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            return model.predict_proba(X)[:, 1]
+
+    #Los arboles liberan el GIL al predecir, por lo que los lotes corren en paralelo
+    max_workers = max_workers or min(8, os.cpu_count() or 1)
+    inicios = range(0, len(grid), batch_size)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futuros = [pool.submit(_score, i) for i in inicios]
+        probs = []
+        try:
+            for futuro in futuros:
+                probs.append(futuro.result())
+                if avance is not None:
+                    avance(len(probs) / len(futuros), f"{min(len(probs) * batch_size, len(grid)):,} de {len(grid):,} pares")
+        finally:
+            for futuro in futuros:
+                futuro.cancel()
+
+    pares = grid.pairs()
+    pares["Prob_vacio"] = np.concatenate(probs) if probs else np.empty(0)
+    return pares
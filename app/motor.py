@@ -0,0 +1,419 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import cached_property
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, unquote, urlparse
+
+import numpy as np
+import pandas as pd
+
+from almacen import STORE
+from asignador import CAPACIDAD_DEFECTO
+from carga import read_workbook, workbook_version
+from indicadores import build_snapshot
+from metricas import medir
+
+
+#Motor sin interfaz: los mismos calculos que muestran las pantallas, por libro de Excel
+#
+#Uso:
+#   python app/motor.py calcular Viajes.xlsx otro/Viajes.xlsx --salida resultados --formato parquet
+#   python app/motor.py servir --datos carpeta_con_libros --puerto 8600
+#El servidor responde JSON en /libros, /salidas/<libro> y /salidas/<libro>/<salida>;
+#parametros opcionales: capacidad (-1 = hoja Asignacion, como el tablero; 0 = automatica), modelo=1 y top.
+
+# Rutas en los rankings de riesgo y combinaciones en el top de asignacion
+TOP_N = 10
+TOP_COMBINACIONES = 20
+# Respuestas HTTP que se conservan en memoria (las menos usadas salen primero)
+MAX_RESPUESTAS = 64
+PUERTO = 8600
+
+
+def fleet_kpis(snapshot):
+    #Indicadores de la pantalla de Estado de la Flota
+    return {
+        "version": snapshot.version,
+        "rutas_activas": snapshot.rutas_activas,
+        "unidades_activas": snapshot.unidades_activas,
+        "total_viajes": snapshot.total_viajes,
+        "viajes_vacios": snapshot.total_vacios,
+        "umbral_global": snapshot.threshold_global,
+        "mejora_global": snapshot.mejora_global,
+    }
+
+
+def best_units(asignacion):
+    #Unidad con menor probabilidad de viaje vacio por ruta
+    return (
+        asignacion.sort_values("Prob_vacio", kind="stable")
+        .drop_duplicates("Ruta")
+        .sort_values("Ruta", kind="stable")
+        .reset_index(drop=True)
+    )
+
+
+def top_combinations(asignacion, n=TOP_COMBINACIONES):
+    #Combinaciones ruta-unidad mas eficientes
+    return asignacion.sort_values("Prob_vacio", kind="stable").head(n).reset_index(drop=True)
+
+
+class Motor:
+    #Salidas de todas las pantallas para una version de datos; cada pieza se calcula una vez
+
+    def __init__(self, version, viajes, asignacion, riesgo, forecast, capacidad=CAPACIDAD_DEFECTO, modelo=False):
+        self.version_datos = version
+        self.viajes = viajes
+        self.asignacion_hoja = asignacion
+        self.riesgo_hoja = riesgo
+        self.forecast = forecast
+        self.capacidad = capacidad
+        self.modelo = modelo
+
+    @classmethod
+    def from_workbook(cls, ruta, **opciones):
+        #El libro se lee una vez por contenido y se comparte con el tablero (mismo almacen y sidecar)
+        version = workbook_version(ruta)
+        dataset = STORE.get_or_load(version, lambda: read_workbook(ruta, version)[0])
+        return cls(version, *dataset.frames, **opciones)
+
+    @property
+    def version(self):
+        # Misma convencion de versiones que el contexto del tablero
+        version = self.version_datos
+        if self.modelo:
+            version = f"{version}:rf"
+        if self.capacidad is not None and self.capacidad >= 0:
+            version = f"{version}:cap{self.capacidad}"
+        return version
+
+    @cached_property
+    def riesgo(self):
+        if not self.modelo:
+            return self.riesgo_hoja
+        from modelos import MODELOS, load_model, score_grid
+
+        with medir("riesgo_modelo", filas=len(self.viajes)):
+            pares = self.viajes[["Ruta", "Tractocamión"]].drop_duplicates()
+            return score_grid(load_model(MODELOS["Random Forest"]), self.viajes, pares=pares)
+
+    @cached_property
+    def asignacion(self):
+        # capacidad < 0 (o None): la hoja Asignacion tal cual viene del notebook
+        if self.capacidad is None or self.capacidad < 0:
+            return self.asignacion_hoja
+        from asignador import solve_assignment
+
+        with medir("asignacion_capacidad", filas=len(self.riesgo)):
+            demanda = self.viajes["Ruta"].value_counts()
+            return solve_assignment(self.riesgo, capacidad=self.capacidad or None, demanda=demanda)
+
+    @cached_property
+    def snapshot(self):
+        with medir("kpis_globales", filas=len(self.viajes)):
+            return build_snapshot(self.version, self.viajes, self.asignacion, self.riesgo)
+
+    @cached_property
+    def cubo(self):
+        from cubo import build_cube
+
+        return build_cube(self.viajes, self.snapshot.viaje_vacio)
+
+    @cached_property
+    def matriz(self):
+        from matriz import RiskMatrix
+
+        return RiskMatrix(self.riesgo, self.asignacion)
+
+    @cached_property
+    def pronosticos(self):
+        from pronosticos import build_forecasts
+
+        return build_forecasts(self.viajes, self.snapshot.viaje_vacio)
+
+    def outputs(self, top_n=TOP_N):
+        #Nombre -> DataFrame (o dict para los indicadores)
+        etiquetas = self.cubo.etiquetas
+        return {
+            "kpis": fleet_kpis(self.snapshot),
+            "serie_mensual": self.cubo.monthly_empty(etiquetas),
+            "estatus": self.cubo.status_counts(etiquetas),
+            "rutas_riesgosas": self.matriz.top(top_n),
+            "rutas_eficientes": self.matriz.top(top_n, ascending=True),
+            "asignacion": self.asignacion,
+            "mejor_unidad": best_units(self.asignacion),
+            "top_combinaciones": top_combinations(self.asignacion),
+            "comparacion": self.snapshot.comparacion,
+            "pronostico_global": self.pronosticos["Global"].series("Global"),
+            "pronostico_ruta": self.pronosticos["Ruta"].table(),
+            "pronostico_unidad": self.pronosticos["Tractocamión"].table(),
+        }
+
+
+#Escritura de salidas
+
+def to_json(salida):
+    if isinstance(salida, pd.DataFrame):
+        return salida.to_json(orient="records", date_format="iso", force_ascii=False)
+    return json.dumps(salida, ensure_ascii=False, default=_json_default)
+
+
+def _json_default(valor):
+    if isinstance(valor, np.generic):
+        return valor.item()
+    return str(valor)
+
+
+def write_outputs(salidas, carpeta, formato="parquet"):
+    carpeta.mkdir(parents=True, exist_ok=True)
+    archivos = []
+    for nombre, salida in salidas.items():
+        #Los indicadores son un dict: siempre JSON
+        if formato == "parquet" and isinstance(salida, pd.DataFrame):
+            archivo = carpeta / f"{nombre}.parquet"
+            salida.to_parquet(archivo, index=False)
+        else:
+            archivo = carpeta / f"{nombre}.json"
+            archivo.write_text(to_json(salida), encoding="utf-8")
+        archivos.append(archivo.name)
+    return archivos
+
+
+def process_workbook(ruta, salida, formato="parquet", capacidad=CAPACIDAD_DEFECTO, modelo=False, top_n=TOP_N):
+    #Un libro completo; se ejecuta en un proceso del pool
+    ruta = Path(ruta)
+    inicio = time.perf_counter()
+    with medir("motor_libro") as med:
+        motor = Motor.from_workbook(ruta, capacidad=capacidad, modelo=modelo)
+        med.filas = len(motor.viajes)
+        carpeta = Path(salida) / f"{ruta.stem}_{motor.version_datos[:8]}"
+        archivos = write_outputs(motor.outputs(top_n), carpeta, formato)
+    return {
+        "libro": str(ruta),
+        "version": motor.version,
+        "viajes": len(motor.viajes),
+        "carpeta": str(carpeta),
+        "archivos": archivos,
+        "segundos": round(time.perf_counter() - inicio, 3),
+    }
+
+
+def run_batch(libros, salida, formato="parquet", procesos=None, **opciones):
+    #Libros en paralelo (un proceso por libro); rutas repetidas se calculan una vez
+    libros = list(dict.fromkeys(str(Path(p).resolve()) for p in libros))
+    procesos = min(procesos or os.cpu_count() or 1, len(libros))
+    resultados, errores = [], []
+    if procesos <= 1:
+        for libro in libros:
+            try:
+                resultados.append(process_workbook(libro, salida, formato, **opciones))
+            except Exception as e:
+                errores.append({"libro": libro, "error": f"{type(e).__name__}: {e}"})
+    else:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            futuros = {pool.submit(process_workbook, libro, salida, formato, **opciones): libro for libro in libros}
+            for futuro in as_completed(futuros):
+                try:
+                    resultados.append(futuro.result())
+                except Exception as e:
+                    errores.append({"libro": futuros[futuro], "error": f"{type(e).__name__}: {e}"})
+
+    resumen = {"resultados": sorted(resultados, key=lambda r: r["libro"]), "errores": errores}
+    Path(salida).mkdir(parents=True, exist_ok=True)
+    (Path(salida) / "resumen.json").write_text(json.dumps(resumen, ensure_ascii=False, indent=2), encoding="utf-8")
+    return resumen
+
+
+#Servidor HTTP local (solo lectura, libros dentro de una carpeta)
+
+class ResponseCache:
+    #Respuestas ya serializadas por (version, salida, parametros) con desalojo LRU
+
+    def __init__(self, max_respuestas=MAX_RESPUESTAS):
+        self.max_respuestas = max_respuestas
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def get_or_build(self, llave, construir):
+        with self._lock:
+            cuerpo = self._datos.get(llave)
+            if cuerpo is not None:
+                self._datos.move_to_end(llave)
+                self.aciertos += 1
+                return cuerpo
+            self.fallos += 1
+        cuerpo = construir()
+        with self._lock:
+            self._datos[llave] = cuerpo
+            while len(self._datos) > self.max_respuestas:
+                self._datos.popitem(last=False)
+        return cuerpo
+
+
+class EngineServer:
+
+    def __init__(self, datos, max_respuestas=MAX_RESPUESTAS):
+        self.datos = Path(datos).resolve()
+        self.cache = ResponseCache(max_respuestas)
+        self._motores = OrderedDict()
+        self._lock = threading.Lock()
+
+    def books(self):
+        return sorted(str(p.relative_to(self.datos)) for p in self.datos.rglob("*.xlsx"))
+
+    def _book_path(self, nombre):
+        ruta = (self.datos / nombre).resolve()
+        if ruta.suffix != ".xlsx" or not ruta.is_file() or os.path.commonpath([ruta, self.datos]) != str(self.datos):
+            raise FileNotFoundError(nombre)
+        return ruta
+
+    def _motor(self, ruta, capacidad, modelo):
+        #Un motor por (version, opciones); sus piezas ya calculadas sirven a todas las salidas
+        version = workbook_version(ruta)
+        llave = (version, capacidad, modelo)
+        with self._lock:
+            motor = self._motores.get(llave)
+            if motor is not None:
+                self._motores.move_to_end(llave)
+                return motor
+        motor = Motor.from_workbook(ruta, capacidad=capacidad, modelo=modelo)
+        with self._lock:
+            self._motores[llave] = motor
+            while len(self._motores) > STORE.max_datasets:
+                self._motores.popitem(last=False)
+        return motor
+
+    def respond(self, nombre, salida=None, capacidad=CAPACIDAD_DEFECTO, modelo=False, top_n=TOP_N):
+        ruta = self._book_path(nombre)
+        llave = (workbook_version(ruta), salida, capacidad, modelo, top_n)
+
+        def _construir():
+            salidas = self._motor(ruta, capacidad, modelo).outputs(top_n)
+            if salida is None:
+                cuerpo = "{" + ",".join(f"{json.dumps(k)}:{to_json(v)}" for k, v in salidas.items()) + "}"
+            elif salida in salidas:
+                cuerpo = to_json(salidas[salida])
+            else:
+                raise KeyError(salida)
+            return cuerpo.encode("utf-8")
+
+        return self.cache.get_or_build(llave, _construir)
+
+
+def make_handler(servidor):
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def _send(self, estado, cuerpo):
+            self.send_response(estado)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+
+        def _error(self, estado, mensaje):
+            self._send(estado, json.dumps({"error": mensaje}, ensure_ascii=False).encode("utf-8"))
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            partes = [unquote(p) for p in url.path.strip("/").split("/") if p]
+            params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+            if partes == ["libros"]:
+                return self._send(200, json.dumps(servidor.books(), ensure_ascii=False).encode("utf-8"))
+            if partes == ["cache"]:
+                estado = {"aciertos": servidor.cache.aciertos, "fallos": servidor.cache.fallos}
+                return self._send(200, json.dumps(estado).encode("utf-8"))
+            if len(partes) < 2 or partes[0] != "salidas":
+                return self._error(404, "Rutas: /libros, /cache, /salidas/<libro>[/<salida>]")
+            #El libro puede venir en subcarpetas: el ultimo segmento es la salida si no es un .xlsx
+            libro, salida = partes[1:], None
+            if len(libro) > 1 and not libro[-1].endswith(".xlsx"):
+                salida = libro.pop()
+            libro = "/".join(libro)
+
+            try:
+                capacidad = int(params.get("capacidad", CAPACIDAD_DEFECTO))
+                modelo = params.get("modelo", "0") == "1"
+                top_n = int(params.get("top", TOP_N))
+            except ValueError:
+                return self._error(400, "capacidad y top deben ser enteros")
+
+            try:
+                cuerpo = servidor.respond(libro, salida, capacidad, modelo, top_n)
+            except FileNotFoundError:
+                return self._error(404, f"Libro no encontrado: {libro}")
+            except KeyError as e:
+                return self._error(404, f"Salida no encontrada: {e}")
+            except (ValueError, ImportError) as e:
+                return self._error(422, str(e))
+            except Exception as e:
+                # Cualquier otra falla del solver o del modelo tambien lleva respuesta
+                return self._error(500, f"{type(e).__name__}: {e}")
+            self._send(200, cuerpo)
+
+        def log_message(self, formato, *args):
+            pass
+
+    return Handler
+
+
+def serve(datos, puerto=PUERTO, host="127.0.0.1"):
+    servidor = EngineServer(datos)
+    http = ThreadingHTTPServer((host, puerto), make_handler(servidor))
+    print(f"Sirviendo {servidor.datos} en http://{host}:{puerto}/libros")
+    try:
+        http.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        http.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Salidas del tablero sin interfaz")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    calcular = sub.add_parser("calcular", help="Escribe las salidas de uno o varios libros")
+    calcular.add_argument("libros", nargs="+", help="Libros Viajes.xlsx")
+    calcular.add_argument("--salida", default="resultados")
+    calcular.add_argument("--formato", choices=["parquet", "json"], default="parquet")
+    calcular.add_argument("--procesos", type=int, default=None, help="Procesos en paralelo (por defecto, uno por CPU)")
+    calcular.add_argument(
+        "--capacidad", type=int, default=CAPACIDAD_DEFECTO, help="Viajes por unidad; 0 = automatica, -1 = hoja Asignacion"
+    )
+    calcular.add_argument("--modelo", action="store_true", help="Riesgo con el Random Forest en lugar de la hoja Riesgo")
+    calcular.add_argument("--top", type=int, default=TOP_N)
+
+    servir = sub.add_parser("servir", help="API HTTP local de solo lectura")
+    servir.add_argument("--datos", default=".", help="Carpeta con los libros a servir")
+    servir.add_argument("--puerto", type=int, default=PUERTO)
+    servir.add_argument("--host", default="127.0.0.1")
+
+    args = parser.parse_args(argv)
+    if args.comando == "servir":
+        serve(args.datos, args.puerto, args.host)
+        return 0
+
+    resumen = run_batch(
+        args.libros, args.salida, args.formato, args.procesos,
+        capacidad=args.capacidad, modelo=args.modelo, top_n=args.top,
+    )
+    for r in resumen["resultados"]:
+        print(f"{r['libro']}: {r['viajes']} viajes, {len(r['archivos'])} salidas en {r['carpeta']} ({r['segundos']} s)")
+    for e in resumen["errores"]:
+        print(f"{e['libro']}: {e['error']}", file=sys.stderr)
+    return 1 if resumen["errores"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
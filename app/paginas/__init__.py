@@ -0,0 +1,10 @@
+#Pantallas del tablero: etiqueta del menu -> modulo en paginas/
+
+PAGINAS = {
+    "Carga de Datos": "carga_datos",
+    "Estado Actual de la Flota": "estado_flota",
+    "Riesgo de Viajes Vacíos": "riesgo",
+    "Pronóstico de Viajes Vacíos": "pronostico",
+    "Asignación Óptima": "asignacion",
+    "Impacto Operativo": "impacto",
+}
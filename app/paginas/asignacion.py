@@ -0,0 +1,77 @@
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from motor import top_combinations
+from servicios import (
+    PALETTE, cached_chart, get_context, get_paged_table, get_route_index, show_logo, show_paged_table,
+)
+
+
+def _top_chart(asignacion, palette):
+    top_eff = top_combinations(asignacion, 20)
+
+    fig_top = px.bar(
+        top_eff,
+        x="Prob_vacio", 
+        y="Ruta",
+        orientation="h",
+        color="Tractocamión",
+        title="Top 20 combinaciones más eficientes",
+        color_discrete_sequence=palette,
+        hover_data={"Prob_vacio": ":.3f", "Tractocamión": True},
+    )
+    return fig_top
+
+
+#=====================================================
+#                 ASIGNACIÓN ÓPTIMA
+
+def render():
+    ctx = get_context()
+    # Todo lo de esta pantalla depende solo de la asignacion: se guarda por su contenido
+    asignacion, version = ctx.asignacion, ctx.version_tablas
+
+    show_logo()
+    st.title("Asignación Óptima de Rutas–Unidades")
+
+    st.subheader("Buscador de ruta")
+    ruta_query = st.text_input("Ingresa una ruta (se aceptan coincidencias parciales y sin acentos):")
+
+    if ruta_query:
+        indice = get_route_index(version, "asignacion", asignacion, best_by="Prob_vacio")
+        posiciones, _ = indice.search(ruta_query, k=10)
+        if len(posiciones) == 0:
+            st.warning("No se encontró ninguna ruta que coincida con la búsqueda.")
+        else:
+            #iNDENTIFICAR EL MEJOR TRACTO (de la ruta con mejor coincidencia)
+            mejor_fila = indice.best(posiciones[0])
+            mejor_ruta = mejor_fila["Ruta"]
+            mejor_unidad = mejor_fila["Tractocamión"]
+            mejor_prob = mejor_fila["Prob_vacio"] * 100
+
+            #desplique al usuario 
+            if pd.isna(mejor_unidad):
+                st.warning(f"La ruta **{mejor_ruta}** no tiene unidad disponible con la capacidad actual.")
+            else:
+                st.markdown( 
+                    f"""
+                    #### Resultado para la ruta **{mejor_ruta}**
+                     El tractocamión **asignado** con **menor probabilidad de realizar un viaje en vacío** es  
+                    **{mejor_unidad}**, con una probabilidad estimada de **{mejor_prob:.2f}%**."""
+                )
+            st.write("#### Resultados encontrados:")
+            resultados = indice.rows(posiciones)
+            st.dataframe(resultados, use_container_width=True)
+
+    else:
+        st.caption("Para consultar su unidad recomendada y probabilidad de viaje vacío.")
+
+    st.divider()
+    st.subheader("Tabla completa de asignación ruta-unidad")
+    show_paged_table(get_paged_table(version, "asignacion", asignacion), "tabla_asignacion")
+
+    #COMBINACIONES MÁS EFICIENTES
+
+    fig_top = cached_chart(version, "fig_top_combinaciones", 20, lambda: _top_chart(asignacion, PALETTE))
+    st.plotly_chart(fig_top, use_container_width=True)
@@ -0,0 +1,177 @@
+import streamlit as st
+
+from carga import cleaning_report, compaction_report
+from flujo import HISTORIALES_DIR, history_path
+from servicios import (
+    append_delta, get_history_aggregates, get_paged_table, load_data_from_excel, show_job, show_logo,
+    show_paged_table, start_workbook_load,
+)
+from tareas import LISTO
+
+
+#Totales por unidad del historial leido por lotes (los agregados guardan unidad x mes)
+
+def _unit_totals(unidades):
+    totales = unidades.groupby("Tractocamión", sort=False).agg(
+        Viajes=("viajes", "sum"), **{"Peso Kgs": ("Peso Kgs", "sum")}, Meses=("mes", "nunique")
+    )
+    totales["Peso promedio (kg)"] = totales["Peso Kgs"] / totales["Viajes"]
+    return totales.sort_values("Viajes", ascending=False).reset_index()
+
+
+def _history_summary(agregados, clave):
+    if agregados["filas"] == 0:
+        st.info("El historial no tiene viajes.")
+        return
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Registros procesados", agregados["filas"])
+    col2.metric("Rutas", len(agregados["umbral_ruta"]))
+    col3.metric("Viajes vacíos", f"{agregados['vacios']:,.0f}")
+    st.caption(
+        "Misma definición que el resto del tablero: un viaje es vacío si su peso es menor al percentil 10 "
+        "de su ruta. Aquí el percentil se estima con un histograma logarítmico por ruta (error relativo "
+        "de ~2%), así que los viajes muy cercanos al umbral pueden contarse distinto."
+    )
+
+    st.line_chart(agregados["mensual"], x="Mes", y="viaje_vacio")
+    st.dataframe(
+        agregados["estatus"].groupby("Estatus")["Cantidad"].sum().reset_index(),
+        use_container_width=True,
+    )
+
+    st.markdown("**Viajes y peso por unidad**")
+    show_paged_table(
+        get_paged_table(clave, "historial_unidades", _unit_totals(agregados["unidades"])),
+        "tabla_historial_unidades",
+    )
+
+
+#Que cambio al agregar un lote de viajes
+
+def _append_report(reporte):
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Filas recibidas", f"{reporte.recibidas:,}")
+    col2.metric("Viajes agregados", f"{reporte.agregadas:,}")
+    col3.metric("Repetidos", f"{reporte.duplicadas:,}")
+    col4.metric("Descartados en limpieza", f"{reporte.descartadas:,}")
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Rutas nuevas", reporte.rutas_nuevas)
+    col2.metric("Unidades nuevas", reporte.unidades_nuevas)
+    col3.metric("Etiquetas de vacío que cambiaron", f"{reporte.etiquetas_cambiadas:,}")
+    col4.metric("Tiempo (s)", f"{reporte.segundos:.2f}")
+
+    if reporte.meses:
+        st.caption("Meses actualizados: " + ", ".join(reporte.meses))
+    if len(reporte.rutas):
+        st.markdown("**Rutas actualizadas**")
+        st.dataframe(
+            reporte.rutas,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                c: st.column_config.NumberColumn(format="%.1f")
+                for c in reporte.rutas.columns if c.startswith(("Umbral", "%"))
+            },
+        )
+
+
+#SECCION: cargar datos del usuario
+
+def render():
+    show_logo()
+    st.title("Carga de Base de Datos")
+
+    uploaded_file = st.file_uploader("", type=["xlsx"])
+
+    if uploaded_file is not None:
+        try:
+            # El Excel nuevo se lee en segundo plano; la pagina muestra el avance
+            _, trabajo = start_workbook_load(uploaded_file)
+            if trabajo is not None and trabajo.estado != LISTO:
+                show_job(trabajo)
+                st.stop()
+            viajes, asignacion, riesgo, forecast, version = load_data_from_excel(uploaded_file)
+        except Exception as e:
+            st.error(f"Error al leer el archivo: {e}")
+            st.stop()
+
+        # Las tablas quedan en el almacen compartido; la sesion solo recuerda la version
+        # (solo al subir otro archivo, para no deshacer los viajes agregados despues)
+        if st.session_state.get("archivo_cargado") != uploaded_file.file_id:
+            st.session_state["archivo_cargado"] = uploaded_file.file_id
+            st.session_state["version"] = version
+
+        st.success("Archivo cargado correctamente")
+
+        col1, col2 = st.columns(2)
+        col1.metric("Registros", viajes.shape[0])
+        col2.metric("Variables", viajes.shape[1])
+
+        with st.expander("Vista previa — Viajes"):
+            st.dataframe(viajes.head(20), use_container_width=True)
+
+        # Pasos del notebook de EDA aplicados al cargar
+        limpieza = cleaning_report(version)
+        if limpieza:
+            with st.expander("Limpieza aplicada"):
+                st.dataframe(
+                    [{"Paso": paso, "Filas": filas} for paso, filas in limpieza.items()],
+                    use_container_width=True,
+                    hide_index=True,
+                )
+
+        # Columnas no usadas fuera, texto como categoria y numeros en float32
+        reporte = compaction_report(version)
+        if reporte:
+            with st.expander("Memoria de los datos cargados"):
+                antes = sum(r["MB antes"] for r in reporte)
+                despues = sum(r["MB después"] for r in reporte)
+                st.metric("Memoria en uso (MB)", f"{despues:,.1f}", f"{despues - antes:,.1f} MB", delta_color="inverse")
+                st.dataframe(reporte, use_container_width=True, hide_index=True)
+
+    else:
+        st.info("Carga Viajes.xlsx (esta página solo es funcional para ese archivo)")
+
+    # Lote semanal de viajes: se agrega al libro activo sin volver a calcular todo el historial
+    with st.expander("Agregar viajes nuevos (actualización incremental)"):
+        lote = st.file_uploader("Viajes nuevos", type=["xlsx", "csv", "parquet"], key="lote_viajes")
+        if lote is not None and st.session_state.get("lote_agregado") != lote.file_id:
+            try:
+                st.session_state["reporte_lote"] = append_delta(lote)
+            except Exception as e:
+                st.error(f"Error al agregar los viajes: {e}")
+                st.stop()
+            st.session_state["lote_agregado"] = lote.file_id
+
+        reporte = st.session_state.get("reporte_lote")
+        if reporte is not None:
+            _append_report(reporte)
+
+    # Historiales que no caben en memoria: se leen por lotes y solo se guardan agregados
+    with st.expander("Historial grande (CSV o Parquet, lectura por lotes)"):
+        historial = st.file_uploader("Historial de viajes", type=["csv", "parquet"], key="historial")
+        ruta_servidor = st.text_input(f"o nombre del archivo dentro de {HISTORIALES_DIR} en el servidor")
+
+        fuente = None
+        if historial is not None:
+            fuente, clave = historial, historial.file_id
+        elif ruta_servidor:
+            # Solo archivos dentro de la carpeta de historiales (como los libros del motor)
+            try:
+                fuente = history_path(ruta_servidor)
+            except FileNotFoundError:
+                st.error(f"No existe un historial CSV o Parquet llamado '{ruta_servidor}' en {HISTORIALES_DIR}.")
+                st.stop()
+            clave = f"{fuente}:{fuente.stat().st_mtime_ns}"
+
+        if fuente is not None:
+            try:
+                agregados = get_history_aggregates(clave, fuente)
+            except Exception as e:
+                st.error(f"Error al leer el historial: {e}")
+                st.stop()
+
+            _history_summary(agregados, clave)
+
@@ -0,0 +1,140 @@
+import plotly.express as px
+import plotly.graph_objects as go
+import streamlit as st
+
+from servicios import (
+    BEPENSA_GRAY, BEPENSA_ORANGE, PALETTE, cached_chart, get_context, get_cube, get_unit_index, show_logo,
+)
+
+
+#Graficas de la pantalla (se arman una vez por version y seleccion; ver cached_chart)
+
+def _monthly_chart(cubo, meses_sel, rutas_sel, unidades_sel):
+    serie = cubo.monthly_empty(meses_sel, rutas_sel, unidades_sel)
+    fig_line = px.line(
+        serie,
+        x="Mes",
+        y="viaje_vacio",
+        markers=True,
+        title="Proporción mensual de viajes vacíos (%)",
+        color_discrete_sequence=[BEPENSA_ORANGE],
+        hover_data={"viaje_vacio": ":.2f"},
+    )
+    fig_line.update_layout(xaxis_title="Mes", yaxis_title="Proporción (%)")
+    return fig_line
+
+
+def _status_chart(cubo, meses_sel, rutas_sel, unidades_sel, palette):
+    #(tabla de estatus, figura): la tabla tambien se muestra junto a la grafica
+    estatus = cubo.status_counts(meses_sel, rutas_sel, unidades_sel)
+    fig_est = px.bar(
+        estatus,
+        x="Estatus",
+        y="Cantidad",
+        title="Distribución de estatus",
+        color="Estatus",
+        color_discrete_sequence=palette,
+        hover_data={"Cantidad": True},
+    )
+    fig_est.update_layout(xaxis_title="", yaxis_title="Viajes")
+    return estatus, fig_est
+
+
+def _timeline_chart(indice_unidades, sel_unidad):
+    #(viajes mostrados, viajes de la unidad, figura)
+    df_unit = indice_unidades.timeline(sel_unidad)
+
+    # Una sola traza WebGL con puntos y linea
+    fig_timeline = go.Figure(
+        go.Scattergl(
+            x=df_unit["Fecha Salida"],
+            y=df_unit["Peso Kgs"],
+            mode="lines+markers",
+            marker=dict(color=BEPENSA_ORANGE),
+            line=dict(color=BEPENSA_GRAY),
+            customdata=df_unit["Ruta"],
+            hovertemplate="Fecha Salida=%{x}<br>Peso Kgs=%{y:.0f}<br>Ruta=%{customdata}<extra></extra>",
+        )
+    )
+    fig_timeline.update_layout(
+        title=f"Viajes y carga transportada de la unidad {sel_unidad}",
+        xaxis_title="Fecha del viaje",
+        yaxis_title="Peso transportado (kg)",
+        showlegend=False
+    )
+    return len(df_unit), indice_unidades.count(sel_unidad), fig_timeline
+
+
+#=====================================================
+#      ESTADO ACTUAL DE LA FLOTA
+
+def render():
+    ctx = get_context()
+    viajes, snapshot, version_datos = ctx.viajes, ctx.snapshot, ctx.version_datos
+    palette = PALETTE
+
+    rutas_activas = snapshot.rutas_activas
+    unidades_activas = snapshot.unidades_activas
+    total_viajes = snapshot.total_viajes
+
+    show_logo()
+    st.title("Estado Actual de la Flota")
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Rutas activas", rutas_activas)
+    col2.metric("Unidades activas", unidades_activas)
+    col3.metric("Total de viajes", total_viajes)
+    col4.metric("Viajes vacíos", snapshot.total_vacios)
+
+    st.caption(
+        "Indicadores calculados a partir del histórico de viajes depurado. "
+        "Un viaje es vacío si su peso es menor al percentil 10 de su ruta."
+    )
+    st.divider()
+
+    # Filtros de mes, ruta y unidad (consultas sobre el cubo preagregado)
+    cubo = get_cube(version_datos, viajes, snapshot.viaje_vacio)
+
+    meses_unicos = cubo.etiquetas
+    meses_sel = st.multiselect("Filtrar por mes", meses_unicos, default=meses_unicos)
+    colR, colU = st.columns(2)
+    rutas_sel = colR.multiselect("Filtrar por ruta (vacío = todas)", cubo.rutas)
+    unidades_sel = colU.multiselect("Filtrar por unidad (vacío = todas)", cubo.unidades)
+    filtros = (meses_sel, rutas_sel, unidades_sel)
+
+    # Viajes vacíos mensual (figura cacheada por version y filtros)
+    fig_line = cached_chart(version_datos, "fig_line", filtros, lambda: _monthly_chart(cubo, *filtros))
+    st.plotly_chart(fig_line, use_container_width=True)
+
+    st.divider()
+
+    # Estatus de viaje
+    st.subheader("Estatus de viaje")
+    estatus, fig_est = cached_chart(
+        version_datos, "fig_est", filtros, lambda: _status_chart(cubo, *filtros, palette)
+    )
+
+    colA, colB = st.columns(2)
+    colA.dataframe(estatus, use_container_width=True)
+    colB.plotly_chart(fig_est, use_container_width=True)
+
+    st.divider()
+
+    # Peso transportado por unidad
+    st.subheader("Peso transportado por unidad")
+
+    indice_unidades = get_unit_index(version_datos, viajes, cubo.en_ventana)
+    sel_unidad = st.selectbox("Selecciona una unidad", indice_unidades.unidades)
+
+    mostrados, total_unidad, fig_timeline = cached_chart(
+        version_datos, "fig_timeline", sel_unidad, lambda: _timeline_chart(indice_unidades, sel_unidad)
+    )
+    if mostrados < total_unidad:
+        st.caption(
+            f"Mostrando {mostrados} de {total_unidad} viajes de **{sel_unidad}** "
+            "(submuestreo que conserva la forma de la serie)."
+        )
+    else:
+        st.caption(f"Mostrando todos los viajes realizados por **{sel_unidad}**.")
+
+    st.plotly_chart(fig_timeline, use_container_width=True)
@@ -0,0 +1,169 @@
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import streamlit as st
+
+from simulacion import route_band
+from servicios import (
+    BEPENSA_GRAY, BEPENSA_ORANGE, get_context, get_fleet_scenario, get_route_index, show_job, show_logo,
+    simulation_job,
+)
+from tareas import LISTO
+
+# Opciones de escenarios de la simulacion
+ESCENARIOS = [1_000, 10_000, 50_000]
+
+
+def _bands_chart(bandas):
+    #Abanico de viajes vacios evitados acumulados (P5-P95, P25-P75 y mediana)
+    fig = go.Figure()
+    for bajo, alto, opacidad, nombre in [("P5", "P95", 0.35, "P5–P95"), ("P25", "P75", 0.7, "P25–P75")]:
+        fig.add_trace(go.Scatter(x=bandas["Mes"], y=bandas[alto], mode="lines", line=dict(width=0),
+                                 showlegend=False, hoverinfo="skip"))
+        fig.add_trace(go.Scatter(x=bandas["Mes"], y=bandas[bajo], mode="lines", line=dict(width=0),
+                                 fill="tonexty", fillcolor=BEPENSA_ORANGE, opacity=opacidad, name=nombre))
+    fig.add_trace(go.Scatter(x=bandas["Mes"], y=bandas["P50"], mode="lines+markers",
+                             line=dict(color=BEPENSA_GRAY), name="Mediana"))
+    fig.update_layout(
+        title="Viajes vacíos evitados acumulados",
+        xaxis_title="Mes de operación", yaxis_title="Viajes vacíos evitados",
+    )
+    return fig
+
+
+def _simulation_section(simulacion):
+    mensual = simulacion.monthly().set_index("Asignación")
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Vacíos al mes, actual (P50)", f"{mensual.loc['Actual', 'P50']:,.0f}",
+                help=f"P5–P95: {mensual.loc['Actual', 'P5']:,.0f}–{mensual.loc['Actual', 'P95']:,.0f}")
+    col2.metric("Vacíos al mes, óptima (P50)", f"{mensual.loc['Óptima', 'P50']:,.0f}",
+                help=f"P5–P95: {mensual.loc['Óptima', 'P5']:,.0f}–{mensual.loc['Óptima', 'P95']:,.0f}")
+    col3.metric("Escenarios con menos vacíos", f"{simulacion.prob_mejora:.1%}")
+
+    colA, colB = st.columns(2)
+    colA.plotly_chart(_bands_chart(simulacion.bands()), use_container_width=True)
+    fig_hist = px.bar(
+        simulacion.histogram(),
+        x="Viajes vacíos",
+        y="Proporción",
+        color="Asignación",
+        barmode="overlay",
+        opacity=0.7,
+        title="Viajes vacíos por mes en los escenarios",
+        color_discrete_map={"Actual": BEPENSA_GRAY, "Óptima": BEPENSA_ORANGE},
+    )
+    fig_hist.update_layout(bargap=0)
+    colB.plotly_chart(fig_hist, use_container_width=True)
+    st.caption(
+        f"{simulacion.escenarios:,} escenarios de {simulacion.actual.shape[1]} meses; cada ruta hace sus viajes promedio por mes y "
+        "cada viaje sale vacío con la probabilidad de su par ruta–unidad (mezcla histórica de unidades "
+        "en la asignación actual, unidad asignada en la óptima)."
+    )
+    with st.expander("Percentiles por mes"):
+        st.dataframe(mensual, use_container_width=True)
+
+
+#=====================================================
+#                 IMPACTO OPERATIVO
+
+def render():
+    ctx = get_context()
+    comparacion, version = ctx.comparacion, ctx.version
+
+    show_logo()
+    st.title("Impacto Operativo de la Asignación Óptima")
+
+    st.markdown(f"""
+    El modelo de **asignación óptima de rutas y unidades** es elemental para que la
+    proporción de viajes en vacío disminuya de forma sostenible.  
+
+    - Reduce el riesgo promedio de viaje vacío al reasignar unidades hacia las rutas
+      donde su desempeño histórico es mejor.  
+    - Permite priorizar rutas con mayor potencial de mejora.  
+    - Ofrece una base objetiva para la planeación táctica de la flota.
+
+    En esta sección puedes consultar **cómo cambia el riesgo de viaje vacío**
+    para cualquier ruta al aplicar el modelo de asignación óptima.          
+
+    """)
+
+    # Rangos de viajes vacios por mes con cada asignacion (Monte Carlo)
+    st.subheader("Rango esperado de viajes vacíos")
+    escenario, version_escenario = get_fleet_scenario(version, ctx.viajes, ctx.riesgo, ctx.asignacion)
+    escenarios = st.select_slider("Escenarios simulados", ESCENARIOS, value=10_000)
+    # Solo se simula a peticion; al volver a la pagina se reutiliza el trabajo ya lanzado
+    trabajo = simulation_job(version_escenario, escenarios, escenario, iniciar=False)
+    if trabajo is None and st.button("Simular escenarios"):
+        trabajo = simulation_job(version_escenario, escenarios, escenario)
+    if trabajo is None:
+        st.caption(f"Pulsa «Simular escenarios» para calcular {escenarios:,} escenarios.")
+    elif trabajo.estado == LISTO:
+        _simulation_section(trabajo.resultado)
+    else:
+        # Mientras corre se muestran los escenarios ya simulados
+        show_job(trabajo, parcial=_simulation_section)
+
+    st.divider()
+    ruta_query = st.text_input("Ingresa una ruta para evaluar su mejora operativa:")
+
+    if ruta_query: 
+        # La comparacion solo depende de Riesgo y Asignacion
+        indice = get_route_index(ctx.version_tablas, "comparacion", comparacion)
+        posiciones, _ = indice.search(ruta_query, k=10)
+
+        if len(posiciones) == 0: 
+            st.warning("No se encontró ninguna ruta que coincida con la búsqueda.")
+            st.stop()
+
+        #Tomar la mejor coincidencia
+        resultados = indice.rows(posiciones)
+        fila = resultados.iloc[0]
+        ruta = fila["Ruta"]
+        riesgo_actual = fila["Prob_vacio_Actual"] * 100
+        riesgo_optimo = fila["Prob_vacio_Optimo"] * 100
+        mejora = fila["Mejora"]
+
+        #Interpretar
+        st.markdown(
+        f"""
+        ### Resultado para la ruta **{ruta}**
+        - **Riesgo actual:** {riesgo_actual:.2f}%  
+        - **Riesgo óptimo recomendado:** {riesgo_optimo:.2f}%  
+        - **Mejora esperada:** **{mejora:.2f} puntos porcentuales**  
+
+        Esto indica que, al asignar la unidad óptima sugerida por el modelo,  
+        la probabilidad de realizar un viaje vacío **disminuye significativamente**.
+        """
+    )
+        #Comparar
+        df_plot = pd.DataFrame({
+        "Categoria": ["Riesgo Actual", "Riesgo Óptimo"],
+        "Valor": [riesgo_actual, riesgo_optimo]
+    })
+        fig_comp = px.bar(
+            df_plot,
+            x="Valor",
+            y="Categoria",
+            orientation="h",
+            title="Comparación de riesgo actual vs óptimo",
+            color="Categoria",
+            color_discrete_sequence=[BEPENSA_ORANGE, BEPENSA_GRAY],
+            text=[f"{riesgo_actual:.2f}%", f"{riesgo_optimo:.2f}%"]
+    )
+        fig_comp.update_traces(textposition="outside")
+        fig_comp.update_layout(xaxis_title="Probabilidad (%)")
+
+        st.plotly_chart(fig_comp, use_container_width=True)
+
+        #rango de vacios al mes de la ruta (binomial exacto)
+        if ruta in escenario.rutas:
+            st.subheader("Viajes vacíos al mes en la ruta")
+            st.dataframe(route_band(escenario, ruta), use_container_width=True, hide_index=True)
+
+        #tabla
+        st.subheader("Detalles de la ruta")
+        st.dataframe(resultados, use_container_width=True)
+
+    else:
+        st.info("Ingresa una ruta para visualizar su impacto operativo.")
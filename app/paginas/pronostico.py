@@ -0,0 +1,131 @@
+import plotly.express as px
+import streamlit as st
+
+from pronosticos import MIN_VIAJES
+from servicios import (
+    BEPENSA_GRAY, BEPENSA_ORANGE, cached_chart, forecasts_job, get_context, get_paged_table, show_job, show_logo,
+    show_paged_table,
+)
+from tareas import LISTO
+
+
+#=====================================================
+#                  FORECAST 6 MESES
+
+DIMENSIONES = {"Ruta": "Ruta", "Unidad": "Tractocamión"}
+
+
+def _forecast_chart(serie, titulo):
+    fig = px.line(
+        serie,
+        x="Mes",
+        y="proporcion",
+        color="Tipo",
+        markers=True,
+        title=titulo,
+        color_discrete_map={"Histórico": BEPENSA_GRAY, "Pronóstico": BEPENSA_ORANGE},
+        hover_data={"proporcion": ":.3f"},
+    )
+    fig.update_layout(xaxis_title="Mes", yaxis_title="Proporción de viajes vacíos")
+    return fig
+
+
+def _notebook_chart(forecast):
+    figF = px.line(
+        forecast,
+        x="Fecha",
+        y="pronostico",
+        markers=True,
+        color_discrete_sequence=[BEPENSA_ORANGE],
+        hover_data={"pronostico": ":.3f"},
+    )
+    figF.update_layout(xaxis_title="Fecha", yaxis_title="Proporción estimada de viajes vacíos")
+    return figF
+
+
+def render():
+    ctx = get_context()
+    forecast = ctx.forecast
+
+    show_logo()
+    st.title("Pronóstico de Viajes Vacíos")
+
+    # Pronosticos calculados en la app a partir de la serie mensual (una vez por version de datos)
+    trabajo = forecasts_job(ctx.version_datos, ctx.viajes, ctx.snapshot.viaje_vacio)
+    if trabajo.estado != LISTO:
+        # El global sale primero; por ruta y por unidad cuando termine el trabajo
+        show_job(trabajo, parcial=lambda parcial: st.plotly_chart(
+            _forecast_chart(parcial["Global"].series("Global"), "Forecast de 6 meses de proporción de viajes vacíos"),
+            use_container_width=True,
+        ))
+        return
+    pronosticos = trabajo.resultado
+    global_ = pronosticos["Global"]
+    serie = global_.series("Global")
+
+    st.plotly_chart(
+        cached_chart(
+            ctx.version_datos, "fig_forecast", "Global",
+            lambda: _forecast_chart(serie, "Forecast de 6 meses de proporción de viajes vacíos"),
+        ),
+        use_container_width=True,
+    )
+    st.caption(
+        f"Suavizamiento exponencial con tendencia amortiguada "
+        f"(alpha={global_.alpha[0]:.1f}, beta={global_.beta[0]:.1f}) sobre la proporción mensual."
+    )
+
+    st.divider()
+    st.subheader("Tabla interactiva del pronóstico")
+
+    futuro = (
+        serie[serie["Tipo"] == "Pronóstico"]
+        .drop(columns="Tipo")
+        .rename(columns={"Mes": "Fecha", "proporcion": "pronostico"})
+        .reset_index(drop=True)
+    )
+    rango = st.slider(
+        "Selecciona rango de fechas",
+        min_value=futuro["Fecha"].min().date(),
+        max_value=futuro["Fecha"].max().date(),
+        value=(futuro["Fecha"].min().date(), futuro["Fecha"].max().date()),
+    )
+
+    df_filt = futuro[
+        (futuro["Fecha"].dt.date >= rango[0]) &
+        (futuro["Fecha"].dt.date <= rango[1])
+    ].copy()
+
+    st.dataframe(df_filt, use_container_width=True)
+
+    st.divider()
+    st.subheader("Pronóstico por ruta y por unidad")
+
+    dimension = st.radio("Pronosticar por", list(DIMENSIONES), horizontal=True)
+    conjunto = pronosticos[DIMENSIONES[dimension]]
+    tabla = conjunto.table()
+
+    if tabla.empty:
+        st.info("No hay series con suficientes viajes para pronosticar.")
+    else:
+        st.caption(
+            f"{len(tabla)} series con al menos {MIN_VIAJES} viajes, ordenadas por proporción esperada."
+        )
+        show_paged_table(
+            get_paged_table(ctx.version_datos, f"pronostico_{dimension}", tabla), f"tabla_pronostico_{dimension}"
+        )
+
+        sel = st.selectbox(f"Selecciona una {dimension.lower()}", tabla["Serie"])
+        st.plotly_chart(
+            cached_chart(
+                ctx.version_datos, "fig_forecast", (dimension, sel),
+                lambda: _forecast_chart(conjunto.series(sel), f"Histórico y pronóstico de {sel}"),
+            ),
+            use_container_width=True,
+        )
+
+    # Pronostico diario que venia del notebook (hoja Forecast del libro)
+    if forecast is not None and len(forecast):
+        with st.expander("Pronóstico diario del notebook (hoja Forecast)"):
+            figF = cached_chart(ctx.version_datos, "fig_forecast_hoja", None, lambda: _notebook_chart(forecast))
+            st.plotly_chart(figF, use_container_width=True)
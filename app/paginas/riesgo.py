@@ -0,0 +1,204 @@
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from servicios import (
+    BEPENSA_GRAY, BEPENSA_ORANGE, PALETTE, cached_chart, explanations_job, get_context, get_risk_matrix, show_job,
+    show_logo,
+)
+from tareas import LISTO
+
+
+#Contribuciones con signo: naranja sube el riesgo, gris lo baja
+
+def _contributions_chart(tabla, titulo, unidad):
+    tabla = tabla.assign(Efecto=np.where(tabla["Contribución"] > 0, "Sube el riesgo", "Baja el riesgo"))
+    fig = px.bar(
+        tabla.iloc[::-1],
+        x="Contribución",
+        y="Variable",
+        orientation="h",
+        color="Efecto",
+        title=titulo,
+        color_discrete_map={"Sube el riesgo": BEPENSA_ORANGE, "Baja el riesgo": BEPENSA_GRAY},
+        hover_data=[c for c in ["Valor"] if c in tabla.columns],
+    )
+    fig.update_layout(xaxis_title=f"Contribución ({unidad})", yaxis_title="Variable")
+    return fig
+
+
+def _donut_chart(ruta_sel, unidad_sel, prob):
+    donut_data = pd.DataFrame({
+        "Estado": ["Vacío", "Con carga"],
+        "Probabilidad": [prob, 1 - prob]
+    })
+
+    fig_donut = px.pie(
+        donut_data,
+        names="Estado",
+        values="Probabilidad",
+        hole=0.4,
+        title=f"Riesgo para {ruta_sel} con tractocamión {unidad_sel}",
+        color_discrete_sequence=[BEPENSA_ORANGE, BEPENSA_GRAY],
+    )
+    fig_donut.update_traces(textinfo="percent+label", hovertemplate="%{label}: %{percent}")
+    return fig_donut
+
+
+def _ranking_chart(matriz, top_n, ascending, palette):
+    #Top N rutas mas riesgosas (ascending=False) o mas eficientes (ascending=True)
+    fig = px.bar(
+        matriz.top(top_n, ascending=ascending),
+        x="Prob_vacio",
+        y="Ruta",
+        orientation="h",
+        title=f"Top {top_n} rutas más {'eficientes' if ascending else 'riesgosas'}",
+        color="Ruta",
+        color_discrete_sequence=palette,
+        hover_data={"Prob_vacio": ":.2f"},
+    )
+    fig.update_layout(
+        yaxis=dict(categoryorder="total descending" if ascending else "total ascending"),
+        xaxis_title="Probabilidad de viaje vacío",
+        yaxis_title="Ruta"
+    )
+    return fig
+
+
+#=====================================================
+#              PREDICCIÓN DE VIAJES VACÍOS
+
+def render():
+    ctx = get_context()
+    riesgo = ctx.riesgo
+    palette = PALETTE
+
+    show_logo()
+    st.title("Riesgo de Viaje Vacío")
+
+    if not {"Ruta", "Tractocamión", "Prob_vacio"}.issubset(riesgo.columns):
+        st.error("La hoja 'Riesgo' debe contener: Ruta, Tractocamión, Prob_vacio.")
+    else:
+        # Matriz ruta x unidad y rankings compilados una vez por contenido de Riesgo y Asignacion
+        matriz = get_risk_matrix(ctx.version_tablas, riesgo, ctx.asignacion)
+
+        col1, col2 = st.columns(2)
+
+        ruta_sel = col1.selectbox(
+            "Selecciona una Ruta",
+            matriz.rutas
+        )
+
+        unidad_sel = col2.selectbox(
+            "Selecciona la Unidad",
+            matriz.route_units(ruta_sel)
+        )
+
+        prob = matriz.prob(ruta_sel, unidad_sel)
+
+        st.subheader("Probabilidad estimada de viaje vacío")
+
+        if np.isnan(prob):
+            st.warning("No hay datos para esta combinación.")
+        else:
+            fig_donut = cached_chart(
+                ctx.version_tablas, "fig_donut", (ruta_sel, unidad_sel), lambda: _donut_chart(ruta_sel, unidad_sel, prob)
+            )
+            st.plotly_chart(fig_donut, use_container_width=True)
+
+            unidad_opt, prob_opt = matriz.assigned(ruta_sel)
+            if unidad_opt is not None:
+                st.caption(f"Unidad asignada en la asignación óptima: **{unidad_opt}** ({prob_opt:.1%}).")
+
+        st.divider()
+        st.subheader("Rutas con mayor probabilidad de viaje vacío")
+
+        top_n = st.slider("Top N rutas", min_value=3, max_value=20, value=10)
+
+        fig_top = cached_chart(ctx.version_tablas, "fig_top", top_n, lambda: _ranking_chart(matriz, top_n, False, palette))
+        st.plotly_chart(fig_top, use_container_width=True)
+
+        st.divider()
+        st.subheader("Rutas con menor probabilidad de viaje vacío")
+
+        fig_low = cached_chart(ctx.version_tablas, "fig_low", top_n, lambda: _ranking_chart(matriz, top_n, True, palette))
+        st.plotly_chart(fig_low, use_container_width=True)
+
+        st.caption("""
+        **Resumen:**
+        - El gráfico de dona muestra el riesgo puntual por combinación ruta–unidad.
+        - Las barras horizontales permiten priorizar rutas críticas.
+        - Las rutas eficientes sirven como benchmark operacional.
+        """)
+
+        #=====================================================
+        #        FACTORES DE RIESGO (CONTRIBUCIONES DEL MODELO)
+
+        st.divider()
+        st.subheader("Factores que más influyen en el riesgo de viaje vacío")
+
+        # Modelo elegido en la barra lateral o, con la hoja Riesgo, el Random Forest del notebook
+        nombre = ctx.modelo or "Random Forest"
+        hoja = ctx.modelo is None
+        if hoja:
+            st.info(
+                "El riesgo de arriba viene de la hoja Riesgo del libro. Aquí se explica el Random Forest "
+                "del notebook, cuya probabilidad puede ser distinta; activa «Calcular riesgo con el modelo» "
+                "para que ambas secciones usen el mismo modelo."
+            )
+        trabajo = explanations_job(ctx.version_datos, nombre, hoja, ctx.viajes, riesgo)
+        if trabajo.estado != LISTO:
+            show_job(trabajo)
+            return
+        explicacion = trabajo.resultado
+
+        importances = explicacion.global_importance().sort_values("Importancia", ascending=True)
+
+        #grafica
+        fig = px.bar(
+        importances,
+        x="Importancia",
+        y="Variable",
+        orientation="h",
+        title=f"Variables más influyentes ({nombre})",
+        color="Importancia",
+        color_continuous_scale=["#2e3242", "#1f222c"])
+
+        fig.update_layout(
+            xaxis_title=f"Contribución absoluta promedio ({explicacion.unidad})",
+            yaxis_title="Variable",
+            plot_bgcolor="rgba(0,0,0,0)",
+            paper_bgcolor="rgba(0,0,0,0)",
+            font=dict(color="white"),
+            title_font=dict(size=20),)
+
+        fig.update_xaxes(showgrid=False)
+        fig.update_yaxes(showgrid=False)
+
+        st.plotly_chart(fig, use_container_width=True)
+
+        # Por que el par seleccionado arriba es riesgoso
+        st.markdown(f"**¿Por qué {ruta_sel} con {unidad_sel}?**")
+        desglose = explicacion.pair(ruta_sel, unidad_sel)
+        if desglose is None:
+            st.caption("El modelo no evaluó esta combinación.")
+        else:
+            st.plotly_chart(
+                _contributions_chart(desglose, "Contribución de cada variable", explicacion.unidad),
+                use_container_width=True,
+            )
+            st.caption(
+                f"Valor base del {nombre} {explicacion.base:.3f} + contribuciones = "
+                f"{explicacion.prediction(ruta_sel, unidad_sel):.3f} ({explicacion.unidad})"
+                + (f"; la dona muestra la hoja Riesgo ({prob:.3f}). " if hoja and not np.isnan(prob) else ". ")
+                + "Las barras naranjas suben el riesgo y las grises lo bajan."
+            )
+
+        nivel = st.radio("Contribución promedio por", ["Ruta seleccionada", "Unidad seleccionada"], horizontal=True)
+        if nivel == "Ruta seleccionada":
+            promedio, titulo = explicacion.route(ruta_sel), f"Ruta {ruta_sel} (todas sus unidades)"
+        else:
+            promedio, titulo = explicacion.unit(unidad_sel), f"Unidad {unidad_sel} (todas sus rutas)"
+        if promedio is not None:
+            st.plotly_chart(_contributions_chart(promedio, titulo, explicacion.unidad), use_container_width=True)
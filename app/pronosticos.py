@@ -0,0 +1,233 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from flujo import month_key, month_label
+
+
+#Pronostico mensual de la proporcion de viajes vacios (global, por ruta y por unidad)
+#
+#Suavizamiento exponencial de Holt con tendencia amortiguada, ajustado a la vez para todas
+#las series de una matriz (series x meses); alpha y beta se eligen por serie en una rejilla.
+
+HORIZONTE = 6
+AMORTIGUAMIENTO = 0.9
+# La primera combinacion es la que se usa cuando una serie no tiene datos para ajustar
+ALPHAS = np.array([0.3, 0.1, 0.2, 0.4, 0.5, 0.6, 0.8])
+BETAS = np.array([0.0, 0.1, 0.3])
+# Viajes minimos de una serie para aparecer en los rankings
+MIN_VIAJES = 20
+# Viajes "ficticios" con la proporcion global que se suman a cada mes antes de ajustar;
+# evita que series con pocos viajes por mes se vayan a 0 o a 1
+PSEUDO_VIAJES = 10
+
+
+@dataclass(frozen=True)
+class ForecastSet:
+    nombres: np.ndarray
+    meses: np.ndarray
+    historia: np.ndarray
+    viajes: np.ndarray
+    meses_futuros: np.ndarray
+    pronostico: np.ndarray
+    alpha: np.ndarray
+    beta: np.ndarray
+    rmse: np.ndarray
+
+    def __len__(self):
+        return len(self.nombres)
+
+    def position(self, nombre):
+        pos = np.flatnonzero(self.nombres == nombre)
+        if len(pos) == 0:
+            raise KeyError(nombre)
+        return int(pos[0])
+
+    def series(self, nombre):
+        #Historico y pronostico de una serie en formato largo para graficar
+        i = self.position(nombre)
+        return pd.DataFrame({
+            "Mes": pd.to_datetime(month_label(np.concatenate([self.meses, self.meses_futuros]))),
+            "proporcion": np.concatenate([self.historia[i], self.pronostico[i]]),
+            "Tipo": ["Histórico"] * len(self.meses) + ["Pronóstico"] * len(self.meses_futuros),
+        })
+
+    def table(self, min_viajes=MIN_VIAJES):
+        #Una fila por serie, de mayor a menor proporcion esperada
+        total = self.viajes.sum(axis=1)
+        tabla = pd.DataFrame({
+            "Serie": self.nombres,
+            "Viajes": total,
+            "Último mes": _last_valid(self.historia),
+            "Pronóstico promedio": self.pronostico.mean(axis=1),
+            "Pronóstico último mes": self.pronostico[:, -1],
+            "RMSE ajuste": self.rmse,
+        })
+        tabla = tabla[tabla["Viajes"] >= min_viajes]
+        return tabla.sort_values("Pronóstico promedio", ascending=False, kind="stable").reset_index(drop=True)
+
+
+def monthly_matrix(codigos, n_series, mes, vacio):
+    #Viajes y vacios por (serie, mes) con bincount; meses continuos del primero al ultimo
+    validos = (codigos >= 0) & (mes >= 0)
+    codigos, mes, vacio = codigos[validos], mes[validos], vacio[validos]
+    if len(mes) == 0:
+        return np.array([], dtype=np.int64), np.zeros((n_series, 0)), np.zeros((n_series, 0))
+
+    meses = np.arange(mes.min(), mes.max() + 1)
+    celda = codigos * len(meses) + (mes - meses[0])
+    n = n_series * len(meses)
+    viajes = np.bincount(celda, minlength=n).reshape(n_series, len(meses))
+    vacios = np.bincount(celda, weights=vacio, minlength=n).reshape(n_series, len(meses))
+    return meses, viajes, vacios
+
+
+@dataclass(frozen=True)
+class MonthlyCounts:
+    #Viajes y vacios por (serie, mes) de una dimension; se extiende con viajes nuevos sin recorrer el historial
+    columna: str
+    nombres: np.ndarray
+    meses: np.ndarray
+    viajes: np.ndarray
+    vacios: np.ndarray
+
+    def append(self, viajes, viaje_vacio, cambiados=None, cambio=()):
+        #Conteos con los viajes nuevos; cambiados/cambio: viajes anteriores cuya etiqueta cambio (+1/-1)
+        nuevo = monthly_counts(viajes, viaje_vacio, self.columna)
+        partes = [self, nuevo]
+        if len(cambio):
+            partes.append(monthly_counts(cambiados, np.asarray(cambio, dtype=float), self.columna, contar=False))
+        #Nombres ordenados y meses continuos de todas las partes (una serie sin meses validos queda en ceros)
+        nombres = np.asarray(sorted(set().union(*(c.nombres.tolist() for c in partes))), dtype=object)
+        partes = [c for c in partes if len(c.meses)]
+        if partes:
+            meses = np.arange(min(c.meses[0] for c in partes), max(c.meses[-1] for c in partes) + 1)
+        else:
+            meses = np.array([], dtype=np.int64)
+        conteo_viajes = np.zeros((len(nombres), len(meses)), dtype=np.int64)
+        conteo_vacios = np.zeros((len(nombres), len(meses)))
+        for c in partes:
+            filas = np.searchsorted(nombres, c.nombres)[:, None]
+            cols = (c.meses - meses[0])[None, :]
+            conteo_viajes[filas, cols] += c.viajes
+            conteo_vacios[filas, cols] += c.vacios
+        return MonthlyCounts(self.columna, nombres, meses, conteo_viajes, conteo_vacios)
+
+
+def monthly_counts(viajes, viaje_vacio, columna, contar=True):
+    #columna None = una sola serie "Global"; contar=False suma solo vacios (cambios de etiqueta)
+    mes = month_key(viajes["Fecha Salida"])
+    if columna is None:
+        codigos, nombres = np.zeros(len(viajes), dtype=np.int64), np.asarray(["Global"], dtype=object)
+    else:
+        codigos, nombres = pd.factorize(viajes[columna], sort=True)
+        nombres = np.asarray(nombres, dtype=object)
+    meses, conteo_viajes, conteo_vacios = monthly_matrix(codigos, len(nombres), mes, np.asarray(viaje_vacio, dtype=float))
+    if not contar:
+        conteo_viajes = np.zeros_like(conteo_viajes)
+    return MonthlyCounts(columna, nombres, meses, conteo_viajes, conteo_vacios)
+
+
+def fit_forecast(y, pesos=None, horizonte=HORIZONTE, phi=AMORTIGUAMIENTO):
+    #Holt amortiguado sobre todas las filas de `y` (NaN = mes sin viajes) y toda la rejilla de parametros
+    y = np.asarray(y, dtype=float)
+    n, t_total = y.shape
+    pesos = np.ones_like(y) if pesos is None else np.asarray(pesos, dtype=float)
+
+    alpha = np.repeat(ALPHAS, len(BETAS))[:, None]
+    beta = np.tile(BETAS, len(ALPHAS))[:, None] * alpha
+
+    observado = ~np.isnan(y)
+    primero = np.where(observado.any(axis=1), observado.argmax(axis=1), t_total)
+    inicial = y[np.arange(n), np.minimum(primero, t_total - 1)] if t_total else np.full(n, np.nan)
+
+    nivel = np.broadcast_to(inicial, (len(alpha), n)).copy()
+    tendencia = np.zeros_like(nivel)
+    sse = np.zeros_like(nivel)
+    for t in range(t_total):
+        previsto = nivel + phi * tendencia
+        activo = observado[:, t] & (t > primero)
+        error = np.where(activo, y[:, t] - previsto, 0.0)
+        sse += pesos[:, t] * error ** 2
+        en_curso = t > primero
+        nivel = np.where(en_curso, previsto + alpha * error, nivel)
+        tendencia = np.where(en_curso, phi * tendencia + beta * error, tendencia)
+
+    #Mejor combinacion por serie (en empate gana la primera, la de respaldo)
+    mejor = sse.argmin(axis=0)
+    cols = np.arange(n)
+    nivel, tendencia = nivel[mejor, cols], tendencia[mejor, cols]
+
+    pasos = np.cumsum(phi ** np.arange(1, horizonte + 1))
+    pronostico = np.clip(nivel[:, None] + tendencia[:, None] * pasos, 0.0, 1.0)
+
+    peso_total = np.where(observado, pesos, 0.0).sum(axis=1)
+    rmse = np.sqrt(sse[mejor, cols] / np.maximum(peso_total, 1e-12))
+    return pronostico, alpha[mejor, 0], (beta[mejor, 0] / alpha[mejor, 0]), rmse
+
+
+def forecast_by(codigos, nombres, mes, vacio, horizonte=HORIZONTE):
+    meses, viajes, vacios = monthly_matrix(codigos, len(nombres), mes, vacio)
+    return _forecast_counts(nombres, meses, viajes, vacios, horizonte)
+
+
+def _forecast_counts(nombres, meses, viajes, vacios, horizonte=HORIZONTE):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        historia = np.where(viajes > 0, vacios / viajes, np.nan)
+        base = vacios.sum() / viajes.sum()
+        ajustada = np.where(viajes > 0, (vacios + PSEUDO_VIAJES * base) / (viajes + PSEUDO_VIAJES), np.nan)
+    pronostico, alpha, beta, rmse = fit_forecast(ajustada, viajes, horizonte)
+
+    ultimo = meses[-1] if len(meses) else -1
+    return ForecastSet(
+        nombres=np.asarray(nombres),
+        meses=meses,
+        historia=historia,
+        viajes=viajes,
+        meses_futuros=ultimo + np.arange(1, horizonte + 1),
+        pronostico=pronostico,
+        alpha=alpha,
+        beta=beta,
+        rmse=rmse,
+    )
+
+
+def series_counts(viajes, viaje_vacio, por=("Ruta", "Tractocamión")):
+    #Conteos por mes de la serie global y de cada dimension (lo que guarda la historia incremental)
+    return {"Global": monthly_counts(viajes, viaje_vacio, None), **{c: monthly_counts(viajes, viaje_vacio, c) for c in por}}
+
+
+def build_forecasts(viajes, viaje_vacio, por=("Ruta", "Tractocamión"), horizonte=HORIZONTE, avance=None, conteos=None):
+    #{"Global": ..., <columna>: ...}; cada conjunto es un solo ajuste vectorizado
+    #avance(fraccion, mensaje, parcial) recibe los conjuntos ya calculados
+    #conteos: conteos por mes ya agregados (historia incremental); sin ellos se agregan los viajes
+    if conteos is not None:
+        resultado = {}
+        for i, (nombre, c) in enumerate(conteos.items()):
+            if avance is not None and resultado:
+                avance(i / len(conteos), f"Pronóstico por {nombre}", dict(resultado))
+            resultado[nombre] = _forecast_counts(c.nombres, c.meses, c.viajes, c.vacios, horizonte)
+        return resultado
+
+    mes = month_key(viajes["Fecha Salida"])
+    vacio = np.asarray(viaje_vacio, dtype=float)
+
+    resultado = {
+        "Global": forecast_by(np.zeros(len(viajes), dtype=np.int64), ["Global"], mes, vacio, horizonte)
+    }
+    for i, columna in enumerate(por):
+        if avance is not None:
+            avance((i + 1) / (len(por) + 1), f"Pronóstico por {columna}", dict(resultado))
+        codigos, nombres = pd.factorize(viajes[columna], sort=True)
+        resultado[columna] = forecast_by(codigos, np.asarray(nombres), mes, vacio, horizonte)
+    return resultado
+
+
+def _last_valid(historia):
+    observado = ~np.isnan(historia)
+    if historia.shape[1] == 0:
+        return np.full(len(historia), np.nan)
+    ultimo = historia.shape[1] - 1 - observado[:, ::-1].argmax(axis=1)
+    valores = historia[np.arange(len(historia)), ultimo]
+    return np.where(observado.any(axis=1), valores, np.nan)
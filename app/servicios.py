@@ -0,0 +1,554 @@
+import base64
+import io
+from dataclasses import dataclass
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from almacen import STORE
+from carga import HOJAS, frame_version, hash_bytes, read_bytes, read_cached, read_workbook, workbook_version, write_cached
+from figuras import FIGURAS
+from indicadores import build_snapshot
+from metricas import REGISTRO, medir
+from tareas import CANCELADO, ERROR, LISTO, TAREAS
+
+
+#Servicios compartidos por las paginas (datos y calculos cacheados)
+
+# Paleta corporativa
+BEPENSA_ORANGE = "#fd5e2e"
+BEPENSA_GRAY = "#2e3242"
+BEPENSA_LIGHT = "#dde2f3"
+PALETTE = [BEPENSA_ORANGE, BEPENSA_GRAY, BEPENSA_LIGHT, "#9fa4b8"]
+
+
+#logo
+
+def show_logo():
+    
+    logo_path = Path("logo.png")
+
+    if not logo_path.exists():
+        st.warning("logo.png no encontrado.")
+        return
+
+    with open(logo_path, "rb") as f:
+        data = base64.b64encode(f.read()).decode()
+
+    st.markdown(
+        f"""
+        <div style='text-align:center; margin-top:20px; margin-bottom:10px;'>
+            <img src="data:image/webp;base64,{data}" width="260">
+        </div>
+        """,
+        unsafe_allow_html=True,
+    )
+
+
+#Trabajos pesados en segundo plano (compartidos por todas las sesiones)
+
+# Segundos entre consultas del estado de un trabajo
+INTERVALO_SONDEO = 0.5
+# Trabajos que esta sesion cancelo (pueden seguir corriendo para otras sesiones)
+DEJADOS = "trabajos_dejados"
+
+
+def _session_id():
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else None
+
+
+def _left(trabajo):
+    return trabajo.id in st.session_state.get(DEJADOS, ())
+
+
+def background(clave, fn, *args, descripcion=""):
+    # Uno que fallo o se cancelo (o que esta sesion dejo) no se repite en cada rerun: solo con Reintentar
+    trabajo = TAREAS.get(clave)
+    if trabajo is not None and (trabajo.estado in (ERROR, CANCELADO) or (_left(trabajo) and not trabajo.done)):
+        return trabajo
+    return TAREAS.submit(clave, fn, *args, descripcion=descripcion, sesion=_session_id())
+
+
+def show_job(trabajo, parcial=None):
+    #Avance del trabajo (y su resultado parcial con `parcial`); al terminar se vuelve a ejecutar la pagina
+    if trabajo.estado in (ERROR, CANCELADO) or (_left(trabajo) and not trabajo.done):
+        if trabajo.estado == ERROR:
+            st.error(f"{trabajo.descripcion}: {trabajo.error}")
+        else:
+            st.info(f"{trabajo.descripcion}: cancelado.")
+        if st.button("Reintentar", key=f"reintentar_{trabajo.id}"):
+            st.session_state.get(DEJADOS, set()).discard(trabajo.id)
+            TAREAS.retry(trabajo.clave, sesion=_session_id())
+            st.rerun()
+        return
+
+    @st.fragment(run_every=INTERVALO_SONDEO)
+    def _sondeo():
+        if trabajo.done:
+            st.rerun()
+        st.progress(trabajo.progreso, text=f"{trabajo.descripcion}: {trabajo.mensaje or trabajo.estado}")
+        if st.button("Cancelar", key=f"cancelar_{trabajo.id}"):
+            # Solo se detiene si ninguna otra sesion lo espera
+            st.session_state.setdefault(DEJADOS, set()).add(trabajo.id)
+            TAREAS.cancel(trabajo.clave, sesion=_session_id())
+            st.rerun()
+        if parcial is not None and trabajo.parcial is not None:
+            parcial(trabajo.parcial)
+
+    _sondeo()
+
+
+#Cargar el archivo del usuario 
+
+def load_data_from_excel(file_obj):
+    # Un solo ejemplar por contenido en todo el proceso; cada sesion recibe copias ligeras de solo lectura
+    version = workbook_version(file_obj)
+
+    def _leer():
+        with st.spinner("Leyendo libro de Excel..."):
+            return read_workbook(file_obj, version)[0]
+
+    dataset = STORE.get_or_load(version, _leer)
+    return (*dataset.frames, version)
+
+
+def _read_workbook(trabajo, data, version):
+    STORE.get_or_load(version, lambda: read_workbook(io.BytesIO(data), version, avance=trabajo.update)[0])
+    return version
+
+
+def start_workbook_load(file_obj):
+    #(version, trabajo); sin trabajo si el libro ya esta en memoria o en el cache en disco
+    version = workbook_version(file_obj)
+    if version in STORE:
+        return version, None
+    hojas = read_cached(version)
+    if hojas is not None:
+        STORE.put(version, hojas)
+        return version, None
+    # Solo el Excel sin cache se lee en segundo plano
+    data = read_bytes(file_obj)
+    return version, background(f"libro:{version}", _read_workbook, data, version, descripcion="Lectura del libro")
+
+
+def _save_version(trabajo, version, hojas):
+    write_cached(version, hojas)
+    return version
+
+
+def append_delta(file_obj):
+    #Agrega los viajes del lote al libro activo; la sesion pasa a la version nueva
+    from incremental import append_trips, read_delta
+
+    version = load_data()[4]
+    with st.spinner("Agregando viajes nuevos..."), medir("agregar_viajes") as med:
+        delta, version_delta = read_delta(file_obj)
+        dataset, reporte = append_trips(STORE.get(version), delta, version_delta)
+        med.filas = len(delta)
+    if dataset.version != version:
+        # La version nueva solo vive en el almacen: se guarda en disco para releerla si sale de el
+        hojas = dict(zip(HOJAS, dataset.frames))
+        background(f"guardar:{dataset.version}", _save_version, dataset.version, hojas, descripcion="Guardar versión")
+    st.session_state["version"] = dataset.version
+    return reporte
+
+
+def load_data():
+    with medir("carga_datos") as med:
+        datos = _load_data()
+        med.filas = len(datos[0])
+    return datos
+
+
+def _load_data():
+    # La sesion solo guarda la version del libro que subio; las tablas viven en el almacen
+    version = st.session_state.get("version")
+    if version is not None:
+        dataset = STORE.get(version)
+        if dataset is None:
+            hojas = read_cached(version)
+            if hojas is not None:
+                dataset = STORE.put(version, hojas)
+        if dataset is not None:
+            return (*dataset.frames, version, "usuario")
+
+        st.warning("El archivo cargado ya no está en memoria; vuelve a cargarlo. Se muestran los datos locales.")
+        del st.session_state["version"]
+
+    # Primera lectura del libro local: avance en pantalla sin bloquear la sesion
+    _, trabajo = start_workbook_load("Viajes.xlsx")
+    if trabajo is not None and trabajo.estado != LISTO:
+        show_job(trabajo)
+        st.stop()
+    viajes, asignacion, riesgo, forecast, version = load_data_from_excel("Viajes.xlsx")
+    return viajes, asignacion, riesgo, forecast, version, "local"
+
+
+@st.cache_resource(max_entries=4)
+def get_snapshot(version, _viajes, _asignacion, _riesgo):
+    from incremental import get_history
+
+    return build_snapshot(version, _viajes, _asignacion, _riesgo, historia=get_history(version))
+
+
+@st.cache_resource(max_entries=8)
+def get_route_index(version, tabla, _df, best_by=None):
+    from busqueda import RouteIndex
+
+    # Un indice por tabla (asignacion / comparacion) y version de datos
+    return RouteIndex(_df, best_by=best_by)
+
+
+@st.cache_resource
+def get_model(nombre):
+    from modelos import load_model, risk_models
+
+    return load_model(risk_models()[nombre])
+
+
+def _score_model(trabajo, nombre, viajes):
+    from modelos import load_model, risk_models, score_grid
+
+    # Se evaluan los pares ruta-unidad observados, igual que la hoja Riesgo del notebook
+    pares = viajes[["Ruta", "Tractocamión"]].drop_duplicates()
+    return score_grid(load_model(risk_models()[nombre]), viajes, pares=pares, avance=trabajo.update)
+
+
+def model_risk_job(version, nombre, viajes):
+    return background(f"riesgo:{version}:{nombre}", _score_model, nombre, viajes, descripcion=f"Riesgo con {nombre}")
+
+
+@st.cache_resource
+def get_explainer(nombre):
+    from explicaciones import TreePathExplainer
+
+    # Aportes por nodo del bosque: se calculan una vez por modelo
+    return TreePathExplainer(get_model(nombre))
+
+
+def _explain(trabajo, nombre, hoja, viajes, riesgo):
+    from explicaciones import explain_pairs
+    from modelos import NativeModel
+
+    # Pares observados y, si el riesgo viene de la hoja Riesgo (`hoja`), tambien los de la hoja
+    modelo = get_model(nombre)
+    explainer = None if isinstance(modelo, NativeModel) else get_explainer(nombre)
+    trabajo.update(mensaje="contribuciones por par")
+    pares = viajes[["Ruta", "Tractocamión"]]
+    if hoja:
+        pares = pd.concat([pares.astype(object), riesgo[["Ruta", "Tractocamión"]].astype(object)])
+    pares = pares.drop_duplicates()
+    return explain_pairs(modelo, viajes, pares=pares, nombre=nombre, explainer=explainer)
+
+
+def explanations_job(version, nombre, hoja, viajes, riesgo):
+    # Una vez por version de datos y modelo
+    return background(
+        f"explicaciones:{version}:{nombre}:{hoja}", _explain, nombre, hoja, viajes, riesgo,
+        descripcion=f"Explicaciones de {nombre}",
+    )
+
+
+@st.cache_resource(max_entries=4)
+def get_risk_matrix(version, _riesgo, _asignacion):
+    from matriz import RiskMatrix
+
+    # Riesgo y asignacion compilados a codigos enteros para consultas sin filtrar la tabla
+    return RiskMatrix(_riesgo, _asignacion)
+
+
+@st.cache_resource(max_entries=16)
+def get_tables_version(version, _riesgo, _asignacion):
+    # Contenido de Riesgo y Asignacion: las versiones con viajes agregados comparten las mismas hojas,
+    # asi la matriz, los indices y las figuras que solo dependen de ellas no se vuelven a construir
+    return frame_version(_riesgo, _asignacion)
+
+
+@st.cache_resource(max_entries=4)
+def get_route_demand(version, _viajes):
+    # Demanda de cada ruta (sus viajes en el historial) y el hash de su contenido
+    demanda = _viajes["Ruta"].value_counts()
+    return demanda, frame_version(demanda.reset_index())
+
+
+def _solve_assignment(trabajo, riesgo, demanda, capacidad, metodo):
+    from asignador import solve_assignment
+
+    trabajo.update(mensaje=f"método {metodo}")
+    with medir("asignacion_capacidad", filas=len(riesgo)):
+        return solve_assignment(riesgo, capacidad=capacidad or None, demanda=demanda, metodo=metodo)
+
+
+def assignment_job(clave, capacidad, metodo, riesgo, demanda):
+    # clave: contenido de Riesgo, demanda, capacidad y metodo (no la version de los viajes)
+    return background(
+        f"asignacion:{clave}", _solve_assignment, riesgo, demanda, capacidad, metodo,
+        descripcion="Asignación con capacidad",
+    )
+
+
+@st.cache_data(max_entries=2, show_spinner="Procesando historial por lotes...")
+def get_history_aggregates(clave, _fuente):
+    from flujo import ingest
+
+    return ingest(_fuente).result()
+
+
+@st.cache_resource(max_entries=4)
+def get_cube(version, _viajes, _viaje_vacio):
+    from cubo import build_cube
+    from incremental import get_history
+
+    # Las versiones con viajes agregados ya traen su cubo actualizado
+    historia = get_history(version)
+    return historia.cubo if historia is not None else build_cube(_viajes, _viaje_vacio)
+
+
+def _build_forecasts(trabajo, viajes, viaje_vacio, conteos):
+    from pronosticos import build_forecasts
+
+    return build_forecasts(viajes, viaje_vacio, avance=trabajo.update, conteos=conteos)
+
+
+def forecasts_job(version, viajes, viaje_vacio):
+    from incremental import get_history
+
+    # Global, por ruta y por unidad en un solo ajuste por version de datos; las versiones con viajes
+    # agregados ya traen sus conteos mensuales y solo se ajustan las series
+    historia = get_history(version)
+    conteos = historia.conteos if historia is not None else None
+    return background(
+        f"pronosticos:{version}", _build_forecasts, viajes, viaje_vacio, conteos, descripcion="Pronósticos"
+    )
+
+
+@st.cache_resource(max_entries=4)
+def get_fleet_scenario(version, _viajes, _riesgo, _asignacion):
+    from simulacion import build_scenario
+
+    # (escenario, hash de su contenido): la simulacion se guarda por contenido, no por version
+    escenario = build_scenario(_viajes, _riesgo, _asignacion)
+    contenido = "\n".join(map(str, escenario.rutas)).encode() + b"".join(
+        a.tobytes() for a in (escenario.viajes_mes, escenario.prob_actual, escenario.prob_optima)
+    )
+    return escenario, hash_bytes(contenido)
+
+
+def _simulate(trabajo, escenario, escenarios):
+    from simulacion import simulate
+
+    return simulate(escenario, escenarios, avance=trabajo.update)
+
+
+def simulation_job(version_escenario, escenarios, escenario, iniciar=True):
+    # Semilla fija: el mismo escenario y numero de escenarios dan las mismas bandas.
+    # Con iniciar=False solo se consulta un trabajo ya lanzado (None si no hay)
+    clave = f"simulacion:{version_escenario}:{escenarios}"
+    if not iniciar:
+        return TAREAS.get(clave)
+    return background(clave, _simulate, escenario, escenarios, descripcion="Simulación Monte Carlo")
+
+
+@st.cache_resource(max_entries=8)
+def get_paged_table(version, tabla, _df):
+    from tablas import PagedTable
+
+    # Ordenes y codigos de filtro calculados una vez por tabla y version de datos
+    return PagedTable(_df)
+
+
+@st.cache_resource(max_entries=4)
+def get_unit_index(version, _viajes, _mask):
+    from incremental import get_history
+    from unidades import UnitIndex
+
+    historia = get_history(version)
+    return historia.unidades if historia is not None else UnitIndex(_viajes, _mask)
+
+
+#Tabla paginada: solo la pagina visible viaja al navegador
+
+def show_paged_table(tabla, key):
+    from tablas import TAMANOS_PAGINA, n_pages
+
+    ninguna = "(ninguna)"
+    col1, col2, col3, col4 = st.columns([2, 3, 2, 1])
+    filtro = col1.selectbox("Filtrar por", [ninguna] + tabla.columnas, key=f"{key}_filtro")
+    texto = rango = None
+    if filtro != ninguna:
+        if tabla.is_numeric(filtro):
+            minimo, maximo = tabla.range(filtro)
+            if minimo < maximo:
+                rango = col2.slider("Rango", minimo, maximo, (minimo, maximo), key=f"{key}_rango_{filtro}")
+        else:
+            texto = col2.text_input("Contiene", key=f"{key}_texto")
+    orden = col3.selectbox("Ordenar por", [ninguna] + tabla.columnas, key=f"{key}_orden")
+    ascendente = col4.toggle("Asc.", value=True, key=f"{key}_asc")
+
+    posiciones = tabla.query(
+        None if filtro == ninguna else filtro, texto, rango,
+        None if orden == ninguna else orden, ascendente,
+    )
+
+    col5, col6, col7 = st.columns([1, 1, 3])
+    tamano = col5.selectbox("Filas por página", TAMANOS_PAGINA, key=f"{key}_tamano")
+    paginas = n_pages(len(posiciones), tamano)
+    # Si el filtro deja menos paginas, se regresa a la ultima disponible
+    if st.session_state.get(f"{key}_pagina", 1) > paginas:
+        st.session_state[f"{key}_pagina"] = paginas
+    pagina = col6.number_input("Página", min_value=1, max_value=paginas, value=1, step=1, key=f"{key}_pagina")
+
+    inicio = (pagina - 1) * tamano
+    fin = min(inicio + tamano, len(posiciones))
+    col7.caption(
+        f"Filas {inicio + 1 if len(posiciones) else 0}–{fin} de {len(posiciones):,} "
+        f"({len(tabla):,} en total)"
+    )
+    st.dataframe(tabla.page(posiciones, pagina - 1, tamano), use_container_width=True, hide_index=True)
+
+
+#Figuras y datos de graficas por (version, grafica, parametros de los widgets)
+
+def cached_chart(version, grafica, parametros, construir):
+    #construir() agrupa los datos y arma la figura solo la primera vez que se pide la combinacion
+    return FIGURAS.get_or_build(version, grafica, parametros, construir)
+
+
+#Panel de rendimiento (tiempos por etapa de todas las sesiones del proceso)
+
+def show_perf_panel():
+    if not st.sidebar.toggle("Panel de rendimiento", value=False, key="panel_rendimiento"):
+        return
+
+    trabajos = TAREAS.summary()
+    if trabajos:
+        with st.sidebar.expander("Trabajos en segundo plano"):
+            st.dataframe(trabajos, hide_index=True)
+
+    graficas = FIGURAS.summary()
+    if graficas:
+        with st.sidebar.expander("Cache de figuras"):
+            st.caption(f"{len(FIGURAS)} figuras en cache, {FIGURAS.bytes / 1024 ** 2:.1f} MB estimados.")
+            st.dataframe(graficas, hide_index=True)
+
+    with st.sidebar.expander("Rendimiento por etapa", expanded=True):
+        resumen = REGISTRO.summary()
+        if not resumen:
+            st.caption("Sin mediciones todavía.")
+            return
+        st.dataframe(
+            resumen,
+            hide_index=True,
+            column_config={
+                "p50_ms": st.column_config.NumberColumn(format="%.1f"),
+                "p95_ms": st.column_config.NumberColumn(format="%.1f"),
+                "max_ms": st.column_config.NumberColumn(format="%.1f"),
+                "kb_enviados": st.column_config.NumberColumn(format="%.1f"),
+                "memoria_proceso_mb": st.column_config.NumberColumn(
+                    format="%.1f", help="Pico de tracemalloc de todo el proceso (incluye otras sesiones)"
+                ),
+            },
+        )
+        st.download_button(
+            "Exportar métricas (JSON)", REGISTRO.export(), file_name="metricas_tablero.json",
+            mime="application/json",
+        )
+        if st.button("Reiniciar mediciones"):
+            REGISTRO.clear()
+
+
+#Datos que comparten las pantallas de analisis
+
+@dataclass
+class Contexto:
+    viajes: object
+    asignacion: object
+    riesgo: object
+    forecast: object
+    version: str
+    version_datos: str
+    origen: str
+    snapshot: object
+    # Modelo con el que se calculo el riesgo (None = hoja Riesgo del libro)
+    modelo: str = None
+    # Contenido de Riesgo y Asignacion (y de la capacidad): llave de lo que solo depende de ellas
+    version_tablas: str = None
+
+    @property
+    def comparacion(self):
+        return self.snapshot.comparacion
+
+    @property
+    def mejora_global(self):
+        return self.snapshot.mejora_global
+
+
+def get_context():
+    viajes, asignacion, riesgo, forecast, version, origen = load_data()
+    version_datos = version
+    modelo = None
+
+    # Riesgo en vivo con el modelo entrenado en lugar de la hoja Riesgo
+    if st.sidebar.toggle("Calcular riesgo con el modelo", value=False):
+        from modelos import risk_models
+
+        # Random Forest del notebook o el ultimo modelo de entrenamiento.py
+        nombre = st.sidebar.selectbox("Modelo", list(risk_models()), key="modelo_riesgo")
+        trabajo = model_risk_job(version, nombre, viajes)
+        if trabajo.estado == LISTO:
+            riesgo = trabajo.resultado
+            version = f"{version}:rf" if nombre == "Random Forest" else f"{version}:{nombre}"
+            modelo = nombre
+        else:
+            # Mientras tanto las pantallas usan la hoja Riesgo
+            with st.sidebar:
+                show_job(trabajo)
+                if not trabajo.done:
+                    st.caption("Se muestra la hoja Riesgo mientras se calcula.")
+
+    version_tablas = get_tables_version(version, riesgo, asignacion)
+
+    # Asignacion factible: cada ruta pide sus viajes del historial y cada unidad cubre como maximo `capacidad`
+    from asignador import CAPACIDAD_DEFECTO, METODOS
+
+    if st.sidebar.toggle("Asignación con capacidad por unidad", value=CAPACIDAD_DEFECTO >= 0):
+        capacidad = st.sidebar.number_input(
+            "Viajes máximos por unidad (0 = automático)", min_value=0, value=max(CAPACIDAD_DEFECTO, 0), step=1
+        )
+        metodo = st.sidebar.radio(
+            "Método", METODOS, horizontal=True, key="metodo_asignacion",
+            help="Exacto: menor riesgo total posible. Voraz: pares de menor riesgo primero, más rápido.",
+        )
+        demanda, version_demanda = get_route_demand(version_datos, viajes)
+        clave = hash_bytes(f"{version_tablas}:{version_demanda}:{capacidad}:{metodo}".encode())
+        trabajo = assignment_job(clave, capacidad, metodo, riesgo, demanda)
+        if trabajo.estado == LISTO:
+            asignacion = trabajo.resultado
+            version = f"{version}:cap{capacidad}" if metodo == "exacto" else f"{version}:cap{capacidad}:{metodo}"
+            version_tablas = clave
+        else:
+            # Mientras tanto las pantallas usan la hoja Asignacion
+            with st.sidebar:
+                show_job(trabajo)
+                if not trabajo.done:
+                    st.caption("Se muestra la hoja Asignacion mientras se resuelve.")
+
+    # Variables globales (precalculadas una vez por version de datos)
+    with medir("kpis_globales", filas=len(viajes)):
+        snapshot = get_snapshot(version, viajes, asignacion, riesgo)
+
+    return Contexto(
+        viajes=viajes,
+        asignacion=asignacion,
+        riesgo=riesgo,
+        forecast=forecast,
+        version=version,
+        version_datos=version_datos,
+        origen=origen,
+        snapshot=snapshot,
+        modelo=modelo,
+        version_tablas=version_tablas,
+    )
@@ -0,0 +1,258 @@
+import atexit
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from asignador import route_probability
+from flujo import month_key
+from pronosticos import HORIZONTE
+
+
+#Simulacion Monte Carlo de viajes vacios mensuales con la asignacion actual y la optima
+#
+#Cada ruta hace sus viajes promedio por mes; con la asignacion actual cada viaje toma la
+#probabilidad del par ruta-unidad segun la mezcla historica de unidades de la ruta, y con la
+#optima la de la unidad asignada. Los viajes con probabilidad parecida en ambas asignaciones
+#(mismo par de niveles de 1/RESOLUCION) se suman en un grupo con sus probabilidades promedio,
+#asi el costo por escenario no crece con el numero de rutas y el valor esperado no cambia.
+#Las dos asignaciones usan numeros aleatorios comunes: cada viaje tiene un solo uniforme y es
+#vacio en cada asignacion si queda bajo su probabilidad, de modo que el ahorro solo refleja la
+#diferencia entre ellas (una asignacion comparada consigo misma ahorra 0). Los escenarios se
+#simulan en lotes que se entregan en orden (resultados parciales por lote). En el tablero los
+#lotes corren en el hilo del trabajo; con `procesos` > 1 (scripts) se reparten en un pool de
+#procesos iniciados con spawn, que no copia los hilos ni los candados del servidor.
+
+ESCENARIOS = 10_000
+PERCENTILES = [5, 25, 50, 75, 95]
+# Niveles de probabilidad con que se agrupan los viajes (ancho de cada nivel: 1/RESOLUCION)
+RESOLUCION = 200
+# Barras del histograma de vacios por mes
+BINS = 60
+# Escenarios por lote (un lote = una tarea del pool)
+LOTE = 2_000
+
+_pool = None
+_procesos = 0
+
+
+@dataclass(frozen=True)
+class FleetScenario:
+    rutas: np.ndarray
+    viajes_mes: np.ndarray
+    prob_actual: np.ndarray
+    prob_optima: np.ndarray
+
+    def route(self, ruta):
+        i = np.flatnonzero(self.rutas == ruta)
+        if len(i) == 0:
+            raise KeyError(ruta)
+        i = int(i[0])
+        return self.viajes_mes[i], self.prob_actual[i], self.prob_optima[i]
+
+
+def build_scenario(viajes, riesgo, asignacion):
+    #Viajes por mes y probabilidad actual/optima de cada ruta
+    mes = month_key(viajes["Fecha Salida"])
+    n_meses = int(mes.max() - mes[mes >= 0].min() + 1) if (mes >= 0).any() else 1
+
+    conteo = (
+        viajes.groupby(["Ruta", "Tractocamión"], observed=True, sort=False).size()
+        .rename("viajes").reset_index()
+    )
+    pares = riesgo.groupby(["Ruta", "Tractocamión"], observed=True)["Prob_vacio"].mean().rename("Prob_par")
+    media_ruta = riesgo.groupby("Ruta", observed=True)["Prob_vacio"].mean()
+    conteo = conteo.join(pares, on=["Ruta", "Tractocamión"])
+    # Pares sin probabilidad toman el promedio de su ruta
+    conteo["Prob_par"] = conteo["Prob_par"].fillna(conteo["Ruta"].map(media_ruta).astype(float))
+    conteo = conteo.dropna(subset=["Prob_par"])
+
+    rutas_idx, rutas = pd.factorize(conteo["Ruta"], sort=True)
+    total = np.bincount(rutas_idx, weights=conteo["viajes"].to_numpy(dtype=float), minlength=len(rutas))
+    ponderada = np.bincount(
+        rutas_idx, weights=(conteo["viajes"] * conteo["Prob_par"]).to_numpy(dtype=float), minlength=len(rutas)
+    )
+    prob_actual = ponderada / total
+
+    # Rutas sin unidad asignada conservan su probabilidad actual
+    optima = route_probability(asignacion)
+    prob_optima = pd.Index(optima.index).get_indexer(rutas)
+    prob_optima = np.where(prob_optima >= 0, optima.to_numpy(dtype=float)[np.maximum(prob_optima, 0)], np.nan)
+    prob_optima = np.where(np.isnan(prob_optima), prob_actual, prob_optima)
+
+    return FleetScenario(
+        rutas=np.asarray(rutas, dtype=object),
+        viajes_mes=total / n_meses,
+        prob_actual=prob_actual,
+        prob_optima=prob_optima,
+    )
+
+
+def probability_groups(viajes_mes, prob_actual, prob_optima, resolucion=RESOLUCION):
+    #Viajes por par de niveles (actual, optima) con las probabilidades promedio ponderadas por viajes
+    validos = (viajes_mes > 0) & ~np.isnan(prob_actual) & ~np.isnan(prob_optima)
+    viajes_mes = viajes_mes[validos]
+    prob_actual, prob_optima = np.clip(prob_actual[validos], 0, 1), np.clip(prob_optima[validos], 0, 1)
+    nivel_actual = np.rint(prob_actual * resolucion).astype(np.int64)
+    nivel = nivel_actual * (resolucion + 1) + np.rint(prob_optima * resolucion).astype(np.int64)
+    grupos, nivel = np.unique(nivel, return_inverse=True)
+    viajes = np.bincount(nivel, weights=viajes_mes, minlength=len(grupos))
+    esperados_actual = np.bincount(nivel, weights=viajes_mes * prob_actual, minlength=len(grupos))
+    esperados_optima = np.bincount(nivel, weights=viajes_mes * prob_optima, minlength=len(grupos))
+    n = np.rint(viajes).astype(np.int64)
+    con_viajes = n > 0
+    viajes = viajes[con_viajes]
+    return n[con_viajes], esperados_actual[con_viajes] / viajes, esperados_optima[con_viajes] / viajes
+
+
+def _simulate_batch(n, p_actual, p_optima, escenarios, horizonte, semilla):
+    #Vacios de la flota por (escenario, mes) con cada asignacion y los mismos uniformes por viaje:
+    #de los n viajes de un grupo, los vacios con la probabilidad menor son Binomial(n, p_menor) y los
+    #que ademas son vacios con la mayor, Binomial(resto, (p_mayor - p_menor) / (1 - p_menor))
+    rng = np.random.default_rng(semilla)
+    p_menor, p_mayor = np.minimum(p_actual, p_optima), np.maximum(p_actual, p_optima)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        p_extra = np.where(p_menor < 1, (p_mayor - p_menor) / (1 - p_menor), 0.0)
+    actual_menor = p_actual <= p_optima
+    actual = np.empty((escenarios, horizonte), dtype=np.int64)
+    optima = np.empty((escenarios, horizonte), dtype=np.int64)
+    for t in range(horizonte):
+        menor = rng.binomial(n, p_menor, size=(escenarios, len(n)))
+        mayor = menor + rng.binomial(n - menor, p_extra)
+        actual[:, t] = np.where(actual_menor, menor, mayor).sum(axis=1)
+        optima[:, t] = np.where(actual_menor, mayor, menor).sum(axis=1)
+    return actual, optima
+
+
+def _shutdown_pool():
+    global _pool, _procesos
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+    _pool, _procesos = None, 0
+
+
+def _get_pool(procesos):
+    global _pool, _procesos
+    if _pool is None or _procesos != procesos:
+        _shutdown_pool()
+        _pool = ProcessPoolExecutor(max_workers=procesos, mp_context=multiprocessing.get_context("spawn"))
+        _procesos = procesos
+    return _pool
+
+
+atexit.register(_shutdown_pool)
+
+
+def iter_draws(n, p_actual, p_optima, escenarios=ESCENARIOS, horizonte=HORIZONTE, semilla=0, procesos=1):
+    #Lotes (actual, optima) en orden con semillas derivadas de `semilla`: el resultado no depende del
+    #numero de procesos
+    tamanos = [min(LOTE, escenarios - i) for i in range(0, escenarios, LOTE)]
+    semillas = np.random.SeedSequence(semilla).spawn(len(tamanos))
+    procesos = min(procesos or 1, len(tamanos))
+    if procesos <= 1:
+        for k, s in zip(tamanos, semillas):
+            yield _simulate_batch(n, p_actual, p_optima, k, horizonte, s)
+        return
+    pool = _get_pool(procesos)
+    futuros = [pool.submit(_simulate_batch, n, p_actual, p_optima, k, horizonte, s) for k, s in zip(tamanos, semillas)]
+    try:
+        for futuro in futuros:
+            yield futuro.result()
+    finally:
+        # Si se deja de iterar (cancelacion) los lotes que no empezaron se descartan
+        for futuro in futuros:
+            futuro.cancel()
+
+
+def run_draws(n, p_actual, p_optima, escenarios=ESCENARIOS, horizonte=HORIZONTE, semilla=0, procesos=1):
+    lotes = list(iter_draws(n, p_actual, p_optima, escenarios, horizonte, semilla, procesos))
+    if not lotes:
+        vacio = np.empty((0, horizonte), dtype=np.int64)
+        return vacio, vacio
+    return np.concatenate([a for a, _ in lotes]), np.concatenate([o for _, o in lotes])
+
+
+@dataclass(frozen=True)
+class SimulationResult:
+    actual: np.ndarray
+    optima: np.ndarray
+    esperado_actual: float
+    esperado_optima: float
+
+    @property
+    def escenarios(self):
+        return len(self.actual)
+
+    @property
+    def ahorro(self):
+        return self.actual - self.optima
+
+    @property
+    def prob_mejora(self):
+        #Proporcion de escenarios en los que la asignacion optima acumula menos vacios
+        return float((self.ahorro.sum(axis=1) > 0).mean())
+
+    def monthly(self):
+        #Percentiles de vacios en un mes con cada asignacion
+        filas = []
+        for nombre, datos in [("Actual", self.actual), ("Óptima", self.optima), ("Ahorro", self.ahorro)]:
+            valores = np.percentile(datos.ravel(), PERCENTILES)
+            filas.append({"Asignación": nombre, **{f"P{q}": v for q, v in zip(PERCENTILES, valores)}})
+        return pd.DataFrame(filas)
+
+    def bands(self):
+        #Bandas de vacios evitados acumulados mes a mes
+        acumulado = np.cumsum(self.ahorro, axis=1)
+        valores = np.percentile(acumulado, PERCENTILES, axis=0)
+        bandas = pd.DataFrame({f"P{q}": v for q, v in zip(PERCENTILES, valores)})
+        bandas.insert(0, "Mes", np.arange(1, acumulado.shape[1] + 1))
+        return bandas
+
+    def histogram(self, bins=BINS):
+        #Frecuencia de vacios por mes con bordes comunes (solo los conteos viajan al navegador)
+        bordes = np.histogram_bin_edges(np.concatenate([self.actual.ravel(), self.optima.ravel()]), bins)
+        centro = (bordes[:-1] + bordes[1:]) / 2
+        partes = []
+        for nombre, datos in [("Actual", self.actual), ("Óptima", self.optima)]:
+            conteo, _ = np.histogram(datos.ravel(), bordes)
+            partes.append(pd.DataFrame({
+                "Asignación": nombre, "Viajes vacíos": centro, "Proporción": conteo / datos.size,
+            }))
+        return pd.concat(partes, ignore_index=True)
+
+
+def simulate(escenario, escenarios=ESCENARIOS, horizonte=HORIZONTE, semilla=0, procesos=1, avance=None):
+    #avance(fraccion, mensaje, parcial): resultado con los escenarios simulados hasta cada lote
+    n, p_act, p_opt = probability_groups(escenario.viajes_mes, escenario.prob_actual, escenario.prob_optima)
+    esperados = {"esperado_actual": float(n @ p_act), "esperado_optima": float(n @ p_opt)}
+
+    actual, optima = [], []
+    for lote_actual, lote_optima in iter_draws(n, p_act, p_opt, escenarios, horizonte, semilla, procesos):
+        actual.append(lote_actual)
+        optima.append(lote_optima)
+        if avance is not None and sum(len(a) for a in actual) < escenarios:
+            parcial = SimulationResult(actual=np.concatenate(actual), optima=np.concatenate(optima), **esperados)
+            avance(parcial.escenarios / escenarios, f"{parcial.escenarios:,} de {escenarios:,} escenarios", parcial)
+
+    vacio = np.empty((0, horizonte), dtype=np.int64)
+    return SimulationResult(
+        actual=np.concatenate(actual) if actual else vacio,
+        optima=np.concatenate(optima) if optima else vacio,
+        **esperados,
+    )
+
+
+def route_band(escenario, ruta, percentiles=PERCENTILES):
+    #Percentiles exactos de vacios al mes de una ruta (binomial), actual y optima
+    from scipy.stats import binom
+
+    viajes_mes, p_act, p_opt = escenario.route(ruta)
+    n = int(round(viajes_mes))
+    q = np.asarray(percentiles) / 100
+    return pd.DataFrame({
+        "Asignación": ["Actual", "Óptima"],
+        "Viajes al mes": [round(float(viajes_mes), 1)] * 2,
+        **{f"P{k}": [binom.ppf(v, n, p_act), binom.ppf(v, n, p_opt)] for k, v in zip(percentiles, q)},
+    })
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+
+from busqueda import normalize
+
+
+#Tablas grandes paginadas del lado del servidor: filtro, orden y solo la pagina visible
+#
+#Los codigos de texto normalizado y los ordenes por columna se calculan una vez por tabla;
+#cada consulta es una mascara sobre codigos enteros y un recorte del orden ya calculado.
+
+TAMANOS_PAGINA = [25, 50, 100, 250]
+
+
+class PagedTable:
+
+    def __init__(self, df):
+        self.df = df.reset_index(drop=True)
+        self.columnas = list(self.df.columns)
+        self._codigos = {}
+        self._ordenes = {}
+
+    def __len__(self):
+        return len(self.df)
+
+    def is_numeric(self, columna):
+        return pd.api.types.is_numeric_dtype(self.df[columna])
+
+    def _text_codes(self, columna):
+        #Codigos por fila y valores unicos normalizados (sin acentos ni mayusculas)
+        if columna not in self._codigos:
+            codigos, unicos = pd.factorize(self.df[columna])
+            normalizados = np.array([normalize(v) for v in unicos], dtype=str)
+            self._codigos[columna] = (codigos, normalizados)
+        return self._codigos[columna]
+
+    def _order(self, columna, ascendente):
+        #Orden estable de toda la tabla; los faltantes quedan al final en ambos sentidos
+        llave = (columna, ascendente)
+        if llave not in self._ordenes:
+            valores = self.df[columna]
+            if self.is_numeric(columna):
+                codigos = valores.to_numpy(dtype=float)
+                faltante = np.isnan(codigos)
+            else:
+                codigos, _ = pd.factorize(valores, sort=True)
+                faltante = codigos < 0
+            if not ascendente:
+                codigos = -codigos
+            orden = np.lexsort((codigos, faltante))
+            self._ordenes[llave] = orden
+        return self._ordenes[llave]
+
+    def range(self, columna):
+        valores = self.df[columna].to_numpy(dtype=float)
+        if len(valores) == 0 or np.isnan(valores).all():
+            return 0.0, 0.0
+        return float(np.nanmin(valores)), float(np.nanmax(valores))
+
+    def mask(self, columna=None, texto=None, rango=None):
+        #Filtro de texto (subcadena sin acentos) o de rango numerico sobre una columna
+        if columna is None:
+            return None
+        if rango is not None:
+            valores = self.df[columna].to_numpy(dtype=float)
+            return (valores >= rango[0]) & (valores <= rango[1])
+        consulta = normalize(texto or "")
+        if not consulta:
+            return None
+        codigos, normalizados = self._text_codes(columna)
+        coinciden = np.append(np.char.find(normalizados, consulta) >= 0, False)
+        return coinciden[codigos]
+
+    def query(self, columna=None, texto=None, rango=None, orden=None, ascendente=True):
+        #Posiciones de las filas que pasan el filtro, en el orden pedido
+        filtro = self.mask(columna, texto, rango)
+        if orden is None:
+            return np.arange(len(self.df)) if filtro is None else np.flatnonzero(filtro)
+        posiciones = self._order(orden, ascendente)
+        return posiciones if filtro is None else posiciones[filtro[posiciones]]
+
+    def page(self, posiciones, pagina, tamano):
+        inicio = pagina * tamano
+        return self.df.iloc[posiciones[inicio:inicio + tamano]]
+
+
+def n_pages(n_filas, tamano):
+    return max(1, -(-n_filas // tamano))
@@ -0,0 +1,193 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+#Trabajos pesados en segundo plano compartidos por todas las sesiones del proceso
+#
+#Cada trabajo tiene una llave (que calcula y con que datos) y un id. Si otra sesion pide la
+#misma llave mientras corre o despues de terminar, recibe el mismo trabajo: el calculo se hace
+#una sola vez. La funcion del trabajo recibe el trabajo como primer argumento y llama a
+#`update` para reportar avance y resultados parciales; ahi mismo se detiene si se cancelo.
+#Cada sesion que pide un trabajo queda suscrita; cancelar desde una sesion solo la quita de
+#los suscriptores y el trabajo se detiene cuando ya no queda ninguna.
+
+PENDIENTE = "pendiente"
+EJECUTANDO = "ejecutando"
+LISTO = "listo"
+ERROR = "error"
+CANCELADO = "cancelado"
+
+# Trabajos que corren a la vez (el resto espera en la cola)
+MAX_TRABAJADORES = 2
+# Trabajos terminados que se conservan con su resultado (los menos usados salen primero)
+MAX_TERMINADOS = 16
+
+
+class Cancelled(Exception):
+    pass
+
+
+class Job:
+
+    def __init__(self, clave, descripcion=""):
+        self.id = uuid.uuid4().hex[:12]
+        self.clave = clave
+        self.descripcion = descripcion
+        self.estado = PENDIENTE
+        self.progreso = 0.0
+        self.mensaje = ""
+        self.parcial = None
+        self.resultado = None
+        self.error = None
+        self.creado = time.time()
+        self.inicio = None
+        self.fin = None
+        self._cancelar = threading.Event()
+        self._futuro = None
+        # Sesiones que esperan el resultado
+        self._sesiones = set()
+        # Funcion y argumentos para repetirlo si falla o se cancela
+        self._tarea = None
+
+    @property
+    def done(self):
+        return self.estado in (LISTO, ERROR, CANCELADO)
+
+    @property
+    def suscriptores(self):
+        return len(self._sesiones)
+
+    @property
+    def segundos(self):
+        if self.inicio is None:
+            return 0.0
+        return (self.fin or time.time()) - self.inicio
+
+    def update(self, progreso=None, mensaje=None, parcial=None):
+        #Lo llama la funcion del trabajo; lanza Cancelled si se pidio cancelar
+        if self._cancelar.is_set():
+            raise Cancelled(self.clave)
+        if progreso is not None:
+            self.progreso = min(max(float(progreso), 0.0), 1.0)
+        if mensaje is not None:
+            self.mensaje = mensaje
+        if parcial is not None:
+            self.parcial = parcial
+
+    def cancel(self):
+        #Si no ha empezado se quita de la cola; si corre, se detiene en su siguiente update
+        self._cancelar.set()
+        if self._futuro is not None and self._futuro.cancel():
+            self.estado = CANCELADO
+            self.fin = time.time()
+
+    def result(self, timeout=None):
+        #Espera el resultado (para scripts y pruebas; las paginas consultan el estado)
+        if self._futuro is not None:
+            self._futuro.result(timeout)
+        if self.estado == ERROR:
+            raise self.error
+        if self.estado == CANCELADO:
+            raise Cancelled(self.clave)
+        return self.resultado
+
+    def summary(self):
+        return {
+            "id": self.id,
+            "trabajo": self.descripcion or self.clave,
+            "estado": self.estado,
+            "progreso": round(self.progreso, 3),
+            "segundos": round(self.segundos, 2),
+            "suscriptores": self.suscriptores,
+        }
+
+
+class JobExecutor:
+
+    def __init__(self, max_trabajadores=MAX_TRABAJADORES, max_terminados=MAX_TERMINADOS):
+        self.max_terminados = max_terminados
+        self._pool = ThreadPoolExecutor(max_workers=max_trabajadores, thread_name_prefix="trabajo")
+        self._trabajos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, clave, fn, *args, descripcion="", sesion=None, **kwargs):
+        #Trabajo de la llave: el que ya existe (en curso o terminado bien) o uno nuevo; `sesion` queda suscrita
+        with self._lock:
+            trabajo = self._trabajos.get(clave)
+            if trabajo is not None and trabajo.estado not in (ERROR, CANCELADO):
+                self._trabajos.move_to_end(clave)
+                if sesion is not None:
+                    trabajo._sesiones.add(sesion)
+                return trabajo
+            trabajo = Job(clave, descripcion)
+            if sesion is not None:
+                trabajo._sesiones.add(sesion)
+            trabajo._tarea = (fn, args, kwargs)
+            self._trabajos[clave] = trabajo
+            trabajo._futuro = self._pool.submit(self._run, trabajo, fn, args, kwargs)
+            self._evict()
+        return trabajo
+
+    def _run(self, trabajo, fn, args, kwargs):
+        if trabajo._cancelar.is_set():
+            trabajo.estado = CANCELADO
+            return
+        trabajo.estado = EJECUTANDO
+        trabajo.inicio = time.time()
+        try:
+            trabajo.resultado = fn(trabajo, *args, **kwargs)
+            trabajo.progreso = 1.0
+            trabajo.estado = LISTO
+            # Sin referencias a los datos de entrada una vez que hay resultado
+            trabajo._tarea = None
+        except Cancelled:
+            trabajo.estado = CANCELADO
+        except Exception as e:
+            trabajo.error = e
+            trabajo.estado = ERROR
+        finally:
+            trabajo.parcial = None
+            trabajo.fin = time.time()
+
+    def _evict(self):
+        terminados = [c for c, t in self._trabajos.items() if t.done]
+        for clave in terminados[:max(len(terminados) - self.max_terminados, 0)]:
+            del self._trabajos[clave]
+
+    def retry(self, clave, sesion=None):
+        #Vuelve a lanzar un trabajo que fallo o se cancelo (o suscribe a `sesion` si sigue en curso)
+        trabajo = self.get(clave)
+        if trabajo is None or trabajo._tarea is None:
+            return trabajo
+        fn, args, kwargs = trabajo._tarea
+        return self.submit(clave, fn, *args, descripcion=trabajo.descripcion, sesion=sesion, **kwargs)
+
+    def get(self, clave):
+        with self._lock:
+            return self._trabajos.get(clave)
+
+    def by_id(self, id_trabajo):
+        with self._lock:
+            return next((t for t in self._trabajos.values() if t.id == id_trabajo), None)
+
+    def cancel(self, clave, sesion=None):
+        #Quita a `sesion` de los suscriptores y cancela solo si no queda ninguna (sin sesion: cancela)
+        with self._lock:
+            trabajo = self._trabajos.get(clave)
+            if trabajo is None:
+                return None
+            trabajo._sesiones.discard(sesion)
+            if sesion is not None and trabajo._sesiones:
+                return trabajo
+        trabajo.cancel()
+        return trabajo
+
+    def summary(self):
+        with self._lock:
+            return [t.summary() for t in reversed(self._trabajos.values())]
+
+
+TAREAS = JobExecutor()
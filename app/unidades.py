@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+
+
+#Indice unidad -> filas ordenadas por fecha y submuestreo de series largas
+
+# Puntos maximos que se envian al navegador por grafica
+MAX_PUNTOS = 2000
+
+
+class UnitIndex:
+
+    def __init__(self, viajes, mask=None):
+        if mask is not None:
+            viajes = viajes.loc[mask]
+        fechas = pd.to_datetime(viajes["Fecha Salida"], errors="coerce").to_numpy()
+        codigos, unidades = pd.factorize(viajes["Tractocamión"], sort=True)
+
+        #Orden por (unidad, fecha): las filas de cada unidad quedan contiguas y ya ordenadas
+        orden = np.lexsort((fechas, codigos))
+        orden = orden[codigos[orden] >= 0]
+        self.unidades = list(unidades)
+        self._offsets = np.searchsorted(codigos[orden], np.arange(len(unidades) + 1))
+        self._posicion = {u: i for i, u in enumerate(self.unidades)}
+
+        self.fechas = fechas[orden]
+        self.peso = viajes["Peso Kgs"].to_numpy(dtype=float)[orden]
+        self.rutas = viajes["Ruta"].to_numpy()[orden]
+
+    def append(self, viajes, mask=None):
+        #Indice nuevo con los viajes agregados en su lugar (por fecha) dentro de cada unidad;
+        #las unidades nuevas van al final
+        nuevo = UnitIndex(viajes, mask)
+        unidades = list(self.unidades)
+        conteo = list(np.diff(self._offsets))
+        posiciones = []
+        for u in nuevo.unidades:
+            filas = nuevo.rows(u)
+            i = self._posicion.get(u)
+            if i is None:
+                posiciones.append(np.full(filas.stop - filas.start, len(self.fechas)))
+                unidades.append(u)
+                conteo.append(filas.stop - filas.start)
+                continue
+            bloque = self.fechas[self.rows(u)]
+            posiciones.append(self._offsets[i] + np.searchsorted(bloque, nuevo.fechas[filas], side="right"))
+            conteo[i] += filas.stop - filas.start
+        posiciones = np.concatenate(posiciones) if posiciones else np.array([], dtype=np.int64)
+
+        resultado = object.__new__(UnitIndex)
+        resultado.unidades = unidades
+        resultado._offsets = np.concatenate([[0], np.cumsum(conteo, dtype=np.int64)])
+        resultado._posicion = {u: i for i, u in enumerate(unidades)}
+        resultado.fechas = np.insert(self.fechas, posiciones, nuevo.fechas)
+        resultado.peso = np.insert(self.peso, posiciones, nuevo.peso)
+        resultado.rutas = np.insert(self.rutas, posiciones, nuevo.rutas)
+        return resultado
+
+    def rows(self, unidad):
+        i = self._posicion[unidad]
+        return slice(self._offsets[i], self._offsets[i + 1])
+
+    def count(self, unidad):
+        filas = self.rows(unidad)
+        return filas.stop - filas.start
+
+    def timeline(self, unidad, max_puntos=MAX_PUNTOS):
+        filas = self.rows(unidad)
+        fechas, peso, rutas = self.fechas[filas], self.peso[filas], self.rutas[filas]
+        validos = ~(pd.isna(fechas) | np.isnan(peso))
+        fechas, peso, rutas = fechas[validos], peso[validos], rutas[validos]
+
+        sel = lttb(fechas.astype("datetime64[ns]").astype(np.int64).astype(float), peso, max_puntos)
+        return pd.DataFrame({
+            "Fecha Salida": fechas[sel],
+            "Peso Kgs": peso[sel],
+            "Ruta": rutas[sel],
+        })
+
+
+def lttb(x, y, n_out):
+    #Largest-Triangle-Three-Buckets: conserva la forma de la serie con n_out puntos
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    bordes = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    cuenta = np.diff(bordes)
+    no_vacio = cuenta > 0
+    prom_x = np.zeros(len(cuenta))
+    prom_y = np.zeros(len(cuenta))
+    prom_x[no_vacio] = np.add.reduceat(x[:n - 1], bordes[:-1])[no_vacio] / cuenta[no_vacio]
+    prom_y[no_vacio] = np.add.reduceat(y[:n - 1], bordes[:-1])[no_vacio] / cuenta[no_vacio]
+
+    sel = np.empty(n_out, dtype=np.int64)
+    sel[0], sel[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        ini, fin = bordes[i], max(bordes[i + 1], bordes[i] + 1)
+        if i + 1 < len(cuenta):
+            cx, cy = prom_x[i + 1], prom_y[i + 1]
+        else:
+            cx, cy = x[n - 1], y[n - 1]
+        area = np.abs(
+            (x[a] - cx) * (y[ini:fin] - y[a]) - (x[a] - x[ini:fin]) * (cy - y[a])
+        )
+        a = ini + int(np.argmax(area))
+        sel[i + 1] = a
+    return np.unique(sel)
@@ -0,0 +1,100 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+
+#Benchmark de arranque: tiempo al primer pintado y latencia por pantalla del tablero
+#
+#Uso (desde la carpeta que contiene Viajes.xlsx):
+#   python benchmarks/arranque.py --script app/Tablero.py
+#Para comparar con una version anterior:
+#   git show <commit>:app/Tablero.py > /tmp/Tablero_old.py   (junto con sus modulos)
+#   python benchmarks/arranque.py --script /tmp/Tablero_old.py
+
+RAIZ = Path(__file__).resolve().parent.parent
+PANTALLAS = [
+    "Carga de Datos",
+    "Estado Actual de la Flota",
+    "Riesgo de Viajes Vacíos",
+    "Pronóstico de Viajes Vacíos",
+    "Asignación Óptima",
+    "Impacto Operativo",
+]
+PESADOS = ["plotly.express", "plotly.graph_objects", "sklearn", "scipy.sparse", "joblib"]
+
+
+def _medir_pantalla(script, pantalla, reruns):
+    #Se ejecuta en un proceso nuevo para que las importaciones y caches esten en frio
+    from streamlit.testing.v1 import AppTest
+
+    inicio = time.perf_counter()
+    at = AppTest.from_file(script, default_timeout=600)
+    at.run()
+    primer_pintado = time.perf_counter() - inicio
+    modulos_inicio = [m for m in PESADOS if m in sys.modules]
+
+    inicio = time.perf_counter()
+    if pantalla != PANTALLAS[0]:
+        at.sidebar.radio[0].set_value(pantalla).run()
+    primera_visita = time.perf_counter() - inicio
+    errores = [str(e.value) for e in at.exception]
+
+    tiempos = []
+    for _ in range(reruns):
+        inicio = time.perf_counter()
+        at.run()
+        tiempos.append(time.perf_counter() - inicio)
+
+    return {
+        "pantalla": pantalla,
+        "primer_pintado_s": primer_pintado,
+        "primera_visita_s": primera_visita,
+        "rerun_p50_s": statistics.median(tiempos) if tiempos else None,
+        "modulos_pesados_al_inicio": modulos_inicio,
+        "modulos_pesados_despues": [m for m in PESADOS if m in sys.modules],
+        "errores": errores,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--script", default=str(RAIZ / "app" / "Tablero.py"))
+    parser.add_argument("--reruns", type=int, default=5)
+    parser.add_argument("--json", help="Guardar resultados en este archivo")
+    parser.add_argument("--pantalla", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.pantalla:
+        print(json.dumps(_medir_pantalla(args.script, args.pantalla, args.reruns)))
+        return
+
+    resultados = []
+    for pantalla in PANTALLAS:
+        salida = subprocess.run(
+            [sys.executable, __file__, "--script", args.script, "--reruns", str(args.reruns), "--pantalla", pantalla],
+            capture_output=True, text=True, env={**os.environ, "STREAMLIT_LOGGER_LEVEL": "error"},
+        )
+        if salida.returncode != 0:
+            print(salida.stderr, file=sys.stderr)
+            continue
+        resultados.append(json.loads(salida.stdout.strip().splitlines()[-1]))
+
+    print(f"{'Pantalla':32} {'1er pintado':>12} {'1a visita':>10} {'rerun p50':>10}  pesados al inicio")
+    for r in resultados:
+        print(
+            f"{r['pantalla']:32} {r['primer_pintado_s']:12.3f} {r['primera_visita_s']:10.3f} "
+            f"{r['rerun_p50_s']:10.3f}  {','.join(r['modulos_pesados_al_inicio']) or '-'}"
+            + (f"  ERROR: {r['errores'][0][:60]}" if r["errores"] else "")
+        )
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(resultados, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+#Generador determinista de libros sinteticos con el esquema que espera el tablero
+#
+#Uso:
+#   python benchmarks/generar_datos.py --viajes 10000 100000 --salida datos_sinteticos
+#Se escribe <salida>/<n>/Viajes.xlsx (si cabe en Excel) y <salida>/<n>/parquet/<Hoja>.parquet
+
+TAMANOS = [10_000, 100_000, 1_000_000, 10_000_000]
+LIMITE_EXCEL = 1_048_575
+CHUNK = 1_000_000
+
+CLIENTES = [
+    "EMBOTELLADORAS BEPENSA", "NUEVA WAL MART DE MEXICO", "INDUSTRIA ENVASADORA DE QUERETARO",
+    "LA MADRILEÑA", "JUGOS DEL VALLE", "SIGMA ALIMENTOS COMERCIAL", "MEGA EMPACK",
+]
+LUGARES = [
+    "BB CENTRO", "BB PACABTUN", "BB PONIENTE", "BB IZAMAL", "BB CANCUN PLANTA", "BB PLAYA DEL CARMEN",
+    "BB CAMPECHE OTE", "BB PROGRESO", "WM CEDIS VILLAHERMOSA SECOS", "PENSION SALINAS CRUZ",
+    "WM CEDIS CHALCO", "IEQSA", "TELEBODEGA CANCUN", "BB MERIDA NORTE", "BB TIZIMIN", "BB VALLADOLID",
+]
+ESTATUS = ["TERMINADO", "CANCELADO", "EN TRANSITO"]
+FECHA_INICIO = pd.Timestamp("2025-01-01")
+DIAS = 700
+
+
+class Catalogo:
+    #Rutas, unidades y efectos de riesgo fijos para un tamaño dado
+
+    def __init__(self, n_viajes, semilla=42):
+        rng = np.random.default_rng(semilla)
+        self.n_rutas = int(min(30_000, max(300, n_viajes // 40)))
+        self.n_unidades = int(min(5_000, max(120, n_viajes // 300)))
+
+        origen = rng.choice(LUGARES, self.n_rutas)
+        destino = rng.choice(LUGARES, self.n_rutas)
+        self.rutas = np.array([f"{o}/{d} {i:05d}" for i, (o, d) in enumerate(zip(origen, destino))], dtype=object)
+        self.unidades = np.array([f"T{500 + i}" for i in range(self.n_unidades)], dtype=object)
+        self.cliente_ruta = rng.integers(0, len(CLIENTES), self.n_rutas)
+
+        #Cada ruta usa un grupo fijo de unidades (como en la operacion real)
+        self.pool = rng.integers(0, self.n_unidades, (self.n_rutas, 10))
+        self.peso_ruta = rng.uniform(8_000, 30_000, self.n_rutas)
+        self.horas_ruta = rng.uniform(2, 40, self.n_rutas)
+        self.efecto_ruta = rng.normal(-0.8, 0.6, self.n_rutas)
+        self.efecto_unidad = rng.normal(0, 0.4, self.n_unidades)
+        self.popularidad = rng.zipf(1.6, self.n_rutas).astype(float)
+        self.popularidad /= self.popularidad.sum()
+
+
+def trips_chunk(cat, n, semilla):
+    rng = np.random.default_rng(semilla)
+    ruta = rng.choice(cat.n_rutas, n, p=cat.popularidad)
+    unidad = cat.pool[ruta, rng.integers(0, cat.pool.shape[1], n)]
+    salida = FECHA_INICIO + pd.to_timedelta(rng.integers(0, DIAS * 24 * 60, n), unit="min")
+    horas = cat.horas_ruta[ruta] * rng.uniform(0.7, 1.5, n)
+
+    #Probabilidad de viaje vacio segun ruta y unidad; los vacios llevan poco peso
+    prob = 1 / (1 + np.exp(-(cat.efecto_ruta[ruta] + cat.efecto_unidad[unidad])))
+    vacio = rng.random(n) < prob * 0.3
+    peso = np.where(vacio, rng.uniform(0, 2_500, n), cat.peso_ruta[ruta] * rng.gamma(8, 1 / 8, n))
+
+    return pd.DataFrame({
+        "Numero": rng.integers(1, 2_000, n),
+        "Nombre Cliente": np.asarray(CLIENTES, dtype=object)[cat.cliente_ruta[ruta]],
+        "Ruta": cat.rutas[ruta],
+        "Fecha Salida": salida,
+        "Fecha Llegada": salida + pd.to_timedelta(horas, unit="h"),
+        "Tractocamión": cat.unidades[unidad],
+        "Estatus de Viaje": np.asarray(ESTATUS, dtype=object)[rng.choice(3, n, p=[0.92, 0.04, 0.04])],
+        "Peso Kgs": peso.round(1),
+    })
+
+
+def dirty(viajes, semilla):
+    #Exportacion "cruda": columnas extra, faltantes y duplicados como los que limpia el notebook de EDA
+    rng = np.random.default_rng(semilla)
+    n = len(viajes)
+    viajes = viajes.assign(**{
+        "Folio": np.arange(n),
+        "Fecha": viajes["Fecha Salida"].dt.normalize(),
+        "Fecha.1": viajes["Fecha Salida"].dt.normalize(),
+        "Operador": np.asarray([f"OP{i:04d}" for i in range(500)], dtype=object)[rng.integers(0, 500, n)],
+    })
+    for col, tasa in [("Fecha Llegada", 0.03), ("Fecha Salida", 0.01), ("Peso Kgs", 0.02),
+                      ("Tractocamión", 0.01), ("Estatus de Viaje", 0.01), ("Fecha.1", 0.05)]:
+        viajes.loc[rng.random(n) < tasa, col] = None
+    duplicados = viajes.iloc[rng.integers(0, n, n // 100)]
+    return pd.concat([viajes, duplicados], ignore_index=True)
+
+
+def trip_chunks(cat, n_viajes, semilla=42, sucio=False):
+    #Bloques de viajes con semilla (semilla, bloque): el mismo historial en todos los formatos
+    for i, inicio in enumerate(range(0, n_viajes, CHUNK)):
+        viajes = trips_chunk(cat, min(CHUNK, n_viajes - inicio), (semilla, i))
+        yield dirty(viajes, (semilla, i)) if sucio else viajes
+
+
+def risk_tables(cat):
+    pares = np.unique(
+        np.column_stack([np.repeat(np.arange(cat.n_rutas), cat.pool.shape[1]), cat.pool.ravel()]), axis=0
+    )
+    ri, ui = pares[:, 0], pares[:, 1]
+    riesgo = pd.DataFrame({
+        "Ruta": cat.rutas[ri],
+        "Tractocamión": cat.unidades[ui],
+        "Prob_vacio": 1 / (1 + np.exp(-(cat.efecto_ruta[ri] + cat.efecto_unidad[ui]))),
+    })
+    asignacion = (
+        riesgo.sort_values("Prob_vacio", kind="stable")
+        .drop_duplicates("Ruta")
+        .reset_index(drop=True)
+    )
+    return riesgo, asignacion
+
+
+def forecast_table(semilla=42):
+    rng = np.random.default_rng(semilla)
+    fechas = pd.date_range(FECHA_INICIO + pd.Timedelta(days=DIAS), periods=180, freq="D")
+    return pd.DataFrame({"Fecha": fechas, "pronostico": 0.1 + 0.02 * np.sin(np.arange(180) / 15) + rng.normal(0, 0.005, 180)})
+
+
+def generate(n_viajes, salida, formatos=("xlsx", "parquet"), semilla=42, sucio=False):
+    salida = Path(salida) / str(n_viajes)
+    cat = Catalogo(n_viajes, semilla)
+    riesgo, asignacion = risk_tables(cat)
+    forecast = forecast_table(semilla)
+    escritos = []
+
+    if "parquet" in formatos:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        carpeta = salida / "parquet"
+        carpeta.mkdir(parents=True, exist_ok=True)
+        #Viajes por bloques para no tener todo el historial en memoria
+        writer = None
+        for viajes in trip_chunks(cat, n_viajes, semilla, sucio):
+            bloque = pa.Table.from_pandas(viajes, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(carpeta / "Viajes.parquet", bloque.schema)
+            writer.write_table(bloque)
+        writer.close()
+        for hoja, df in [("Asignacion", asignacion), ("Riesgo", riesgo), ("Forecast", forecast)]:
+            df.to_parquet(carpeta / f"{hoja}.parquet", index=False)
+        escritos.append(carpeta)
+
+    if "xlsx" in formatos:
+        if n_viajes > LIMITE_EXCEL:
+            print(f"{n_viajes} viajes no caben en una hoja de Excel; solo se genera Parquet.")
+        else:
+            salida.mkdir(parents=True, exist_ok=True)
+            viajes = pd.concat(list(trip_chunks(cat, n_viajes, semilla, sucio)), ignore_index=True)
+            with pd.ExcelWriter(salida / "Viajes.xlsx") as writer:
+                viajes.to_excel(writer, sheet_name="Viajes", index=False)
+                asignacion.to_excel(writer, sheet_name="Asignacion", index=False)
+                riesgo.to_excel(writer, sheet_name="Riesgo", index=False)
+                forecast.to_excel(writer, sheet_name="Forecast", index=False)
+            escritos.append(salida / "Viajes.xlsx")
+
+    return escritos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera libros sintéticos para benchmarks")
+    parser.add_argument("--viajes", type=int, nargs="+", default=TAMANOS[:2])
+    parser.add_argument("--salida", default="datos_sinteticos")
+    parser.add_argument("--formatos", nargs="+", default=["xlsx", "parquet"], choices=["xlsx", "parquet"])
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--sucio", action="store_true", help="Agregar faltantes, duplicados y columnas extra")
+    args = parser.parse_args()
+
+    for n in args.viajes:
+        for ruta in generate(n, args.salida, args.formatos, args.semilla, args.sucio):
+            print(ruta)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+import argparse
+import json
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ / "app"))
+
+from asignador import solve_assignment  # noqa: E402
+from busqueda import RouteIndex  # noqa: E402
+from carga import HOJAS, read_workbook  # noqa: E402
+from cubo import build_cube  # noqa: E402
+from explicaciones import TreePathExplainer, explain_pairs  # noqa: E402
+from indicadores import build_snapshot  # noqa: E402
+from limpieza import clean_trips  # noqa: E402
+from matriz import RiskMatrix  # noqa: E402
+from modelos import MODELOS, load_model  # noqa: E402
+from pronosticos import build_forecasts  # noqa: E402
+from simulacion import build_scenario, simulate  # noqa: E402
+from tablas import PagedTable  # noqa: E402
+from unidades import UnitIndex  # noqa: E402
+
+
+#Benchmark sin interfaz de la carga, los indicadores globales y los calculos de cada pantalla
+#
+#Uso:
+#   python benchmarks/generar_datos.py --viajes 10000 100000
+#   python benchmarks/paginas.py datos_sinteticos/10000 datos_sinteticos/100000 --historial bench.jsonl
+#Cada carpeta debe tener Viajes.xlsx o parquet/<Hoja>.parquet
+
+
+class Medicion:
+    #Tiempo y memoria pico de cada etapa; la memoria se mide en una corrida aparte
+    #porque tracemalloc hace mas lento el codigo
+
+    def __init__(self, memoria=True, omitir=()):
+        self.memoria = memoria
+        self.omitir = set(omitir)
+        self.etapas = []
+
+    def run(self, nombre, func, *args, repeticiones=1, **kwargs):
+        if nombre in self.omitir:
+            self.etapas.append({"etapa": nombre, "segundos": None, "memoria_pico_mb": None})
+            return None
+
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            resultado = func(*args, **kwargs)
+        segundos = (time.perf_counter() - inicio) / repeticiones
+
+        pico = None
+        if self.memoria:
+            tracemalloc.start()
+            func(*args, **kwargs)
+            pico = tracemalloc.get_traced_memory()[1] / 1e6
+            tracemalloc.stop()
+        self.etapas.append({"etapa": nombre, "segundos": segundos, "memoria_pico_mb": pico})
+        return resultado
+
+
+def load_dataset(carpeta, med):
+    carpeta = Path(carpeta)
+    parquet = carpeta / "parquet"
+    if parquet.exists():
+        hojas = med.run("carga_parquet", lambda: {h: pd.read_parquet(parquet / f"{h}.parquet") for h in HOJAS})
+        #El Parquet trae los viajes crudos; read_workbook ya limpia al leer el Excel
+        hojas["Viajes"], _ = med.run("limpieza", clean_trips, hojas["Viajes"])
+    if (carpeta / "Viajes.xlsx").exists():
+        import carga
+
+        #Primero sin sidecar (lectura de Excel) y despues con el sidecar Parquet ya escrito
+        carga.CACHE_DIR = carpeta / ".cache_datos"
+
+        def _sin_sidecar():
+            for archivo in carga.CACHE_DIR.glob("*.parquet"):
+                archivo.unlink()
+            return read_workbook(carpeta / "Viajes.xlsx")
+
+        hojas, _ = med.run("carga_excel", _sin_sidecar)
+        hojas, _ = med.run("carga_sidecar", read_workbook, carpeta / "Viajes.xlsx")
+    return hojas
+
+
+def page_estado(viajes, snapshot, med):
+    cubo = med.run("estado_cubo", build_cube, viajes, snapshot.viaje_vacio)
+    meses = cubo.etiquetas
+    med.run("estado_filtro_meses", lambda: (cubo.monthly_empty(meses), cubo.status_counts(meses)), repeticiones=20)
+    filtros = (meses, list(cubo.rutas[:5]), list(cubo.unidades[:20]))
+    med.run(
+        "estado_filtro_combinado", lambda: (cubo.monthly_empty(*filtros), cubo.status_counts(*filtros)), repeticiones=20
+    )
+    indice = med.run("estado_indice_unidades", UnitIndex, viajes, cubo.en_ventana)
+    unidad = max(indice.unidades, key=indice.count)
+    med.run("estado_serie_unidad", indice.timeline, unidad, repeticiones=5)
+
+
+def page_riesgo(viajes, riesgo, asignacion, med):
+    matriz = med.run("riesgo_matriz", RiskMatrix, riesgo, asignacion)
+    ruta = riesgo["Ruta"].iloc[0]
+    unidad = riesgo["Tractocamión"].iloc[0]
+    med.run("riesgo_lookup", lambda: (matriz.route_units(ruta), matriz.prob(ruta, unidad)), repeticiones=50)
+    med.run("riesgo_top_n", lambda: (matriz.top(10), matriz.top(10, ascending=True)), repeticiones=50)
+
+    #Explicaciones del Random Forest sobre los pares observados
+    modelo = load_model(MODELOS["Random Forest"])
+    explainer = med.run("riesgo_explicador", TreePathExplainer, modelo)
+    pares = viajes[["Ruta", "Tractocamión"]]
+    explicacion = med.run("riesgo_explicaciones", explain_pairs, modelo, viajes, pares, explainer=explainer)
+    if explicacion is not None:
+        ruta, unidad = explicacion.pares.iloc[0]
+        med.run("riesgo_explicacion_par", explicacion.pair, ruta, unidad, repeticiones=50)
+
+
+def page_pronostico(viajes, snapshot, forecast, med):
+    inicio, fin = forecast["Fecha"].min(), forecast["Fecha"].max()
+    med.run("pronostico_filtro", lambda: forecast[(forecast["Fecha"] >= inicio) & (forecast["Fecha"] <= fin)], repeticiones=20)
+    pronosticos = med.run("pronostico_ajuste", build_forecasts, viajes, snapshot.viaje_vacio)
+    if pronosticos is not None:
+        conjunto = pronosticos["Ruta"]
+        med.run("pronostico_tabla", conjunto.table, repeticiones=5)
+        med.run("pronostico_serie", conjunto.series, conjunto.nombres[0], repeticiones=50)
+
+
+def page_asignacion(viajes, asignacion, riesgo, med):
+    indice = med.run("asignacion_indice", RouteIndex, asignacion, best_by="Prob_vacio")
+    consulta = str(asignacion["Ruta"].iloc[len(asignacion) // 2])[:12].lower()
+    med.run("asignacion_busqueda", indice.search, consulta, repeticiones=50)
+    # Demanda de cada ruta: sus viajes (como en el tablero)
+    demanda = viajes["Ruta"].value_counts()
+    med.run("asignacion_solver", solve_assignment, riesgo, demanda=demanda)
+    med.run("asignacion_solver_voraz", solve_assignment, riesgo, demanda=demanda, metodo="voraz")
+
+    #Tabla paginada: ordenes y codigos una vez; cada consulta filtra, ordena y recorta una pagina
+    tabla = med.run("tabla_paginada", PagedTable, riesgo)
+    med.run(
+        "tabla_paginada_consulta",
+        lambda: tabla.page(tabla.query("Ruta", texto=consulta[:6], orden="Prob_vacio"), 0, 50),
+        repeticiones=20,
+    )
+
+
+def page_impacto(viajes, riesgo, asignacion, snapshot, med):
+    indice = med.run("impacto_indice", RouteIndex, snapshot.comparacion)
+    consulta = str(snapshot.comparacion["Ruta"].iloc[0])[:12].lower()
+    med.run("impacto_busqueda", indice.search, consulta, repeticiones=50)
+    escenario = med.run("impacto_escenario", build_scenario, viajes, riesgo, asignacion)
+    if escenario is not None:
+        med.run("impacto_simulacion", simulate, escenario)
+
+
+def benchmark(carpeta, memoria=True, omitir=()):
+    med = Medicion(memoria, omitir)
+    hojas = load_dataset(carpeta, med)
+    viajes, asignacion, riesgo, forecast = (hojas[h] for h in HOJAS)
+    viajes["Fecha Salida"] = pd.to_datetime(viajes["Fecha Salida"], errors="coerce")
+    forecast["Fecha"] = pd.to_datetime(forecast["Fecha"], errors="coerce")
+
+    snapshot = med.run("kpis_globales", build_snapshot, "bench", viajes, asignacion, riesgo)
+    page_estado(viajes, snapshot, med)
+    page_riesgo(viajes, riesgo, asignacion, med)
+    page_pronostico(viajes, snapshot, forecast, med)
+    page_asignacion(viajes, asignacion, riesgo, med)
+    page_impacto(viajes, riesgo, asignacion, snapshot, med)
+
+    return {"carpeta": str(carpeta), "viajes": len(viajes), "etapas": med.etapas}
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True, text=True
+        ).stdout.strip()
+    except OSError:
+        return ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sin interfaz de las pantallas del tablero")
+    parser.add_argument("carpetas", nargs="+")
+    parser.add_argument("--historial", help="Agregar resultados (JSON por línea) a este archivo")
+    parser.add_argument("--sin-memoria", action="store_true", help="No medir memoria pico")
+    parser.add_argument("--omitir", nargs="+", default=[], help="Etapas que no se ejecutan (p. ej. asignacion_solver)")
+    args = parser.parse_args()
+
+    commit, fecha = _commit(), datetime.now().isoformat(timespec="seconds")
+    for carpeta in args.carpetas:
+        resultado = benchmark(carpeta, memoria=not args.sin_memoria, omitir=args.omitir)
+        print(f"\n{resultado['carpeta']} ({resultado['viajes']:,} viajes)")
+        print(f"{'Etapa':28} {'segundos':>10} {'memoria pico (MB)':>18}")
+        for e in resultado["etapas"]:
+            segundos = "omitida" if e["segundos"] is None else f"{e['segundos']:.4f}"
+            memoria = "-" if e["memoria_pico_mb"] is None else f"{e['memoria_pico_mb']:.1f}"
+            print(f"{e['etapa']:28} {segundos:>10} {memoria:>18}")
+
+        if args.historial:
+            with open(args.historial, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"fecha": fecha, "commit": commit, **resultado}, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    main()
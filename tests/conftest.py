@@ -0,0 +1,42 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+RAIZ = Path(__file__).resolve().parent.parent
+#Los modulos del tablero se importan como en streamlit (app/ en el path)
+sys.path.insert(0, str(RAIZ / "app"))
+sys.path.insert(0, str(RAIZ / "benchmarks"))
+
+import pandas as pd  # noqa: E402
+
+from generar_datos import Catalogo, dirty, forecast_table, risk_tables, trips_chunk  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def catalogo():
+    return Catalogo(4_000, semilla=7)
+
+
+@pytest.fixture(scope="session")
+def viajes(catalogo):
+    return trips_chunk(catalogo, 4_000, 7)
+
+
+@pytest.fixture(scope="session")
+def viajes_sucios(viajes):
+    return dirty(viajes, 7)
+
+
+@pytest.fixture(scope="session")
+def escribir_libro(catalogo):
+    #Escribe un libro con las cuatro hojas y los viajes dados
+    riesgo, asignacion = risk_tables(catalogo)
+
+    def escribir(ruta, viajes):
+        with pd.ExcelWriter(ruta) as writer:
+            for hoja, df in [("Viajes", viajes), ("Asignacion", asignacion), ("Riesgo", riesgo), ("Forecast", forecast_table())]:
+                df.to_excel(writer, sheet_name=hoja, index=False)
+        return ruta
+
+    return escribir
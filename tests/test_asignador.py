@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from asignador import METODOS, route_probability, solve_assignment
+
+
+def _riesgo(n_rutas, n_unidades, por_ruta, semilla):
+    #Cada ruta con un grupo de unidades posibles y su probabilidad de viaje vacio
+    rng = np.random.default_rng(semilla)
+    filas = [
+        (f"R{r:03d}", f"T{u:03d}", rng.uniform(0.01, 0.9))
+        for r in range(n_rutas)
+        for u in rng.choice(n_unidades, por_ruta, replace=False)
+    ]
+    return pd.DataFrame(filas, columns=["Ruta", "Tractocamión", "Prob_vacio"])
+
+
+def _asignados(asignacion):
+    return asignacion.dropna(subset=["Tractocamión"])
+
+
+@pytest.mark.parametrize("metodo", METODOS)
+def test_capacity_and_demand_are_respected(metodo):
+    riesgo = _riesgo(40, 12, 4, semilla=1)
+    rng = np.random.default_rng(2)
+    demanda = pd.Series(rng.integers(1, 8, 40), index=[f"R{r:03d}" for r in range(40)])
+    capacidad = pd.Series(rng.integers(3, 15, 12), index=[f"T{u:03d}" for u in range(12)])
+
+    asignacion = solve_assignment(riesgo, capacidad=capacidad, demanda=demanda, metodo=metodo)
+    asignados = _asignados(asignacion)
+
+    assert (asignacion["Viajes"] > 0).all()
+    assert asignacion["Viajes"].dtype.kind == "i"
+    por_unidad = asignados.groupby("Tractocamión")["Viajes"].sum()
+    assert (por_unidad <= capacidad.reindex(por_unidad.index)).all()
+    #Lo asignado mas lo que queda sin unidad es exactamente la demanda de cada ruta
+    por_ruta = asignacion.groupby("Ruta")["Viajes"].sum()
+    pd.testing.assert_series_equal(por_ruta.sort_index(), demanda.sort_index(), check_names=False)
+    #Solo pares que existen en la tabla de riesgo
+    pares = set(zip(riesgo["Ruta"], riesgo["Tractocamión"]))
+    assert set(zip(asignados["Ruta"], asignados["Tractocamión"])) <= pares
+
+
+def test_exact_covers_at_least_as_much_and_costs_no_more_than_greedy():
+    riesgo = _riesgo(60, 15, 3, semilla=3)
+    demanda = pd.Series(3, index=riesgo["Ruta"].unique())
+    exacto = _asignados(solve_assignment(riesgo, capacidad=10, demanda=demanda))
+    voraz = _asignados(solve_assignment(riesgo, capacidad=10, demanda=demanda, metodo="voraz"))
+
+    assert exacto["Viajes"].sum() >= voraz["Viajes"].sum()
+    if exacto["Viajes"].sum() == voraz["Viajes"].sum():
+        costo = lambda a: float((a["Prob_vacio"] * a["Viajes"]).sum())  # noqa: E731
+        assert costo(exacto) <= costo(voraz) + 1e-9
+
+
+def test_exact_matches_hungarian_with_unit_capacity():
+    from scipy.optimize import linear_sum_assignment
+
+    riesgo = _riesgo(8, 10, 10, semilla=4)
+    asignacion = solve_assignment(riesgo, capacidad=1)
+    assert asignacion["Tractocamión"].notna().all()
+    assert asignacion["Tractocamión"].is_unique
+
+    matriz = riesgo.pivot(index="Ruta", columns="Tractocamión", values="Prob_vacio").to_numpy()
+    filas, columnas = linear_sum_assignment(matriz)
+    assert asignacion["Prob_vacio"].sum() == pytest.approx(matriz[filas, columnas].sum())
+
+
+def test_uncovered_demand_and_default_capacity():
+    riesgo = pd.DataFrame({
+        "Ruta": ["A", "A", "B"],
+        "Tractocamión": ["T1", "T2", "T1"],
+        "Prob_vacio": [0.2, 0.5, 0.1],
+    })
+    asignacion = solve_assignment(riesgo, capacidad={"T1": 2, "T2": 0}, demanda={"A": 2, "B": 1})
+    sin_unidad = asignacion[asignacion["Tractocamión"].isna()]
+    assert sin_unidad[["Ruta", "Viajes"]].values.tolist() == [["A", 1]]
+    assert np.isnan(sin_unidad["Prob_vacio"]).all()
+    #La probabilidad por ruta solo pondera los viajes con unidad
+    assert route_probability(asignacion).to_dict() == pytest.approx({"A": 0.2, "B": 0.1})
+
+    #Sin capacidad: la demanda repartida entre las unidades alcanza para cubrir todo
+    completa = solve_assignment(riesgo, demanda={"A": 2, "B": 1})
+    assert completa["Tractocamión"].notna().all()
+
+
+def test_unknown_method():
+    with pytest.raises(ValueError):
+        solve_assignment(_riesgo(2, 2, 2, semilla=5), metodo="otro")
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+
+from busqueda import RouteIndex, normalize
+
+RUTAS = [
+    "WM CEDIS VILLAHERMOSA SECOS/PENSION SALINAS CRUZ",
+    "VILLAHERMOSA CENTRO",
+    "BB SALINAS/BB CENTRO",
+    "BB CANCUN PLANTA/BB PLAYA DEL CARMEN",
+    "BB MÉRIDA NORTE/BB TIZIMIN",
+    "BB VALLADOLID/BB PROGRESO",
+]
+
+
+def _index():
+    return RouteIndex(pd.DataFrame({"Ruta": RUTAS + [None], "Prob_vacio": np.linspace(0.1, 0.7, len(RUTAS) + 1)}))
+
+
+def _found(indice, consulta):
+    posiciones, puntaje = indice.search(consulta)
+    return [indice.rutas[p] for p in posiciones], puntaje
+
+
+def test_prefix_of_partial_word_ranks_first():
+    indice = _index()
+    rutas, puntaje = _found(indice, "villa")
+    assert rutas[0] == "VILLAHERMOSA CENTRO"
+    #Prefijo de la ruta (+2) y subcadena en medio del nombre (+1)
+    assert puntaje[0] > 2.0
+    assert 1.0 < puntaje[rutas.index("WM CEDIS VILLAHERMOSA SECOS/PENSION SALINAS CRUZ")] < 2.0
+
+
+def test_mid_string_substring_gets_bonus():
+    indice = _index()
+    rutas, puntaje = _found(indice, "pension salinas")
+    assert rutas[0] == "WM CEDIS VILLAHERMOSA SECOS/PENSION SALINAS CRUZ"
+    rutas, puntaje = _found(indice, "salinas")
+    con_subcadena = {r for r in RUTAS if "salinas" in normalize(r)}
+    assert set(rutas[:2]) == con_subcadena
+    assert (puntaje[:2] > 1.0).all()
+
+
+def test_accents_case_and_typos():
+    indice = _index()
+    assert _found(indice, "merida")[0][0] == "BB MÉRIDA NORTE/BB TIZIMIN"
+    assert _found(indice, "CANCÚN")[0][0] == "BB CANCUN PLANTA/BB PLAYA DEL CARMEN"
+    #Una letra cambiada: sin bono de subcadena pero con cobertura suficiente
+    rutas, puntaje = _found(indice, "valladolis")
+    assert rutas[0] == "BB VALLADOLID/BB PROGRESO"
+    assert puntaje[0] < 2.0
+
+
+def test_no_match_and_rows_without_route():
+    indice = _index()
+    assert len(indice) == len(RUTAS)
+    posiciones, puntaje = indice.search("zzzz")
+    assert posiciones.size == 0 and puntaje.size == 0
+    assert indice.search("   ")[0].size == 0
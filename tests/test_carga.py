@@ -0,0 +1,60 @@
+import pandas as pd
+import pytest
+
+import carga
+from carga import HOJAS, read_workbook, workbook_version
+
+
+@pytest.fixture
+def libro(tmp_path, monkeypatch, escribir_libro, viajes_sucios):
+    monkeypatch.setattr(carga, "CACHE_DIR", tmp_path / ".cache_datos")
+    return escribir_libro(tmp_path / "Viajes.xlsx", viajes_sucios.iloc[:500])
+
+
+def _count_read_excel(monkeypatch):
+    llamadas = []
+    original = pd.read_excel
+
+    def contar(*args, **kwargs):
+        llamadas.append(kwargs.get("sheet_name"))
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(pd, "read_excel", contar)
+    return llamadas
+
+
+def test_reads_all_sheets_in_one_pass(libro, monkeypatch):
+    llamadas = _count_read_excel(monkeypatch)
+    hojas, _ = read_workbook(libro)
+    assert llamadas == [HOJAS]
+    assert list(hojas) == HOJAS
+    assert all(len(hojas[h]) for h in HOJAS)
+
+
+def test_sidecar_round_trip(libro, monkeypatch):
+    hojas, version = read_workbook(libro)
+    for hoja in HOJAS:
+        assert (carga.CACHE_DIR / f"{version}_{carga.FORMATO_SIDECAR}_{hoja}.parquet").exists()
+
+    #La segunda lectura sale del sidecar sin abrir el Excel, con los mismos tipos y valores
+    llamadas = _count_read_excel(monkeypatch)
+    cacheadas, version_cache = read_workbook(libro)
+    assert llamadas == []
+    assert version_cache == version
+    for hoja in HOJAS:
+        pd.testing.assert_frame_equal(cacheadas[hoja], hojas[hoja], check_exact=True)
+    assert carga.cleaning_report(version)["Filas recibidas"] == 500
+
+
+def test_version_follows_content_not_path(libro, escribir_libro, viajes_sucios):
+    version = workbook_version(libro)
+    assert workbook_version(libro) == version
+    assert read_workbook(libro)[1] == version
+
+    escribir_libro(libro, viajes_sucios.iloc[:400])
+    nueva = workbook_version(libro)
+    assert nueva != version
+    assert nueva == carga.hash_bytes(libro.read_bytes())
+    hojas, version_leida = read_workbook(libro)
+    assert version_leida == nueva
+    assert carga.cleaning_report(nueva)["Filas recibidas"] == 400
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+from etiquetas import CUANTIL, EmptyLabeler
+
+
+def test_append_matches_full_rebuild(viajes):
+    historial, nuevos = viajes.iloc[:3_000], viajes.iloc[3_000:]
+    completo = EmptyLabeler.fit(viajes)
+    incremental = EmptyLabeler.fit(historial)
+    incremental.append(nuevos)
+
+    pd.testing.assert_series_equal(incremental.thresholds().sort_index(), completo.thresholds().sort_index())
+    np.testing.assert_array_equal(incremental.conteo, completo.conteo)
+    np.testing.assert_array_equal(incremental.vacios, completo.vacios)
+    np.testing.assert_array_equal(incremental.labels(viajes), completo.labels(viajes))
+    assert incremental.total_vacios == int(completo.labels(viajes).sum())
+
+
+def test_append_by_month_matches_full_rebuild(viajes):
+    historial, nuevos = viajes.iloc[:2_500], viajes.iloc[2_500:]
+    completo = EmptyLabeler.fit(viajes, por_mes=True)
+    incremental = EmptyLabeler.fit(historial, por_mes=True)
+    incremental.append(nuevos)
+
+    pd.testing.assert_series_equal(incremental.thresholds().sort_index(), completo.thresholds().sort_index())
+    np.testing.assert_array_equal(incremental.labels(viajes), completo.labels(viajes))
+
+
+def test_labels_match_notebook_definition(viajes):
+    #Percentil 10 de la ruta y viaje vacio si el peso es menor
+    umbral = viajes.groupby("Ruta")["Peso Kgs"].transform(lambda x: x.quantile(CUANTIL))
+    esperado = (viajes["Peso Kgs"] < umbral).astype(int).to_numpy()
+    np.testing.assert_array_equal(EmptyLabeler.fit(viajes).labels(viajes), esperado)
+
+
+def test_changed_rows_after_append(viajes):
+    historial, nuevos = viajes.iloc[:3_000], viajes.iloc[3_000:]
+    labeler = EmptyLabeler.fit(historial)
+    antes = labeler.labels(historial)
+    umbral_anterior = labeler.umbral.copy()
+    tocados = labeler.append(nuevos)
+    #Los grupos nuevos no tenian umbral
+    antes_umbral = np.full(len(tocados), np.nan)
+    existian = tocados < len(umbral_anterior)
+    antes_umbral[existian] = umbral_anterior[tocados[existian]]
+    filas, etiqueta = labeler.changed_rows(tocados, antes_umbral, len(historial))
+
+    despues = labeler.labels(historial)
+    np.testing.assert_array_equal(np.sort(filas), np.flatnonzero(antes != despues))
+    np.testing.assert_array_equal(etiqueta, despues[filas])
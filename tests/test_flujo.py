@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from flujo import PesoSketch, StreamAggregator, history_path
+
+CUANTILES = [0.01, 0.1, 0.25, 0.5, 0.9, 0.99]
+
+
+def _exact_bounds(valores, q):
+    #Estadisticos de orden que rodean al cuantil
+    ordenados = np.sort(valores)
+    rango = q * (len(ordenados) - 1)
+    return ordenados[int(np.floor(rango))], ordenados[int(np.ceil(rango))]
+
+
+@pytest.mark.parametrize("alpha", [0.01, 0.005])
+def test_quantile_within_relative_error(viajes, alpha):
+    pesos = viajes["Peso Kgs"].to_numpy(dtype=float)
+    sketch = PesoSketch(alpha=alpha)
+    sketch.add(pesos)
+    assert sketch.count == len(pesos)
+    for q in CUANTILES:
+        bajo, alto = _exact_bounds(pesos, q)
+        estimado = sketch.quantile(q)
+        assert bajo * (1 - 2 * alpha) <= estimado <= alto * (1 + 2 * alpha), q
+
+
+def test_merge_equals_single_sketch(viajes):
+    pesos = viajes["Peso Kgs"].to_numpy(dtype=float)
+    completo, a, b = PesoSketch(), PesoSketch(), PesoSketch()
+    completo.add(pesos)
+    a.add(pesos[:1_500])
+    b.add(pesos[1_500:])
+    a.merge(b)
+    np.testing.assert_array_equal(a.counts, completo.counts)
+    for q in CUANTILES:
+        assert a.quantile(q) == completo.quantile(q)
+
+
+def test_zeros_nan_and_count_below():
+    rng = np.random.default_rng(0)
+    valores = np.concatenate([np.zeros(100), [np.nan] * 10, rng.lognormal(9, 1, 900)])
+    sketch = PesoSketch()
+    sketch.add(valores)
+    assert sketch.count == 1_000
+    assert sketch.quantile(0.05) == 0.0
+    assert np.isnan(PesoSketch().quantile(0.5))
+
+    validos = valores[~np.isnan(valores)]
+    for umbral in [0.0, 1_000.0, 8_000.0, 50_000.0]:
+        exacto = int((validos < umbral).sum())
+        assert sketch.count_below(umbral) == pytest.approx(exacto, abs=0.02 * len(validos) + 1)
+
+
+def test_small_batches_equal_single_batch(viajes):
+    #Los lotes pendientes se combinan igual que si todo llegara en un solo lote
+    completo = StreamAggregator().update(viajes).result()
+    por_lotes = StreamAggregator()
+    for inicio in range(0, len(viajes), 150):
+        por_lotes.update(viajes.iloc[inicio:inicio + 150])
+    resultado = por_lotes.result()
+    assert resultado["filas"] == completo["filas"]
+    assert resultado["vacios"] == pytest.approx(completo["vacios"])
+    np.testing.assert_allclose(
+        resultado["umbral_ruta"].sort_index().to_numpy(), completo["umbral_ruta"].sort_index().to_numpy()
+    )
+    np.testing.assert_allclose(resultado["mensual"]["viaje_vacio"], completo["mensual"]["viaje_vacio"])
+
+
+def test_history_path_stays_in_folder(tmp_path):
+    carpeta = tmp_path / "historiales"
+    carpeta.mkdir()
+    (carpeta / "2024.csv").write_text("Ruta\n")
+    (tmp_path / "fuera.csv").write_text("Ruta\n")
+    (tmp_path / "historiales_otro.csv").write_text("Ruta\n")
+    assert history_path("2024.csv", carpeta) == (carpeta / "2024.csv").resolve()
+    for nombre in ["../fuera.csv", "../historiales_otro.csv", "falta.csv"]:
+        with pytest.raises(FileNotFoundError):
+            history_path(nombre, carpeta)
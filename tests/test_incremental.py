@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from almacen import STORE
+from carga import COLUMNAS_USADAS, compact_frame
+from incremental import TripHistory, append_trips, get_history
+from limpieza import clean_trips
+
+
+def _dataset(version, viajes):
+    limpios, _ = clean_trips(viajes)
+    vacia = pd.DataFrame({"Ruta": [], "Tractocamión": [], "Prob_vacio": []})
+    return STORE.put(version, {
+        "Viajes": compact_frame(limpios, COLUMNAS_USADAS["Viajes"]),
+        "Asignacion": vacia,
+        "Riesgo": vacia,
+        "Forecast": pd.DataFrame({"Fecha": [], "pronostico": []}),
+    })
+
+
+@pytest.fixture
+def partes(viajes):
+    return viajes.iloc[:3_000].reset_index(drop=True), viajes.iloc[3_000:].reset_index(drop=True)
+
+
+def test_append_matches_rebuild(partes):
+    historial, lote = partes
+    dataset = _dataset("prueba-rebuild", historial)
+    nuevo, reporte = append_trips(dataset, lote, "lote-rebuild")
+    assert reporte.agregadas == len(lote)
+    assert len(nuevo.viajes) == len(historial) + len(lote)
+
+    incremental = get_history(nuevo.version)
+    completo = TripHistory.build(nuevo.viajes)
+    np.testing.assert_array_equal(incremental.vacio, completo.vacio)
+    np.testing.assert_array_equal(incremental.llaves, completo.llaves)
+    pd.testing.assert_series_equal(
+        incremental.etiquetador.thresholds().sort_index(), completo.etiquetador.thresholds().sort_index()
+    )
+    for campo in ["meses", "viajes_mes", "vacios_mes", "viajes_mes_estatus", "en_ventana"]:
+        np.testing.assert_array_equal(getattr(incremental.cubo, campo), getattr(completo.cubo, campo))
+    #Mismos conteos por serie y mes (el orden de las series puede variar con las categorias)
+    for nombre, conteo in completo.conteos.items():
+        anexado = incremental.conteos[nombre]
+        np.testing.assert_array_equal(anexado.meses, conteo.meses)
+        for campo in ["viajes", "vacios"]:
+            pd.testing.assert_frame_equal(
+                pd.DataFrame(getattr(anexado, campo), index=anexado.nombres).sort_index(),
+                pd.DataFrame(getattr(conteo, campo), index=conteo.nombres).sort_index(),
+                check_dtype=False,
+            )
+
+
+def test_reappending_same_batch_is_a_noop(partes):
+    historial, lote = partes
+    dataset = _dataset("prueba-repetido", historial)
+    nuevo, reporte = append_trips(dataset, lote, "lote-repetido")
+
+    #El mismo lote sobre la misma version: la version ya calculada
+    otra_vez, reporte_otra = append_trips(dataset, lote, "lote-repetido")
+    assert otra_vez.version == nuevo.version and reporte_otra is reporte
+
+    #El mismo lote sobre la version que ya lo tiene: todo repetido, nada cambia
+    igual, repetido = append_trips(nuevo, lote, "lote-repetido-2")
+    assert igual.version == nuevo.version
+    assert (repetido.agregadas, repetido.duplicadas, repetido.descartadas) == (0, len(lote), 0)
+
+
+def test_new_route_gets_a_threshold(partes):
+    historial, lote = partes
+    dataset = _dataset("prueba-ruta-nueva", historial)
+    lote = lote.iloc[:40].assign(Ruta="RUTA NUEVA")
+    nuevo, reporte = append_trips(dataset, lote, "lote-ruta-nueva")
+    assert reporte.rutas_nuevas == 1
+
+    umbral = get_history(nuevo.version).etiquetador.thresholds()
+    assert umbral["RUTA NUEVA"] == pytest.approx(lote["Peso Kgs"].quantile(0.10))
+    assert "RUTA NUEVA" in set(reporte.rutas["Ruta"])
+
+
+def test_batch_is_imputed_with_history_medians(partes):
+    historial, lote = partes
+    dataset = _dataset("prueba-medianas", historial)
+    ruta = historial["Ruta"].value_counts().index[0]
+    lote = pd.concat([
+        lote.iloc[:2].assign(Ruta=ruta, **{"Peso Kgs": [np.nan, 1.0]}),
+        lote.iloc[2:4].assign(Ruta=ruta, **{"Fecha Llegada": [pd.NaT, pd.NaT]}),
+        lote.iloc[4:7].assign(Ruta="RUTA NUEVA", **{"Peso Kgs": [np.nan, 100.0, 300.0]}),
+    ], ignore_index=True)
+    nuevo, _ = append_trips(dataset, lote, "lote-medianas")
+
+    previos = dataset.viajes[dataset.viajes["Ruta"] == ruta]
+    agregados = nuevo.viajes.iloc[len(dataset.viajes):].reset_index(drop=True)
+    #Ruta del historial: su mediana en el historial, no la del lote (que solo tiene 1.0)
+    assert agregados.loc[0, "Peso Kgs"] == pytest.approx(previos["Peso Kgs"].median(), rel=1e-6)
+    assert agregados.loc[2:3, "Duración_horas"].to_numpy() == pytest.approx(
+        previos["Duración_horas"].median(), rel=1e-5
+    )
+    #Ruta nueva: la mediana del lote
+    assert agregados.loc[4, "Peso Kgs"] == pytest.approx(200.0)
+
+
+def test_report_counts_each_rejected_row_once(partes):
+    historial, lote = partes
+    dataset = _dataset("prueba-reporte", historial)
+    lote = pd.concat([
+        lote.iloc[:10],
+        lote.iloc[[0, 1]],
+        historial.iloc[[0]],
+        lote.iloc[[10]].assign(**{"Fecha Salida": pd.NaT, "Fecha Llegada": pd.NaT}),
+    ], ignore_index=True)
+    _, reporte = append_trips(dataset, lote, "lote-reporte")
+    assert (reporte.recibidas, reporte.agregadas, reporte.duplicadas, reporte.descartadas) == (14, 10, 3, 1)
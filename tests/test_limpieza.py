@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+
+from limpieza import COLUMNAS_DESCARTADAS, clean_trips
+
+
+def notebook_cleaning(viajes):
+    #Celdas de limpieza del notebook, tal cual; las fechas en una sola unidad para que pandas 3
+    #acepte las asignaciones con .loc
+    viajes = viajes.drop(columns=[c for c in COLUMNAS_DESCARTADAS if c in viajes.columns])
+    for c in ["Fecha", "Fecha.1", "Fecha Salida", "Fecha Llegada"]:
+        viajes[c] = pd.to_datetime(viajes[c], errors="coerce").astype("datetime64[ns]")
+
+    viajes = viajes.dropna(subset=["Fecha Salida", "Fecha Llegada"], how="all")
+    duracion = viajes["Fecha Llegada"] - viajes["Fecha Salida"]
+    mediana_ruta = duracion.groupby(viajes["Ruta"]).transform("median")
+    mediana_global = duracion.median()
+    mask = viajes["Fecha Llegada"].isna() & viajes["Fecha Salida"].notna()
+    viajes.loc[mask, "Fecha Llegada"] = viajes.loc[mask, "Fecha Salida"] + mediana_ruta
+    mask2 = viajes["Fecha Llegada"].isna() & viajes["Fecha Salida"].notna()
+    viajes.loc[mask2, "Fecha Llegada"] = viajes.loc[mask2, "Fecha Salida"] + mediana_global
+    mask3 = viajes["Fecha Salida"].isna() & viajes["Fecha Llegada"].notna()
+    viajes.loc[mask3, "Fecha Salida"] = viajes.loc[mask3, "Fecha Llegada"] - mediana_global
+    viajes = viajes.dropna(subset=["Fecha Salida", "Fecha Llegada"])
+
+    viajes["Fecha.1"] = viajes["Fecha.1"].fillna(viajes["Fecha"])
+    viajes["Fecha.1"] = viajes["Fecha.1"].fillna(viajes["Fecha Salida"])
+    viajes["Fecha.1"] = viajes["Fecha.1"].fillna(viajes["Fecha Llegada"])
+    viajes = viajes[viajes["Fecha Llegada"] >= viajes["Fecha Salida"]]
+    viajes["Duración_horas"] = (viajes["Fecha Llegada"] - viajes["Fecha Salida"]).dt.total_seconds() / 3600
+
+    viajes["Peso Kgs"] = viajes.groupby("Ruta")["Peso Kgs"].transform(lambda s: s.fillna(s.median()))
+    viajes["Peso Kgs"] = viajes["Peso Kgs"].fillna(viajes["Peso Kgs"].median())
+
+    for c in ["Tractocamión", "Estatus de Viaje", "Operador"]:
+        viajes[c] = viajes[c].fillna("DESCONOCIDO")
+    return viajes.drop_duplicates().reset_index(drop=True)
+
+
+def _sucios_con_casos(viajes_sucios):
+    #Ademas de los faltantes del generador: filas sin fechas, llegada antes de la salida y una
+    #ruta sin ninguna duracion ni peso (cae en las medianas globales)
+    df = viajes_sucios.copy()
+    df.loc[df.index[:5], ["Fecha Salida", "Fecha Llegada"]] = pd.NaT
+    df.loc[df.index[5:10], "Fecha Llegada"] = df.loc[df.index[5:10], "Fecha Salida"] - pd.Timedelta(hours=3)
+    df.loc[df.index[10:13], "Ruta"] = "RUTA SIN DATOS"
+    df.loc[df.index[10:13], ["Fecha Llegada", "Peso Kgs"]] = [pd.NaT, np.nan]
+    return df
+
+
+def test_clean_trips_matches_notebook(viajes_sucios):
+    sucios = _sucios_con_casos(viajes_sucios)
+    limpios, reporte = clean_trips(sucios)
+    esperado = notebook_cleaning(sucios.copy())
+
+    pd.testing.assert_frame_equal(limpios, esperado[limpios.columns], check_dtype=False)
+    assert list(limpios.columns) == list(esperado.columns)
+    assert reporte["Filas resultantes"] == len(esperado)
+    assert reporte["Sin salida ni llegada"] >= 5
+    assert reporte["Llegada antes de la salida"] >= 5
+    assert reporte["Llegada imputada (global)"] >= 3
+    assert reporte["Peso imputado (global)"] >= 3
+    assert reporte["Duplicados"] > 0
+
+
+def test_clean_trips_does_not_modify_input(viajes_sucios):
+    copia = viajes_sucios.copy()
+    clean_trips(viajes_sucios)
+    pd.testing.assert_frame_equal(viajes_sucios, copia)
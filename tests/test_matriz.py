@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from generar_datos import risk_tables
+import matriz as matriz_mod
+from matriz import RiskMatrix
+
+
+@pytest.mark.parametrize("denso", [True, False])
+def test_pair_lookup_matches_groupby_mean(catalogo, monkeypatch, denso):
+    riesgo, asignacion = risk_tables(catalogo)
+    #Pares repetidos y filas sin probabilidad, como puede venir la hoja Riesgo
+    riesgo = pd.concat([riesgo, riesgo.iloc[:50].assign(Prob_vacio=0.9)], ignore_index=True)
+    riesgo.loc[riesgo.index[-5:], "Prob_vacio"] = np.nan
+    if not denso:
+        monkeypatch.setattr(matriz_mod, "MAX_CELDAS_DENSAS", 0)
+    matriz = RiskMatrix(riesgo, asignacion)
+    assert (matriz._par_pos is not None) == denso
+
+    esperado = riesgo.groupby(["Ruta", "Tractocamión"])["Prob_vacio"].mean().dropna()
+    for (ruta, unidad), prob in esperado.sample(300, random_state=0).items():
+        assert matriz.prob(ruta, unidad) == pytest.approx(prob)
+
+    ruta = matriz.rutas[0]
+    unidades = set(matriz.route_units(ruta))
+    fuera = next(u for u in matriz.unidades if u not in unidades)
+    assert np.isnan(matriz.prob(ruta, fuera))
+    assert np.isnan(matriz.prob("NO EXISTE", matriz.unidades[0]))
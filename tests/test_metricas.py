@@ -0,0 +1,43 @@
+import logging
+from types import SimpleNamespace
+
+import pytest
+from streamlit.runtime import scriptrunner
+
+import metricas
+from metricas import Registro, install_payload_counter, medir
+
+
+class _Mensaje:
+
+    def __init__(self, n):
+        self.n = n
+
+    def ByteSize(self):
+        return self.n
+
+
+def test_payload_counter_counts_bytes_once(monkeypatch):
+    enviados = []
+    ctx = SimpleNamespace(_enqueue=enviados.append)
+    monkeypatch.setattr(scriptrunner, "get_script_run_ctx", lambda: ctx)
+    registro = Registro()
+
+    assert install_payload_counter()
+    assert install_payload_counter()
+    with medir("pagina", registro=registro):
+        ctx._enqueue(_Mensaje(2048))
+    assert len(enviados) == 1
+    assert registro.summary()[0]["kb_enviados"] == pytest.approx(2.0)
+
+
+def test_payload_counter_without_enqueue_is_noop(monkeypatch, caplog):
+    ctx = SimpleNamespace()
+    monkeypatch.setattr(scriptrunner, "get_script_run_ctx", lambda: ctx)
+    monkeypatch.setattr(metricas, "_sin_enqueue", False)
+
+    with caplog.at_level(logging.WARNING, logger="tablero.metricas"):
+        assert not install_payload_counter()
+        assert not install_payload_counter()
+    assert not hasattr(ctx, "_enqueue")
+    assert len(caplog.records) == 1
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("xgboost")
+
+from entrenamiento import save_artifact, train, trip_features  # noqa: E402
+from modelos import NativeModel, score_grid  # noqa: E402
+
+
+class _Tiempos:
+    etapas = {}
+
+    def memoria_pico_mb(self):
+        return None
+
+
+def test_native_model_round_trip_with_integer_unit_ids(tmp_path, viajes):
+    #Numeros de unidad enteros, como llegan de Excel
+    viajes = viajes.assign(Tractocamión=viajes["Tractocamión"].str[1:].astype(int))
+    X, y = trip_features(viajes)
+    booster, _ = train(X, y, hilos=1, arboles=20, prueba=0)
+    modelo = NativeModel.load(save_artifact(booster, X, {}, _Tiempos(), {}, carpeta=tmp_path))
+
+    unidades = np.sort(viajes["Tractocamión"].unique())
+    codigos = modelo.codes("Tractocamión", unidades)
+    assert (codigos >= 0).all()
+    np.testing.assert_array_equal(codigos, X["Tractocamión"].cat.categories.get_indexer(unidades))
+    np.testing.assert_array_equal(modelo.codes("Tractocamión", unidades.astype(str)), codigos)
+    assert modelo.codes("Tractocamión", [999_999])[0] == -1
+
+    #Las filas de entrenamiento, reconstruidas con los codigos del modelo guardado, dan la misma prediccion
+    codigos = {c: modelo.codes(c, X[c].astype(object)) for c in modelo.categorias}
+    numericas = {c: X[c].to_numpy() for c in modelo.numericas}
+    np.testing.assert_allclose(
+        modelo.predict_proba(modelo.frame(codigos, numericas))[:, 1], booster.inplace_predict(X), rtol=1e-6
+    )
+
+    riesgo = score_grid(modelo, viajes, pares=viajes[["Ruta", "Tractocamión"]].drop_duplicates(), max_workers=1)
+    assert riesgo["Prob_vacio"].between(0, 1).all()
+    assert riesgo["Prob_vacio"].nunique() > 1
@@ -0,0 +1,83 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import carga
+from motor import EngineServer, Motor, fleet_kpis, make_handler
+
+
+@pytest.fixture
+def libro(tmp_path, monkeypatch, escribir_libro, viajes_sucios):
+    monkeypatch.setattr(carga, "CACHE_DIR", tmp_path / ".cache_datos")
+    monkeypatch.chdir(tmp_path)
+    return escribir_libro(tmp_path / "Viajes.xlsx", viajes_sucios.iloc[:1_500])
+
+
+def test_outputs_match_dashboard_services(libro):
+    import servicios
+
+    motor = Motor.from_workbook(libro)
+    salidas = motor.outputs()
+    #Lo que ven las pantallas con las opciones por defecto de la barra lateral (libro local ya en memoria)
+    ctx = servicios.get_context()
+
+    assert ctx.version == motor.version
+    pd.testing.assert_frame_equal(ctx.asignacion, salidas["asignacion"])
+    assert fleet_kpis(ctx.snapshot) == salidas["kpis"]
+    pd.testing.assert_frame_equal(ctx.comparacion, salidas["comparacion"])
+
+    cubo = servicios.get_cube(ctx.version_datos, ctx.viajes, ctx.snapshot.viaje_vacio)
+    pd.testing.assert_frame_equal(cubo.monthly_empty(cubo.etiquetas), salidas["serie_mensual"])
+    pd.testing.assert_frame_equal(cubo.status_counts(cubo.etiquetas), salidas["estatus"])
+
+    matriz = servicios.get_risk_matrix(ctx.version_tablas, ctx.riesgo, ctx.asignacion)
+    pd.testing.assert_frame_equal(matriz.top(10), salidas["rutas_riesgosas"])
+    pd.testing.assert_frame_equal(matriz.top(10, ascending=True), salidas["rutas_eficientes"])
+
+    pronosticos = servicios.forecasts_job(ctx.version_datos, ctx.viajes, ctx.snapshot.viaje_vacio).result(timeout=120)
+    pd.testing.assert_frame_equal(pronosticos["Ruta"].table(), salidas["pronostico_ruta"])
+    pd.testing.assert_frame_equal(pronosticos["Global"].series("Global"), salidas["pronostico_global"])
+
+
+@pytest.fixture
+def servidor(libro):
+    motor_http = EngineServer(libro.parent)
+    http = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(motor_http))
+    hilo = threading.Thread(target=http.serve_forever, daemon=True)
+    hilo.start()
+    yield f"http://127.0.0.1:{http.server_address[1]}"
+    http.shutdown()
+    http.server_close()
+
+
+def _get(url):
+    try:
+        with urllib.request.urlopen(url, timeout=60) as respuesta:
+            return respuesta.status, json.loads(respuesta.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_http_defaults_to_the_assignment_sheet(servidor, libro):
+    estado, asignacion = _get(f"{servidor}/salidas/Viajes.xlsx/asignacion")
+    assert estado == 200
+    hoja = Motor.from_workbook(libro).asignacion_hoja
+    assert len(asignacion) == len(hoja)
+    np.testing.assert_allclose([a["Prob_vacio"] for a in asignacion], hoja["Prob_vacio"].to_numpy(), rtol=1e-6)
+
+
+def test_http_unexpected_errors_get_a_500(servidor, monkeypatch):
+    def fallar(self, top_n=10):
+        raise RuntimeError("sin solucion")
+
+    monkeypatch.setattr(Motor, "outputs", fallar)
+    estado, cuerpo = _get(f"{servidor}/salidas/Viajes.xlsx/kpis?capacidad=3")
+    assert estado == 500
+    assert cuerpo == {"error": "RuntimeError: sin solucion"}
+    assert _get(f"{servidor}/salidas/otro.xlsx")[0] == 404
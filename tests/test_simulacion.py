@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from simulacion import FleetScenario, probability_groups, run_draws, simulate
+
+
+def _escenario(semilla=0, n_rutas=300):
+    rng = np.random.default_rng(semilla)
+    actual = rng.uniform(0.02, 0.6, n_rutas)
+    return FleetScenario(
+        rutas=np.asarray([f"R{i}" for i in range(n_rutas)], dtype=object),
+        viajes_mes=rng.uniform(1, 30, n_rutas),
+        prob_actual=actual,
+        prob_optima=actual * rng.uniform(0.5, 1.1, n_rutas),
+    )
+
+
+def test_scenario_against_itself_saves_nothing():
+    base = _escenario()
+    mismo = FleetScenario(base.rutas, base.viajes_mes, base.prob_actual, base.prob_actual)
+    resultado = simulate(mismo, escenarios=3_000, horizonte=4)
+    assert (resultado.ahorro == 0).all()
+    assert resultado.prob_mejora == 0
+    assert resultado.esperado_actual == resultado.esperado_optima
+
+
+def test_common_random_numbers_keep_means_and_narrow_the_savings():
+    escenario = _escenario()
+    resultado = simulate(escenario, escenarios=4_000, horizonte=3)
+    n, p_act, p_opt = probability_groups(escenario.viajes_mes, escenario.prob_actual, escenario.prob_optima)
+
+    #Cada asignacion por separado sigue siendo la suma de binomiales de sus grupos
+    for datos, p in [(resultado.actual, p_act), (resultado.optima, p_opt)]:
+        assert datos.mean() == pytest.approx(n @ p, rel=0.01)
+        assert datos.var() == pytest.approx(n @ (p * (1 - p)), rel=0.1)
+
+    #Con los mismos uniformes el ahorro varia mucho menos que con corridas independientes
+    independiente = n @ (p_act * (1 - p_act)) + n @ (p_opt * (1 - p_opt))
+    assert resultado.ahorro.var() < 0.5 * independiente
+    assert resultado.ahorro.mean() == pytest.approx(n @ (p_act - p_opt), rel=0.02)
+
+
+def test_draws_do_not_depend_on_batches_and_handle_certain_trips():
+    n = np.array([5, 10, 3])
+    p_act = np.array([1.0, 0.3, 0.0])
+    p_opt = np.array([0.2, 1.0, 0.0])
+    actual, optima = run_draws(n, p_act, p_opt, escenarios=5_000, horizonte=2, semilla=3)
+    assert actual.shape == optima.shape == (5_000, 2)
+    assert actual.min() >= 5 and optima.min() >= 10
+    otra_vez = run_draws(n, p_act, p_opt, escenarios=5_000, horizonte=2, semilla=3)
+    np.testing.assert_array_equal(actual, otra_vez[0])